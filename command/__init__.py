@@ -2,6 +2,6 @@ from command.drivetrain import DriveSwerveCustom, DrivetrainZero, DriveSwerveAim
 from command.intake import RunIntake, IntakeIdle, DeployIntake, DeployTenting, PassIntakeNote, EjectIntake, UnDeployTenting, RunIntakeConstant
 from command.elevator import ZeroElevator, SetElevator, SetElevatorClimbDown
 from command.wrist import SetWrist, FeedIn, FeedOut, ZeroWrist, PassNote, AimWrist, SetWristIdle, SourceFeed
-from command.flywheel import SetFlywheelLinearVelocity, SetFlywheelVelocityIndependent, SetFlywheelShootSpeaker, SetFlywheelShootFeeder
-from command.controller import Giraffe, StageNote, AimWristSpeaker, Shoot, EnableClimb, UndoClimb, EmergencyManuver, IntakeStageNote, IntakeStageIdle, Amp, ScoreTrap, ClimbDown,\
+from command.flywheel import SetFlywheelLinearVelocity, SetFlywheelVelocityIndependent, SetFlywheelShootSpeaker, SetFlywheelShootFeeder, FlywheelPreSpin, WaitForShot
+from command.controller import Giraffe, SetGiraffe, StageNote, AimWristSpeaker, Shoot, EnableClimb, UndoClimb, EmergencyManuver, IntakeStageNote, IntakeStageIdle, Amp, ScoreTrap, ClimbDown,\
     ShootAuto, ControllerRumble, ControllerRumbleTimeout, IntakeStageNoteAuto, PathUntilIntake, AutoPickupNote, PathIntakeAim, IntakeThenAim
@@ -24,6 +24,7 @@ from enum import Enum
 
 from robot_systems import Field
 from sensors.trajectory_calc import TrajectoryCalculator
+from utils import SignalLogger
 
 class AngleType(Enum):
 
@@ -45,6 +46,9 @@ class FollowPathCustom(SubsystemCommand[SwerveDrivetrain]):
     :type theta_f: float
     """
 
+    # shared by every path, [goal x, goal y, goal theta] each loop for utils.log_analysis
+    goal_entry = None
+
     def __init__(
             self,
             subsystem: SwerveDrivetrain,
@@ -136,6 +140,9 @@ class FollowPathCustom(SubsystemCommand[SwerveDrivetrain]):
             goal.pose.Y(),
             self.theta_f
         ])
+        if config.SIGNAL_LOGGING:
+            FollowPathCustom.goal_entry = FollowPathCustom.goal_entry or SignalLogger.double_array('auto/goal')
+            FollowPathCustom.goal_entry.append([goal.pose.X(), goal.pose.Y(), self.theta_f])
         # table.putBoolean("goal reached", goal_reached)
         # table.putNumber("theta_i", math.degrees(self.theta_i))
         # table.putNumber("theta_f", math.degrees(self.theta_f))
@@ -3,7 +3,7 @@ import math  # noqa
 from typing import Literal  # noqa
 
 from subsystem import Elevator, Wrist, Intake, Drivetrain, Flywheel
-from sensors import FieldOdometry, TrajectoryCalculator, Limelight
+from sensors import FieldOdometry, TrajectoryCalculator, Limelight, ShotDetector
 import commands2
 import ntcore
 import wpilib  # noqa
@@ -38,16 +38,57 @@ from command import (
     SetWrist,
     SetWristIdle,
     UnDeployTenting,
-    DriveSwerveNoteLineup
+    DriveSwerveNoteLineup,
+    WaitForShot,
 )
 
 # from command import *  # noqa
 from sensors import FieldOdometry, TrajectoryCalculator  # noqa
 from subsystem import Drivetrain, Elevator, Flywheel, Intake, Wrist
 from units.SI import degrees_to_radians, inches_to_meters
+from utils.giraffe_planner import GiraffePlan, GiraffePlanner
 from wpilib import Joystick
 
 
+class SetGiraffe(commands2.Command):
+    """
+    Moves the elevator and wrist together along a GiraffePlan.
+
+    Finishes once the plan is done and both are at its goal.
+    """
+
+    def __init__(self, elevator: Elevator, wrist: Wrist, plan: GiraffePlan | None = None):
+        super().__init__()
+        self.elevator = elevator
+        self.wrist = wrist
+        self.plan = plan
+        self.timer = wpilib.Timer()
+        self.addRequirements(elevator, wrist)
+
+    def initialize(self):
+        self.timer.restart()
+        self.elevator.elevator_moving = True
+        self.wrist.wrist_moving = True
+        self.execute()
+
+    def execute(self):
+        height, angle = self.plan.sample(self.timer.get())
+        self.elevator.set_length(height)
+        self.wrist.set_wrist_angle(angle, height=height)
+
+    def isFinished(self) -> bool:
+        return (
+            self.timer.get() >= self.plan.duration
+            # Rounding to make sure it's not too precise, as SetElevator does
+            and round(self.elevator.get_length(), 2) == round(self.plan.goal_height, 2)
+            and self.wrist.is_at_angle(self.plan.goal_angle)
+        )
+
+    def end(self, interrupted: bool):
+        self.elevator.elevator_moving = False
+        self.wrist.wrist_moving = False
+
+
 class Giraffe(commands2.Command):
     """
     Giraffe command that sets the elevator and wrist to a certain position.
@@ -56,17 +97,22 @@ class Giraffe(commands2.Command):
     :param wrist: Wrist subsystem
     :param target: config.Giraffe.GiraffePos
     :param shot_calc: TrajectoryCalculator | None
+    :param planner: GiraffePlanner to plan the move with, defaults to the one shared by every Giraffe
 
-    Runs respective commands with safety and overlap checks.
+    Runs SetGiraffe along a coordinated plan with safety and overlap checks.
     """
 
+    planner: GiraffePlanner = GiraffePlanner()
+
     def __init__(
             self,
             elevator: Elevator,
             wrist: Wrist,
             target: config.Giraffe.GiraffePos,
             shot_calc: TrajectoryCalculator | None = None,
+            planner: GiraffePlanner | None = None,
     ):
+        super().__init__()
         self.elevator = elevator
         self.wrist = wrist
         self.target = target
@@ -79,6 +125,10 @@ class Giraffe(commands2.Command):
         self.table = ntcore.NetworkTableInstance.getDefault().getTable(
             "giraffe commands"
         )
+        self.planner = planner or Giraffe.planner
+        # built once and rescheduled with a new plan every time
+        self.move = SetGiraffe(elevator, wrist)
+        self.sequence = SequentialCommandGroup(self.move, InstantCommand(lambda: self.finish()))
 
     def finish(self):
         self.finished = True
@@ -93,7 +143,6 @@ class Giraffe(commands2.Command):
         self.table.putBoolean("interrupted", False)
         self.continuous_command: FeedIn | AimWrist | None = None  # noqa
 
-        commands = []
         debug_commands = []
 
         if self.target.height == None or self.target.wrist_angle == None:  # noqa
@@ -171,30 +220,25 @@ class Giraffe(commands2.Command):
             )
             return
 
-        commands.append(
-            ParallelCommandGroup(
-                SetElevator(self.elevator, self.target.height),  # noqa
-                SetWrist(self.wrist, self.target.wrist_angle),  # noqa
-            )
+        plan = self.planner.plan(
+            self.elevator.get_length(),
+            self.wrist.get_wrist_angle(),
+            self.elevator.limit_length(self.target.height),
+            self.wrist.limit_angle(self.target.wrist_angle),
         )
+        if plan is None:
+            self.finished = True
+            print("keep out region in the way")
+            return
 
         debug_commands.append(PrintCommand("running wrist and elevator normally"))
 
         # print('running alll commands like normal')
 
-        commands2.CommandScheduler.getInstance().schedule(
-            ParallelCommandGroup(
-                SequentialCommandGroup(
-                    *commands,
-                    InstantCommand(lambda: self.finish()),
-                    # ParallelCommandGroup(
-                    #     InstantCommand(lambda: self.finish()),
-                    #     self.continuous_command
-                    # )
-                ),
-                # self.continuous_command
-            )
-        )
+        self.move.plan = plan
+        # the last move might still be running if this was interrupted
+        self.sequence.cancel()
+        commands2.CommandScheduler.getInstance().schedule(self.sequence)
 
     def isFinished(self) -> bool:
         return self.finished
@@ -316,14 +360,24 @@ class Shoot(SequentialCommandGroup):
 
     Args:
         SequentialCommandGroup (wrist): Wrist subsystem
+        SequentialCommandGroup (shot_detector): Ends as soon as it sees the shot instead of after a fixed wait
     """
 
-    def __init__(self, wrist: Wrist):
-        super().__init__(
-            PassNote(wrist),  # noqa
-            WaitCommand(0.5),
-            SetWristIdle(wrist),
-        )
+    def __init__(self, wrist: Wrist, shot_detector: ShotDetector | None = None):
+        if shot_detector is None:
+            super().__init__(
+                PassNote(wrist),  # noqa
+                WaitCommand(0.5),
+                SetWristIdle(wrist),
+            )
+        else:
+            wait = WaitForShot(shot_detector, 0.5)
+            super().__init__(
+                InstantCommand(wait.mark),
+                PassNote(wrist),  # noqa
+                wait,
+                SetWristIdle(wrist),
+            )
         self.InterruptionBehavior = 1
 
 
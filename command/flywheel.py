@@ -2,10 +2,14 @@ from __future__ import annotations
 import utils
 import constants, config
 
-from toolkit.command import SubsystemCommand
-from subsystem import Flywheel
-from sensors import TrajectoryCalculator
-from units.SI import meters_per_second
+from wpilib import PowerDistribution, RobotController, Timer
+from wpimath.geometry import Pose2d
+from wpimath.kinematics import ChassisSpeeds
+
+from toolkit.command import BasicCommand, SubsystemCommand
+from subsystem import Flywheel, Intake, Wrist
+from sensors import ShotDetector, TrajectoryCalculator
+from units.SI import meters_per_second, seconds
 import robot_states as states
 from enum import Enum
 
@@ -134,4 +138,105 @@ class SetFlywheelShootFeeder(SubsystemCommand[Flywheel]):
         return False
     
     def end(self, interrupted: bool) -> None:
-        pass
\ No newline at end of file
+        pass
+
+
+class FlywheelPreSpin(SubsystemCommand[Flywheel]):
+    """
+    Holds the flywheel at the speed the next shot will need while a note is on its way, so a shot starts
+    with little left to spin up.
+
+    With a note in the intake or feeder it predicts the robot pose config.prespin_lookahead ahead from the
+    chassis speeds, and spins for a speaker shot from there, or a feed shot when that is farther than
+    config.prespin_speaker_range from the speaker. Without a note it idles at config.idle_flywheel.
+
+    The target is capped at what the flywheel can hold with config.prespin_voltage_reserve volts to spare,
+    and stops rising while the robot draws more than config.prespin_current_budget.
+    """
+    def __init__(
+        self,
+        subsystem: Flywheel,
+        wrist: Wrist,
+        intake: Intake,
+        trajectory: TrajectoryCalculator,
+        power: PowerDistribution | None = None,
+    ):
+        super().__init__(subsystem)
+        self.subsystem = subsystem
+        self.wrist = wrist
+        self.intake = intake
+        self.traj = trajectory
+        self.power = power
+        self.target: meters_per_second = config.idle_flywheel
+
+    def initialize(self):
+        self.target = self.subsystem.angular_velocity_to_linear_velocity(self.subsystem.flywheel_top_target)
+
+    def note_coming(self) -> bool:
+        return self.wrist.note_in_feeder() or self.intake.detect_note()
+
+    def predicted_pose(self) -> Pose2d:
+        pose = self.traj.odometry.getPose()
+        speeds = ChassisSpeeds.fromRobotRelativeSpeeds(self.traj.odometry.drivetrain.chassis_speeds, pose.rotation())
+        return Pose2d(
+            pose.X() + speeds.vx * config.prespin_lookahead,
+            pose.Y() + speeds.vy * config.prespin_lookahead,
+            pose.rotation(),
+        )
+
+    def predicted_speed(self) -> meters_per_second:
+        pose = self.predicted_pose()
+        distance = self.traj.get_distance_to_target(pose)
+        if distance <= config.prespin_speaker_range:
+            return self.traj.get_flywheel_speed(distance)
+        return self.traj.get_flywheel_speed_feed(self.traj.get_distance_to_feed_zone(pose))
+
+    def battery_limit(self) -> meters_per_second:
+        """
+        Fastest the flywheel can hold with the reserve voltage to spare, from the Talon velocity feed forward.
+        """
+        voltage = RobotController.getBatteryVoltage() - config.prespin_voltage_reserve
+        rps = max(voltage, 0) / config.FLYWHEEL_CONFIG.kV
+        return self.subsystem.angular_velocity_to_linear_velocity(self.subsystem.rps_to_angular_velocity(rps))
+
+    def execute(self):
+        target = min(self.predicted_speed() if self.note_coming() else config.idle_flywheel, self.battery_limit())
+
+        if (
+            target > self.target
+            and self.power is not None
+            and self.power.getTotalCurrent() > config.prespin_current_budget
+        ):
+            target = self.target
+
+        self.target = target
+        self.subsystem.set_velocity_linear(target)
+
+    def isFinished(self) -> bool:
+        return False
+
+    def end(self, interrupted: bool) -> None:
+        pass
+
+
+class WaitForShot(BasicCommand):
+    """
+    Waits for the shot detector to see a shot after mark was last called, or for timeout seconds.
+
+    Call mark when the note starts toward the flywheel, so a shot seen before this command starts still counts.
+    """
+    def __init__(self, detector: ShotDetector, timeout: seconds):
+        super().__init__()
+        self.detector = detector
+        self.timeout = timeout
+        self.count = detector.count
+        self.timer = Timer()
+
+    def mark(self):
+        self.count = self.detector.count
+
+    def initialize(self):
+        self.timer.restart()
+
+    def isFinished(self) -> bool:
+        return self.detector.count > self.count or self.timer.hasElapsed(self.timeout)
@@ -1,4 +1,5 @@
 import math
+import threading
 
 import wpilib  # noqa
 from commands2 import SequentialCommandGroup  # noqa
@@ -124,6 +125,7 @@ class AimWrist(SubsystemCommand[Wrist]):
 
     def initialize(self):
         self.subsystem.wrist_moving = True
+        self.subsystem.reset_profile()
 
     def execute(self):
         angle = (
@@ -136,12 +138,16 @@ class AimWrist(SubsystemCommand[Wrist]):
             else self.traj_calc.get_feed_theta(True)
         )
 
-        self.subsystem.aim_wrist(angle)
+        self.subsystem.aim_wrist(angle, self.traj_calc.elevator.get_length())
 
+        # the profile ends at the angle without overshooting, so the wrist is aimed once the profile is about
+        # to settle and the wrist is tracking it
         if (
+            self.subsystem.time_to_settle <= config.wrist_shot_settle_time
+            and
             self.subsystem.is_at_angle(angle, math.radians(config.wrist_shot_tolerance))
             and
-            self.subsystem.get_wrist_velocity() < config.wrist_velocity_shot_tolerance
+            abs(self.subsystem.get_wrist_velocity()) < config.wrist_velocity_shot_tolerance
             ):
             self.subsystem.ready_to_shoot = True
         else:
@@ -165,17 +171,29 @@ class FeedIn(SubsystemCommand[Wrist]):
     """
     Feed note into back of feeder.
     Start by going fast, until first beam break sees note, then slow down.
-    Stop when second beam break sees note.
+    Stop when second beam break sees note, from its interrupt rather than on the next loop.
     """
 
     def __init__(self, subsystem: Wrist):
         super().__init__(subsystem)
         self.subsystem = subsystem
         self.first_note_detected: bool = False
+        self.note_stopped: bool = False
+        # the interrupt thread's stop and the loop's feeder writes, so a write can't land after the stop
+        self.feed_lock = threading.Lock()
+
+    def stop_on_note(self, timestamp: float):
+        with self.feed_lock:
+            self.note_stopped = True
+            self.subsystem.stop_feed()
 
     def initialize(self):
-        if not self.subsystem.detect_note_second():
-            self.subsystem.feed_in()
+        self.first_note_detected = False
+        self.note_stopped = False
+        self.subsystem.beam_break_second.on_blocked.append(self.stop_on_note)
+        with self.feed_lock:
+            if not self.subsystem.detect_note_second() and not self.note_stopped:
+                self.subsystem.feed_in()
 
     def execute(self):
         if self.subsystem.detect_note_first():
@@ -187,14 +205,17 @@ class FeedIn(SubsystemCommand[Wrist]):
             else config.feeder_voltage_feed
         )
 
-        if not self.subsystem.detect_note_second():
-            self.subsystem.set_feed_voltage(voltage)
+        with self.feed_lock:
+            if not self.subsystem.detect_note_second() and not self.note_stopped:
+                self.subsystem.set_feed_voltage(voltage)
 
     def isFinished(self):
-        return self.subsystem.detect_note_second()
+        return self.note_stopped or self.subsystem.detect_note_second()
         # return True
 
     def end(self, interrupted: bool):
+        if self.stop_on_note in self.subsystem.beam_break_second.on_blocked:
+            self.subsystem.beam_break_second.on_blocked.remove(self.stop_on_note)
         self.subsystem.stop_feed()
         if not interrupted:
             self.subsystem.note_staged = True
@@ -18,8 +18,10 @@ from units.SI import (
     meters,
     meters_per_second,
     radians,
+    radians_per_second,
     degrees,
-    inches
+    inches,
+    seconds
 )
 
 comp_bot: DigitalInput = DigitalInput(
@@ -32,6 +34,8 @@ DEBUG_MODE: bool = False
 LOGGING: bool = True
 LOG_OUT_LEVEL: int = 0
 LOG_FILE_LEVEL: int = 1
+LOG_BUFFER_SIZE: int = 512  # messages waiting to be written before new ones are dropped
+SIGNAL_LOGGING: bool = True  # log registered signals to the DataLog every loop
 
 # Levels are how much information is logged
 # higher level = less information
@@ -57,6 +61,15 @@ NT_INTAKE: bool = True
 # Giraffe
 elevator_wrist_limit: float = 0.75  # TODO: PLACEHOLDER
 elevator_wrist_threshold: float = 0.75  # TODO: PLACEHOLDER
+elevator_max_velocity: meters_per_second = 0.8  # TODO: PLACEHOLDER, Giraffe motion planner limits
+elevator_max_acceleration: float = 3  # meters per second squared, TODO: PLACEHOLDER
+wrist_max_velocity: radians_per_second = 4  # TODO: PLACEHOLDER
+wrist_max_acceleration: float = 16  # radians per second squared, TODO: PLACEHOLDER
+# (min height, max height), (min wrist angle, max wrist angle) boxes the elevator and wrist can't pass through together
+giraffe_keep_out: list[tuple[tuple[meters, meters], tuple[radians, radians]]] = []
+giraffe_plan_step: seconds = 0.01  # time step plans are checked against giraffe_keep_out at
+giraffe_plan_start_tolerance: float = 0.02  # meters or radians, starts this close share a cached plan
+giraffe_plan_cache_size: int = 256
 
 # odometry config
 
@@ -81,6 +94,7 @@ stage_distance_threshold: float = constants.FieldPos.Stage.stage_length * math.s
 # Leds
 leds_id = 0
 leds_size = 28
+leds_frame_rate: float = 30  # frames per second, rendered off the main loop
 
 
 class LEDType:
@@ -104,12 +118,16 @@ class LEDType:
     def KLadder(typeA, typeB, percent, speed):
         return {
             "type": 5,
-            "percent": percent,  # 0-1
+            "percent": percent,  # 0-1, or a function returning it
             "typeA": typeA,
             "typeB": typeB,
             "speed": speed,
         }
 
+    def KLayers(*layers):
+        # sensors.leds Segment, Progress and Overlay layers, drawn in order
+        return {"type": 6, "layers": layers}
+
     def __getitem__(self, item):
         if item == 1:
             return self.KStatic
@@ -119,6 +137,8 @@ class LEDType:
             return self.KBlink
         elif item == 5:
             return self.KLadder
+        elif item == 6:
+            return self.KLayers
         else:
             raise KeyError(f"Type {item} is not supported.")
 
@@ -208,6 +228,11 @@ feed_motor_id = 3
 feed_motor_ramp_rate = 0
 wrist_max_ff = -0.32  # used to be -0.9
 wrist_ff_offset = 14.3 * degrees_to_radians
+wrist_aim_ff_offset: float = -0.2  # volts added to the aim (slot 1) feed forward, tuned on the robot
+wrist_ff_height_gain: float = 0  # share the gravity feed forward changes by per meter of elevator height, TODO: measure
+wrist_ff_angle_step: radians = 1 * degrees_to_radians  # feed forward table spacing
+wrist_ff_height_step: meters = 0.05
+wrist_shot_settle_time: seconds = 0.04  # aimed once the wrist profile will settle within this
 stage_timeout = 5
 wrist_tent_limit = 15 * degrees_to_radians
 feeder_velocity = 0.2
@@ -219,6 +244,8 @@ feeder_pass_voltage = 2
 feeder_sensor_threshold = 0.65
 feeder_beam_break_first_channel = 1
 feeder_beam_break_second_channel = 0
+beam_break_interrupts: bool = True  # latch the feeder beam break edges on their own threads
+beam_break_events: int = 16  # edges kept per beam break
 
 # DRIVETRAIN
 front_left_move_id = 7
@@ -287,6 +314,7 @@ v0_flywheel_maximum: meters_per_second = 28
 idle_flywheel: meters_per_second = v0_flywheel_minimum / 2
 shooter_tol = 0.001  # For aim of shooter
 max_sim_times = 100  # To make sure that we don't have infinite while loop
+shot_map_enabled: bool = True  # aim from the drag solved table written by sensors.shot_map, when there is one
 auto_shoot_deadline = 1.5
 auto_intake_note_deadline = 3
 auto_path_intake_note_deadline = 1
@@ -299,6 +327,24 @@ flywheel_min_shot_tolerance_distance: meters = 7
 flywheel_max_shot_tolerance: meters_per_second = 0.375
 flywheel_max_shot_tolerance_distance: meters = 4
 flywheel_shot_current_threshold = 20
+flywheel_state_space: bool = False  # LQR and Kalman filter voltage control instead of the Talon velocity loop
+flywheel_lqr_velocity_tolerance: radians_per_second = 1.5
+flywheel_lqr_voltage_tolerance: float = 12  # volts
+flywheel_kalman_model_std: radians_per_second = 3
+flywheel_kalman_encoder_std: radians_per_second = 0.01
+flywheel_measurement_latency: seconds = 0.025  # velocity status signal period
+prespin_enabled: bool = True  # hold the flywheel at the predicted shot speed while a note is on its way
+prespin_lookahead: seconds = 0.5  # how far ahead to predict the robot pose from its speed
+prespin_speaker_range: meters = 7  # past this from the speaker, pre spin for a feed shot instead
+prespin_voltage_reserve: float = 2  # volts under the battery voltage the flywheel may hold its speed with
+prespin_current_budget: float = 300  # amps, total draw over which pre spin stops raising the flywheel target
+shot_detector_enabled: bool = True  # watch the flywheel signals for shots on their own thread
+shot_detector_frequency: float = 250  # hertz, flywheel velocity and torque current updates while detecting shots
+shot_detector_window: int = 50  # samples the current baseline and peak velocity are taken over
+shot_detector_drift: float = 5  # amps over the baseline current ignored by the change point sum
+shot_detector_threshold: float = 60  # amp samples over the drift that mark a shot
+shot_detector_velocity_drop: float = 1.5  # rotations per second under the window's peak a shot must slow the flywheel
+shot_detector_holdoff: seconds = 0.25  # shortest time between two shots
 
 
 # Odometry
@@ -313,6 +359,17 @@ odometry_std_auto_formula = lambda x: abs(x**2) / 2.5  # noqa
 odometry_std_tele_formula = lambda x: abs(x**1.3) / 1.3  # noqa
 odometry_crash_detection_enabled:bool = False
 odometry_crash_accel_threshold:float = 3.5 #G's
+odometry_fusion_enabled: bool = True
+odometry_fusion_time_window: seconds = 0.02  # frames closer than this are fused together
+odometry_fusion_agreement_threshold: meters = 0.25  # max distance from the cluster anchor to be fused
+odometry_gate_enabled: bool = True  # replaces odometry_distance_deviation_threshold
+odometry_gate_chi2_threshold: float = 9.21  # 99% for 2 degrees of freedom
+odometry_gate_window: int = 50
+odometry_gate_min_samples: int = 10
+odometry_gate_initial_variance: float = 1.0  # m^2
+odometry_gate_process_noise: float = 0.01  # m^2 / s
+odometry_gate_drift: float = 0.05  # m^2 / m
+odometry_record_enabled: bool = False  # write odometry inputs to logs/ for sensors.odometry_replay
 
 
 #object detection
@@ -324,6 +381,22 @@ object_detection_drivetrain_speed_dx = .75
 object_detection_drivetrain_speed_dy = .5
 object_detection_intaking_drivetrain_speed = .3
 
+# note tracker, camera pose is robot relative with wpilib axes (x forward, y left, positive pitch looks down)
+note_tracker_camera_pose = Pose3d(
+    constants.limelight_forward_LL3,
+    -constants.limelight_right_LL3,
+    constants.limelight_height_LL3,
+    Rotation3d(0, 20 * degrees_to_radians, 0),  # TODO: PLACEHOLDER
+)
+note_tracker_max_tracks: int = 8
+note_tracker_association_distance: meters = 0.5
+note_tracker_confirm_hits: int = 3
+note_tracker_expiry: seconds = 1.5
+note_tracker_process_noise: float = 0.05  # m^2 / s
+note_tracker_measurement_std: meters = 0.05
+note_tracker_measurement_std_per_meter: float = 0.1  # std grows with range
+note_tracker_max_range: meters = 5
+
 
 
 
@@ -167,7 +167,7 @@ wrist_gear_ratio: float = 48 * wrist_refrence_frame  # REAL VALUE: 48:1 gear rat
 # Flywheel
 flywheel_mass = 0.85  # kilograms
 flywheel_shaft_mass = .127  # kilograms
-flywheel_radius_outer = 2 * inches_to_meters
+flywheel_radius_outer: meters = 2 * inches_to_meters
 flywheel_shaft_radius = 0.5 * inches_to_meters
 flywheel_gear_ratio = 1 / 1  #REAL VALUE: 1:1 gear ratio
 shooter_height = 21 * inches_to_meters  # REAL VALUE: Meters
@@ -12,7 +12,7 @@ import command
 import config
 import robot_states
 from oi.keymap import Controllers, Keymap
-from robot_systems import Field, Robot, Sensors
+from robot_systems import Field, PowerDistribution, Robot, Sensors
 
 # ADD ROBOT IN TO THE IMPORT FROM ROBOT_SYSTEMS LATER
 from utils import LocalLogger
@@ -135,7 +135,10 @@ class IT:
             ).debounce(1).onTrue(
                 ParallelCommandGroup(
                     InstantCommand(set_idle),
-                    command.SetFlywheelLinearVelocity(Robot.flywheel, config.idle_flywheel)
+                    command.FlywheelPreSpin(
+                        Robot.flywheel, Robot.wrist, Robot.intake, Field.calculations, PowerDistribution.pd
+                    ) if config.prespin_enabled
+                    else command.SetFlywheelLinearVelocity(Robot.flywheel, config.idle_flywheel)
                 )
             )
             
@@ -155,7 +158,9 @@ class IT:
             and Robot.drivetrain.ready_to_shoot
             and Robot.flywheel.ready_to_shoot
             and not Robot.elevator.elevator_moving
-        ).debounce(0.0).onTrue(command.Shoot(Robot.wrist))
+        ).debounce(0.0).onTrue(
+            command.Shoot(Robot.wrist, Sensors.shot_detector if config.shot_detector_enabled else None)
+        )
         # SHOOTER TRIGGERS ----------------
 
 
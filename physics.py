@@ -0,0 +1,86 @@
+"""
+Physics for `robotpy sim`, picked up by pyfrc from the robot directory.
+
+Every mechanism motor runs against a DC motor plant from toolkit.motors.sim, so closed loop commands
+(flywheel spin up, elevator and wrist positions, swerve modules) move like they would on the robot
+instead of reading back zeros.
+"""
+import math
+
+from wpimath.kinematics import ChassisSpeeds
+from wpimath.system.plant import DCMotor
+
+import config
+import constants
+from robot_systems import Robot
+from toolkit.motors.sim import (
+    ArmPlant,
+    ElevatorPlant,
+    FlywheelPlant,
+    SimMotor,
+    SwerveDrivePlant,
+    SwerveSteerPlant,
+)
+
+# Not measured, close enough for the sim
+robot_mass = 60  # kilograms, with bumpers and battery
+elevator_carriage_mass = 6  # kilograms, everything the elevator lifts
+wrist_mass = 3  # kilograms
+wrist_length = 0.3  # meters, pivot to shooter tip
+
+
+def attach_plants():
+    """
+    Attaches a plant to every mechanism motor. Safe to call before the subsystems are initialized.
+    """
+    flywheel_moi = (
+        constants.flywheel_mass / 2 * constants.flywheel_radius_outer ** 2
+        + constants.flywheel_shaft_mass / 2 * constants.flywheel_shaft_radius ** 2
+    )
+    for motor in (Robot.flywheel.motor_1, Robot.flywheel.motor_2):
+        motor.attach_sim(FlywheelPlant(DCMotor.falcon500(1), flywheel_moi, constants.flywheel_gear_ratio))
+
+    Robot.elevator.motor_extend.attach_sim(ElevatorPlant(
+        DCMotor.NEO(2),
+        elevator_carriage_mass,
+        constants.elevator_driver_gear_circumference / (2 * math.pi),
+        constants.elevator_gear_ratio,
+        max_height=constants.elevator_max_length,
+    ))
+
+    Robot.wrist.wrist_motor.attach_sim(ArmPlant(
+        DCMotor.NEO(1),
+        constants.wrist_gear_ratio,
+        wrist_length,
+        wrist_mass,
+        constants.wrist_min_rotation,
+        constants.wrist_max_rotation,
+    ))
+
+    drivetrain = Robot.drivetrain
+    for node in (drivetrain.n_front_left, drivetrain.n_front_right, drivetrain.n_back_left, drivetrain.n_back_right):
+        node.m_move.attach_sim(SwerveDrivePlant(
+            DCMotor.krakenX60(1),
+            constants.drivetrain_wheel_gear_ratio,
+            constants.drivetrain_wheel_diameter / 2,
+            robot_mass / 4,
+        ))
+        node.m_turn.attach_sim(SwerveSteerPlant(DCMotor.NEO(1), constants.drivetrain_turn_gear_ratio))
+
+
+class PhysicsEngine:
+    def __init__(self, physics_controller, robot):
+        self.physics_controller = physics_controller
+        self.robot = robot
+        SimMotor.clear()
+        attach_plants()
+
+    def update_sim(self, now: float, tm_diff: float):
+        SimMotor.update_all(tm_diff)
+
+        drivetrain = Robot.drivetrain
+        if drivetrain.kinematics is None:
+            return
+        speeds: ChassisSpeeds = drivetrain.kinematics.toChassisSpeeds(drivetrain.node_states)
+        self.physics_controller.drive(speeds, tm_diff)
+        drivetrain.gyro._gyro.sim_state.add_yaw(math.degrees(speeds.omega * tm_diff))
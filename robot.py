@@ -42,6 +42,14 @@ class _Robot(wpilib.TimedRobot):
 
         self.scheduler = commands2.CommandScheduler.getInstance()
 
+        # fills green as the flywheel spins up to its target
+        self.spin_up_leds = config.LEDType.KLadder(
+            config.LEDType.KStatic(255, 0, 0),
+            config.LEDType.KStatic(0, 255, 0),
+            lambda: Robot.flywheel.spin_up,
+            5
+        )
+
     def handle(self, func, *args, **kwargs):
         try:
             return func(*args, **kwargs)
@@ -132,8 +140,17 @@ class _Robot(wpilib.TimedRobot):
             Field.calculations.init()
             LEDs.leds.init()
             LEDs.leds.enable()
+            LEDs.leds.start_scheduler()
+            if config.shot_detector_enabled:
+                Sensors.shot_detector.start()
 
         self.handle(init_sensors)
+
+        def robot_pose():
+            pose = Field.odometry.getPose()
+            return [pose.X(), pose.Y(), pose.rotation().radians()]
+
+        utils.SignalLogger.double_array('odometry/pose', robot_pose)
         Field.calculations.tuning = True
 
         self.log.complete("Robot initialized")
@@ -142,10 +159,15 @@ class _Robot(wpilib.TimedRobot):
         # Field.odometry.disable()
 
     def robotPeriodic(self):
-        
+
+        # one note state for everything this loop
+        self.handle(Robot.wrist.update_note_state)
+        self.handle(Robot.intake.update_note_state)
         self.handle(Field.odometry.vision_estimator.set_orientations)
         
-        if Robot.wrist.detect_note_second():
+        if Robot.wrist.detect_note_second() and states.flywheel_state == states.FlywheelState.shooting:
+            config.active_leds = (self.spin_up_leds, 1, 5)
+        elif Robot.wrist.detect_note_second():
             config.active_leds = (config.LEDType.KStatic(255, 0, 0), 1, 5)
         elif Robot.intake.detect_note() or Robot.wrist.detect_note_first():
             config.active_leds = (config.LEDType.KBlink(0, 255, 0), 1, 2)
@@ -155,7 +177,6 @@ class _Robot(wpilib.TimedRobot):
             config.active_leds = (config.LEDType.KStatic(0, 0, 255), 1, 5)
 
         LEDs.leds.set_LED(*config.active_leds)
-        LEDs.leds.cycle()
 
         def get_flywheel_state():
             match states.flywheel_state:
@@ -201,6 +222,12 @@ class _Robot(wpilib.TimedRobot):
 
         self.handle(Field.odometry.update_tables)
 
+        self.handle(Field.note_tracker.update)
+
+        self.handle(Field.note_tracker.update_tables)
+
+        self.handle(utils.SignalLogger.update)
+
         # self.handle(Field.calculations.update)
 
         self.nt.getTable("swerve").putNumberArray(
@@ -21,6 +21,8 @@ class Sensors:
 
     limelight_front = sensors.Limelight(config.LimelightPosition.init_elevator_front)
 
+    shot_detector = sensors.ShotDetector(Robot.flywheel.wait_for_shot_signals)
+
 
 class LEDs:
     leds = sensors.ALeds(config.leds_id, config.leds_size)
@@ -38,4 +40,5 @@ class Field:
         constants.field_length
         )
     calculations = sensors.TrajectoryCalculator(odometry, Robot.elevator, Robot.flywheel)
+    note_tracker = sensors.NoteTracker(Sensors.limelight_intake, odometry)
     POI = utils.POI()
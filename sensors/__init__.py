@@ -4,4 +4,12 @@ from sensors.leds import ALeds
 
 from sensors.limelight import Limelight, LimelightController
 
-from sensors.trajectory_calc import TrajectoryCalculator
\ No newline at end of file
+from sensors.note_tracker import NoteTracker
+
+from sensors.shot_detector import ShotDetector
+
+from sensors.trajectory_calc import TrajectoryCalculator
+
+from sensors.vision_fusion import VisionFusion
+
+from sensors.vision_gating import InnovationGate
\ No newline at end of file
@@ -3,10 +3,14 @@ import time
 import ntcore
 import config
 from toolkit.sensors.odometry import VisionEstimator
+from sensors.vision_fusion import VisionFusion
+from sensors.vision_gating import InnovationGate
+from sensors.odometry_log import OdometryLoop, OdometryRecorder, FLAG_VISION_ON, FLAG_SPEAKER_TAGS, FLAG_SHOOTING, FLAG_RED
 from wpimath.geometry import Pose2d, Pose3d, Rotation2d, Translation2d, Translation3d
 
 from subsystem import Drivetrain
 from units.SI import seconds
+from utils import SignalLogger
 from wpilib import Timer
 
 from wpilib import RobotState, TimedRobot
@@ -87,6 +91,19 @@ class FieldOdometry:
         
         self.vision_poses: list[Pose3d] = []
 
+        self.fusion = VisionFusion(field_width, field_length)
+        self.gate = InnovationGate()
+        self.last_gate_time: seconds | None = None
+
+        self.replay: bool = False
+        self.recorder: OdometryRecorder | None = None
+        self.last_inputs: tuple[seconds, Rotation2d, tuple] | None = None
+        self.last_vision: list | None = None
+        self.vision_entry = None
+
+        if config.odometry_record_enabled:
+            self.start_recording()
+
     def enable(self):
         self.vision_on = True
 
@@ -105,14 +122,68 @@ class FieldOdometry:
     def disable_shooting(self):
         self.shooting = False
 
+    def start_recording(self, path: str | None = None):
+        """
+        Starts writing every input update() consumes to a binary log for offline replay.
+
+        :param path: Log path, defaults to a timestamped file in logs/
+        """
+        if path is None:
+            path = f"logs/odometry_{int(time.time())}.odolog"
+        self.stop_recording()
+        self.recorder = OdometryRecorder(path)
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def get_time(self) -> seconds:
+        return Timer.getFPGATimestamp()
+
     def update(self) -> Pose2d:
         """
         Updates the robot's pose relative to the field. This should be called periodically.
         """
-        
-        
+        if self.recorder is None:
+            return self.update_pose()
+
+        pose_before = self.drivetrain.odometry_estimator.getEstimatedPosition()
+        pose = self.update_pose()
+        self.record_loop(pose_before)
+        return pose
+
+    def record_loop(self, pose_before: Pose2d):
+        timestamp, heading, positions = self.last_inputs
+        pose_after = self.drivetrain.odometry_estimator.getEstimatedPosition()
+        speeds = self.drivetrain.chassis_speeds
+
+        flags = (
+            (FLAG_VISION_ON if self.vision_on else 0)
+            | (FLAG_SPEAKER_TAGS if self.use_speaker_tags else 0)
+            | (FLAG_SHOOTING if self.shooting else 0)
+            | (FLAG_RED if config.active_team == config.Team.RED else 0)
+        )
+
+        self.recorder.record(OdometryLoop(
+            timestamp=timestamp,
+            heading=heading.radians(),
+            heading_rate=self.drivetrain.gyro.get_robot_heading_rate(),
+            accel_x=self.drivetrain.gyro.get_x_accel(),
+            accel_y=self.drivetrain.gyro.get_y_accel(),
+            module_positions=tuple((position.distance, position.angle.radians()) for position in positions),
+            chassis_speeds=(speeds.vx, speeds.vy, speeds.omega),
+            pose_before=(pose_before.X(), pose_before.Y(), pose_before.rotation().radians()),
+            pose_after=(pose_after.X(), pose_after.Y(), pose_after.rotation().radians()),
+            flags=flags,
+            vision=self.last_vision,
+        ))
+
+    def update_pose(self) -> Pose2d:
+        self.last_vision = None
 
         self.update_from_internal()
+        self.predict_gate()
         # self.vision_estimator.set_orientations()
         
         if not self.pose_within_field(self.getPose()):
@@ -125,12 +196,18 @@ class FieldOdometry:
             return self.getPose()
 
         vision_robot_pose_list = self.get_vision_poses()
+        self.last_vision = vision_robot_pose_list
 
         if vision_robot_pose_list is None:
             return self.getPose()
 
         self.vision_poses = []
 
+        if config.odometry_fusion_enabled:
+            self.add_fused_vision_measures(vision_robot_pose_list)
+            self.last_pose = self.getPose()
+            return self.getPose()
+
         for vision_pose in vision_robot_pose_list:
             if vision_pose is None:
                 continue
@@ -140,13 +217,14 @@ class FieldOdometry:
             vision_time: float
             vision_robot_pose: Pose3d
 
-            vision_robot_pose, vision_time, tag_count, distance_to_target, tag_area, tag_id, megatag2 = vision_pose
+            vision_robot_pose, vision_time, tag_count, distance_to_target, tag_area, tag_id, megatag2 = vision_pose[:7]
+            camera = vision_pose[7] if len(vision_pose) > 7 else ""
             
             self.vision_poses += [vision_robot_pose]
             # vision_robot_pose, vision_time = pose_data
             # distance_to_target = target_pose.translation()
 
-            self.add_vision_measure(vision_robot_pose, vision_time, distance_to_target, tag_count, tag_area, tag_id, megatag2)
+            self.add_vision_measure(vision_robot_pose, vision_time, distance_to_target, tag_count, tag_area, tag_id, megatag2, camera)
 
         # self.update_tables()
         
@@ -219,21 +297,30 @@ class FieldOdometry:
 
     def update_from_internal(self):
         
-        self.drivetrain.odometry_estimator.updateWithTime(
-            Timer.getFPGATimestamp(),
-            self.drivetrain.get_heading(),
-            self.drivetrain.node_positions,
-        )
+        self.last_inputs = (self.get_time(), self.drivetrain.get_heading(), self.drivetrain.node_positions)
+
+        self.drivetrain.odometry_estimator.updateWithTime(*self.last_inputs)
 
         # self.drivetrain.odometry.update(
         #     self.drivetrain.get_heading(), self.drivetrain.node_positions
         # )
         
     
-    def add_vision_measure(self, vision_pose: Pose3d, vision_time: float, distance_to_target: float, tag_count: int, tag_area:float, tag_id:float, megatag2:bool=False):
+    def predict_gate(self):
+        """
+        Grows the innovation gate's pose variance by the time and distance driven since the last loop.
+        """
+        now = self.get_time()
+        if self.last_gate_time is not None:
+            speeds = self.drivetrain.chassis_speeds
+            self.gate.predict(now - self.last_gate_time, math.hypot(speeds.vx, speeds.vy))
+        self.last_gate_time = now
+
+    def add_vision_measure(self, vision_pose: Pose3d, vision_time: float, distance_to_target: float, tag_count: int, tag_area:float, tag_id:float, megatag2:bool=False, camera: str = ""):
         if not self.pose_within_field(vision_pose.toPose2d()):
             return
-        distance_deviation = self.getPose().translation().distance(vision_pose.toPose2d().translation())
+        robot_translation = self.getPose().translation()
+        distance_deviation = robot_translation.distance(vision_pose.toPose2d().translation())
         
         
         gyro_rate = abs(self.drivetrain.gyro.get_robot_heading_rate()) / math.radians(720)
@@ -252,7 +339,7 @@ class FieldOdometry:
                 return
             if tag_area < config.odometry_tag_area_threshold:
                 return
-            if distance_deviation > config.odometry_distance_deviation_threshold:
+            if not config.odometry_gate_enabled and distance_deviation > config.odometry_distance_deviation_threshold:
                 return
             # std_dev = 1.4
             # std_dev_omega = abs(math.radians(14))
@@ -283,6 +370,15 @@ class FieldOdometry:
             if using_speaker_tags == False and tag_count < 3:
                 std_dev = 1.5
 
+        if config.odometry_gate_enabled and not self.gate.test(
+            camera,
+            tag_count,
+            vision_pose.X() - robot_translation.X(),
+            vision_pose.Y() - robot_translation.Y(),
+            std_dev
+        ):
+            return
+
         dist_calculations = (std_dev, std_dev, std_dev_omega)
         self.std_dev = dist_calculations
         
@@ -291,9 +387,50 @@ class FieldOdometry:
         self.drivetrain.odometry_estimator.addVisionMeasurement(
             final_pose, vision_time, self.std_dev
         )
+        self.log_vision(final_pose.X(), final_pose.Y(), vision_time)
+
+    def add_fused_vision_measures(self, vision_robot_pose_list: list[tuple[Pose3d, float, float, float, float, float, bool, str]]):
+        """
+        Gates every frame from every camera at once and adds one measurement per fused timestamp cluster.
+        """
+        frames = [vision_pose for vision_pose in vision_robot_pose_list if vision_pose is not None]
+        self.vision_poses = [vision_pose[0] for vision_pose in frames]
+
+        if not frames:
+            return
+
+        robot_translation = self.getPose().translation()
+        measurements = self.fusion.process(
+            frames,
+            robot_translation.X(),
+            robot_translation.Y(),
+            self.use_speaker_tags,
+            self.shooting,
+            self.gate if config.odometry_gate_enabled else None
+        )
+
+        heading = self.drivetrain.get_heading()
+
+        for x, y, vision_time, std_dev in measurements:
+            self.std_dev = std_dev
+            self.drivetrain.odometry_estimator.addVisionMeasurement(
+                Pose2d(x, y, heading), vision_time, self.std_dev
+            )
+            self.log_vision(x, y, vision_time)
+
+    def log_vision(self, x: float, y: float, vision_time: float):
+        """
+        Logs an accepted vision measurement as [x, y, capture time] to 'odometry/vision', so it can be compared
+        against the odometry pose at the time it was captured after the match.
+        """
+        if self.replay or not config.SIGNAL_LOGGING:
+            return
+        if self.vision_entry is None:
+            self.vision_entry = SignalLogger.double_array('odometry/vision')
+        self.vision_entry.append([x, y, vision_time])
 
     def get_vision_poses(self):
-        vision_robot_pose_list: list[tuple[Pose3d, float, float, float, float, float, bool]] | None
+        vision_robot_pose_list: list[tuple[Pose3d, float, float, float, float, float, bool, str]] | None
         try:
             
             vision_robot_pose_list = (
@@ -314,7 +451,7 @@ class FieldOdometry:
         """
         # return self.drivetrain.odometry.getPose()
         est_pose = self.drivetrain.odometry_estimator.getEstimatedPosition()
-        if not self.vision_on or TimedRobot.isSimulation():
+        if not self.vision_on or (TimedRobot.isSimulation() and not self.replay):
             est_pose = self.drivetrain.odometry.getPose()
         else:
             self.drivetrain.odometry.resetPosition(
@@ -374,6 +511,8 @@ class FieldOdometry:
         ])
         
         self.send_vision_poses()
+
+        self.gate.update_tables()
         
         # speeds_field = speeds.fromRobotRelativeSpeeds(speeds, self.drivetrain.get_heading())
         
@@ -1,27 +1,51 @@
-from wpilib import AddressableLED, PowerDistribution, SmartDashboard
+from wpilib import AddressableLED, Color, Color8Bit, Notifier, PowerDistribution, SmartDashboard, Timer
+import numpy as np
 import math, config
+from typing import Callable, Sequence
 
 class ALeds:
+    """
+    Addressable LED strip driver.
+
+    Every pattern is rendered from frames precomputed once into numpy arrays of shape
+    (frames, size, 3) and cached by pattern and length. Each cycle copies the frame for the
+    current tick into a shared output buffer, and the strip is only written when that frame
+    differs from the last one sent. Segment, Progress and Overlay layers (config.LEDType.KLayers)
+    composite several patterns into the same buffer in order.
+
+    Ticks come from elapsed FPGA time (one per config.period), so animations run at the same
+    speed however often cycle is called. start_scheduler runs cycle on a Notifier thread at
+    config.leds_frame_rate; the pattern is handed over as one (type, brightness, speed) tuple
+    so the render thread always sees a consistent state.
+    """
     m_led: AddressableLED
 
     def __init__(self, id: int, size: int):
         self.size = size
         self.id = id
         self.speed = 5
-        self.track_index = 0
-        self.blink_index = 0
+        self.tick = 0
+        self.start_time: float | None = None
+        self.notifier: Notifier | None = None
+        self.state: tuple[dict | None, float, int] = (None, 1, 5)
         self.active_mode = None
         self.last_active_mode = None
         self.last_brightness = None
         self.last_speed = None
         self.brightness = 1
 
+        self.frames: dict[tuple, np.ndarray] = {}
+        self.hue_lut = self._hue_table()
+        self.buffer = np.zeros((size, 3), dtype=np.uint8)
+        self.changed = np.zeros((size, 3), dtype=bool)
+        self.last_frame = np.zeros((size, 3), dtype=np.uint8)
+        self.writes = 0
+
     def init(self):
-        self.m_rainbowFirstPixelHue = 0
         self.m_led = AddressableLED(self.id)
         self.m_led.setLength(self.size)  # 27
-        self.m_ledBuffer = self.m_led.LEDData()
-        self.led_data = [self.m_ledBuffer for i in range(self.size)]
+        self.led_data = [self.m_led.LEDData() for i in range(self.size)]
+        self.last_frame[:] = 0
         self.m_led.setData(self.led_data)
 
         SmartDashboard.putBoolean("LEDs Initialized", True)
@@ -32,11 +56,27 @@ class ALeds:
     def disable(self):
         self.m_led.stop()
 
+    def start_scheduler(self, rate: float = config.leds_frame_rate):
+        """
+        Renders and writes the LEDs at their own rate on a Notifier instead of in robotPeriodic.
+
+        :param rate: Frames per second
+        """
+        if self.notifier is None:
+            self.notifier = Notifier(self.cycle)
+            self.notifier.setName("LEDs")
+        self.notifier.startPeriodic(1 / rate)
+
+    def stop_scheduler(self):
+        if self.notifier is not None:
+            self.notifier.stop()
+
     def set_brightness(self, brightness: float):
         self.brightness = brightness
+        self.state = (self.active_mode, self.brightness, self.speed)
 
     def get_led_data(self):
-        return [self.m_led.LEDData() for i in range(self.size)].copy()
+        return [self.m_led.LEDData() for i in range(self.size)]
 
     def get_current_cycle(self):
         return self.led_data
@@ -59,134 +99,230 @@ class ALeds:
         self.last_brightness = self.brightness
 
     def set_LED(self, type, brightness: float = 1.0, speed: int = 5):
+        if type == self.active_mode and brightness == self.brightness and speed == self.speed:
+            return
         self.store_current()
         self.active_mode = type
         self.speed = speed
         self.brightness = brightness
+        self.state = (type, brightness, speed)
 
     def set_last_current(self):
         self.active_mode = self.last_active_mode
         self.speed = self.last_speed
         self.brightness = self.last_brightness
+        self.state = (self.active_mode, self.brightness, self.speed)
+
+    @staticmethod
+    def _hue_table() -> np.ndarray:
+        """
+        RGB for every hue at full saturation and half value, as used by the rainbow.
+        """
+        table = np.zeros((180, 3), dtype=np.uint8)
+        for hue in range(180):
+            color = Color8Bit(Color.fromHSV(hue, 255, 128))
+            table[hue] = (color.red, color.green, color.blue)
+        return table
+
+    def _frames(self, key: tuple, render) -> np.ndarray:
+        if key not in self.frames:
+            self.frames[key] = render()
+        return self.frames[key]
+
+    def match(self, type: config.LEDType, speed: int | None = None) -> np.ndarray:
+        """
+        Renders the frame for the current tick into the output buffer.
+
+        :param type: Pattern from config.LEDType
+        :param speed: Speed to run the pattern at, defaults to the active speed
+        :return: (size, 3) uint8 RGB array, reused every call
+        """
+        self.render(type, self.state[2] if speed is None else speed, self.buffer)
+        return self.buffer
+
+    def render(self, type: config.LEDType, speed: int, out: np.ndarray):
+        """
+        Renders a pattern sized to out directly into it.
+
+        :param type: Pattern from config.LEDType
+        :param speed: Speed to run the pattern at
+        :param out: (n, 3) uint8 view of the output buffer to fill
+        """
+        size = len(out)
+        if size == 0:
+            return
 
-    def match(self, type: config.LEDType):
-        res = self.get_led_data()
         match type['type']:
             case 1:
                 color = type['color']
-                res = self._setStatic(color['r'], color['g'], color['b'])
+                frames = self._setStatic(color['r'], color['g'], color['b'], size)
             case 2:
-                res = self._setRainbow()
+                frames = self._setRainbow(speed, size)
             case 3:
                 color = type['color']
-                res = self._setTrack(color['r1'], color['g1'], color['b1'], color['r2'], color['g2'], color['b2'])
+                frames = self._setTrack(color['r1'], color['g1'], color['b1'], color['r2'], color['g2'], color['b2'], size)
             case 4:
                 color = type['color']
-                res = self._setBlink(color['r'], color['g'], color['b'])
+                frames = self._setBlink(color['r'], color['g'], color['b'], speed, size)
             case 5:
-                percent = type['percent']
-                res = self._setLadder(type['typeA'], type['typeB'], percent, type['speed'])
+                self._setLadder(type['typeA'], type['typeB'], type['percent'], type['speed'], speed, out)
+                return
+            case 6:
+                for layer in type['layers']:
+                    layer.render(self, speed, out)
+                return
             case _:
-                res = self._setRainbow()
-
-        return res
-
-    def cycle(self):
-        self.m_led.setData(self.match(self.active_mode))
-
-    def _setStatic(self, red: int, green: int, blue: int):
-
-        static = self.get_led_data()
-
-        for i in range(self.size):
-            static[i].setRGB(red, green, blue)
-
-        return static
-
-    def _setRainbow(self):
-        rainbow = self.get_led_data()
-        for i in range(self.size):
-            # Calculate the hue - hue is easier for rainbows because the color
-            # shape is a circle so only one value needs to precess
-            hue = math.floor((self.m_rainbowFirstPixelHue + (i * 180 / self.size)) % 180)
-            # Set the value
-            rainbow[i].setHSV(hue, 255, 128)
-
-        # Increase by to make the rainbow "move"
-        self.m_rainbowFirstPixelHue += self.speed
-
-        # Check bounds
-        self.m_rainbowFirstPixelHue %= 180
+                frames = self._setRainbow(speed, size)
 
-        return rainbow
+        np.copyto(out, frames[self.tick % len(frames)])
 
-    def _setTrack(self, r1, g1, b1, r2, g2, b2):
-        track = self.get_led_data()
-        for i in range(self.size):
-            track[i].setRGB(r1, g1, b1)
+    def get_tick(self) -> int:
+        now = Timer.getFPGATimestamp()
+        if self.start_time is None:
+            self.start_time = now
+        # small offset so a tick boundary landed on exactly isn't lost to float error
+        return int((now - self.start_time) / config.period + 1e-6)
 
-        for i in range(self.track_index, self.size, 4):
-            track[i].setRGB(r2, g2, b2)
-
-        self.track_index += 1
+    def cycle(self):
+        mode, _, speed = self.state
+        if mode is None:
+            return
+        self.tick = self.get_tick()
+        frame = self.match(mode, speed)
 
-        if self.track_index > self.size:
-            self.track_index = 0
+        np.not_equal(frame, self.last_frame, out=self.changed)
+        changed = np.flatnonzero(self.changed.any(axis=1))
+        if changed.size == 0:
+            return
 
-        return track
+        for i in changed:
+            self.led_data[i].setRGB(int(frame[i, 0]), int(frame[i, 1]), int(frame[i, 2]))
+        np.copyto(self.last_frame, frame)
 
-    def _setBlink(self, r, g, b):
-        blink = self.get_led_data()
-        if self.blink_index / (2 * self.speed) <= .5:
-            for i in range(self.size):
-                blink[i].setRGB(r, g, b)
+        self.m_led.setData(self.led_data)
+        self.writes += 1
+
+    def _setStatic(self, red: int, green: int, blue: int, size: int):
+        def render():
+            return np.tile(np.array([red, green, blue], dtype=np.uint8), (1, size, 1))
+
+        return self._frames((1, red, green, blue, size), render)
+
+    def _setRainbow(self, speed: int, size: int):
+        def render():
+            # the first pixel's hue moves by speed every frame and wraps at 180
+            count = 180 // math.gcd(speed, 180)
+            first_pixel = (np.arange(count) * speed) % 180
+            hues = np.floor((first_pixel[:, None] + np.arange(size)[None, :] * 180 / size) % 180)
+            return self.hue_lut[hues.astype(int)]
+
+        return self._frames((2, speed, size), render)
+
+    def _setTrack(self, r1, g1, b1, r2, g2, b2, size: int):
+        def render():
+            # every 4th pixel from the track index on is lit, the index runs 0 to size
+            frames = np.tile(np.array([r1, g1, b1], dtype=np.uint8), (size + 1, size, 1))
+            for index in range(size + 1):
+                frames[index, index::4] = (r2, g2, b2)
+            return frames
+
+        return self._frames((3, r1, g1, b1, r2, g2, b2, size), render)
+
+    def _setBlink(self, r, g, b, speed: int, size: int):
+        def render():
+            count = 2 * speed + 1
+            on = np.arange(count) / (2 * speed) <= .5
+            frames = np.zeros((count, size, 3), dtype=np.uint8)
+            frames[on] = (r, g, b)
+            return frames
+
+        return self._frames((4, r, g, b, speed, size), render)
+
+    def _setLadder(
+            self,
+            typeA: config.LEDType,
+            typeB: config.LEDType,
+            percent: float | Callable[[], float],
+            speed: int,
+            speed_a: int,
+            out: np.ndarray,
+            reverse: bool = False,
+    ):
+        """
+        Fills the first percent of out with typeB at speed and the rest with typeA at speed_a.
+        """
+        if callable(percent):
+            percent = percent()
+        percent = min(max(percent, 0), 1)
+
+        filled = math.floor(len(out) * percent)
+        split = len(out) - filled if reverse else filled
+
+        if reverse:
+            self.render(typeA, speed_a, out[:split])
+            self.render(typeB, speed, out[split:])
         else:
-            for i in range(self.size):
-                blink[i].setRGB(0, 0, 0)
-
-        self.blink_index += 1
-        if self.blink_index > 2 * self.speed:
-            self.blink_index = 0
+            self.render(typeB, speed, out[:split])
+            self.render(typeA, speed_a, out[split:])
 
-        return blink
 
-    def _setLadder(self, typeA: config.LEDType, typeB: config.LEDType, percent: float, speed: int):
-
-        if percent < 0:
-            percent = 0
-        elif percent > 1:
-            percent = 1
-
-        save = self.speed
+class Segment:
+    """
+    Shows a pattern on the pixels from start up to end.
+    """
 
+    def __init__(self, pattern: config.LEDType, start: int = 0, end: int | None = None, speed: int | None = None):
+        self.pattern = pattern
+        self.start = start
+        self.end = end
         self.speed = speed
 
-        b_led = self.match(typeB).copy()
+    def render(self, leds: ALeds, speed: int, out: np.ndarray):
+        leds.render(self.pattern, speed if self.speed is None else self.speed, out[self.start:self.end])
 
-        b = []
 
-        for i, led_b in enumerate(b_led):
-            if i < math.floor(self.size * percent):
-                b.append(led_b)
+class Progress:
+    """
+    Progress bar, fill covers the first percent of the pixels and background the rest.
 
-        self.speed = save
+    percent can be a number or a function returning one, e.g. flywheel spin-up or elevator height,
+    and is clamped to 0-1. The function is called from the LED render thread, so it should only
+    read values the main loop has already stored.
+    """
 
-        a_led: list = self.match(typeA).copy()
+    def __init__(
+            self,
+            background: config.LEDType,
+            fill: config.LEDType,
+            percent: float | Callable[[], float],
+            speed: int | None = None,
+            reverse: bool = False,
+    ):
+        self.background = background
+        self.fill = fill
+        self.percent = percent
+        self.speed = speed
+        self.reverse = reverse
 
-        a: list = []
+    def render(self, leds: ALeds, speed: int, out: np.ndarray):
+        fill_speed = speed if self.speed is None else self.speed
+        leds._setLadder(self.background, self.fill, self.percent, fill_speed, speed, out, self.reverse)
 
-        for i, led_a in enumerate(a_led):
-            if i < self.size - math.floor(self.size * percent):
-                a.append(led_a)
 
-        res = b + a
+class Overlay:
+    """
+    Draws a pattern over whatever is under it, only on the pixels where mask is set.
+    """
 
-        if len(res) > self.size:
-            del res[self.size:]
-        else:
-            return res.copy()
+    def __init__(self, pattern: config.LEDType, mask: Sequence[bool] | np.ndarray, speed: int | None = None):
+        self.pattern = pattern
+        self.mask = np.asarray(mask, dtype=bool)[:, None]
+        self.speed = speed
+        self.scratch = np.zeros((len(self.mask), 3), dtype=np.uint8)
 
-        return self.led_data
+    def render(self, leds: ALeds, speed: int, out: np.ndarray):
+        leds.render(self.pattern, speed if self.speed is None else self.speed, self.scratch)
+        np.copyto(out, self.scratch, where=self.mask)
 
 
 class SLEDS:
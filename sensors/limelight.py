@@ -272,12 +272,6 @@ class Limelight:
         '''
         array = [yaw, yaw_rate, pitch, pitch_rate, roll, roll_rate]
         
-        # self.table.putNumberArray("robot_orientation_set", array)
-        
-        latency = self.table.getEntry('tl').getDouble(0) + self.table.getEntry('cl').getDouble(0)
-        
-        l_t = ntcore._now() + int((latency / 1000))
-        
         self.table.getEntry('robot_orientation_set').setDoubleArray(array)
 
     def target_exists(self, force_update: bool = False):
@@ -340,7 +334,7 @@ class Limelight:
         :param round_to: The number of decimal places to round the botpose to. Defaults to 4.
         :param force_update: If True, the limelight variables be updated before getting the botpose. Defaults to False.
 
-        :return list: [x, y, z, pitch, yaw, roll] if a target exists
+        :return tuple: (pose, timestamp, tag_count, ave_tag_dist, tag_area, tag_id, megatag2, name) if a target exists
 
         :return None: if no targets exists
         :return False: if the pipeline is not set to feducial
@@ -376,7 +370,7 @@ class Limelight:
         ave_tag_dist:float = botpose[9]
         tag_area:float = botpose[10]
         tag_id:float = self.get_target_id()
-        return pose, timestamp, tag_count, ave_tag_dist, tag_area, tag_id, megatag2
+        return pose, timestamp, tag_count, ave_tag_dist, tag_area, tag_id, megatag2, self.name
         
     def get_target_pose(self):
         
@@ -404,40 +398,40 @@ class LimelightController(VisionEstimator):
         self.limelights: list[Limelight] = limelight_list
         self.gyro = gyro
         self.mega_tag2 = mega_tag2
+        self.nt = ntcore.NetworkTableInstance.getDefault()
+        self.heading_rate: float = 0
         
     def set_orientations(self):
+        '''
+        Samples the gyro once and sends the orientation to every limelight for Megatag2.
+        Call once per loop, before the odometry update.
+        '''
+        heading, self.heading_rate = self.gyro.refresh_heading()
+
+        if not self.mega_tag2:
+            return
+
+        yaw = math.degrees(heading)
+        if config.active_team == config.Team.RED:
+            yaw -= 180
+
+        gyro_data = [yaw, math.degrees(self.heading_rate), 0, 0, 0, 0]
+
         for limelight in self.limelights:
-            if self.mega_tag2:
-                                
-                def convert(radians):
-                    
-                    degrees = math.degrees(radians)
-                
-                    if config.active_team == config.Team.RED:
-                        degrees -= 180
-                        
-                    return degrees
-                
-                gyro_data = [
-                    convert(self.gyro.get_robot_heading()),
-                    # fin_rotation,
-                    math.degrees(self.gyro.get_robot_heading_rate()),
-                    0,0,0,0
-                ]
-                
-                limelight.set_robot_orientation(*gyro_data)   
-
-    def get_estimated_robot_pose(self) -> list[tuple[Pose3d, float, float, float, float]] | None:
+            limelight.set_robot_orientation(*gyro_data)
+
+        # send now instead of waiting for the periodic NT update
+        self.nt.flush()
+
+    def get_estimated_robot_pose(self) -> list[tuple[Pose3d, float, float, float, float, float, bool, str]] | None:
         poses = []
         use_megatag_2:bool = False
-        self.set_orientations()
-        for limelight in self.limelights:
-            if self.mega_tag2:
-                
-                if abs(math.degrees(self.gyro.get_robot_heading_rate())) < config.odometry_megatag2_max_angular_velocity:
-                    use_megatag_2 = True
-
+        if self.mega_tag2:
+            # heading rate sampled by set_orientations this loop
+            if abs(math.degrees(self.heading_rate)) < config.odometry_megatag2_max_angular_velocity:
+                use_megatag_2 = True
 
+        for limelight in self.limelights:
             if (
                 limelight.april_tag_exists()
                 and limelight.get_pipeline_mode() == config.LimelightPipeline.feducial
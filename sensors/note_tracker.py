@@ -0,0 +1,161 @@
+import math
+
+import ntcore
+import numpy as np
+from wpilib import Timer
+from wpimath.geometry import Pose2d, Pose3d, Translation2d
+
+import config
+from sensors.limelight import Limelight
+from units.SI import degrees, meters, seconds
+
+
+class NoteTracker:
+    """
+    Tracks notes on the field from intake limelight detections.
+
+    Each detection is projected onto the floor using the camera pose and the robot pose,
+    then associated with the closest existing track. Every track is a constant-position
+    Kalman filter with an isotropic variance, stored in fixed-size arrays.
+    """
+
+    def __init__(self, limelight: Limelight, odometry, camera_pose: Pose3d = config.note_tracker_camera_pose):
+        """
+        :param limelight: Limelight running the note detection pipeline
+        :param odometry: FieldOdometry providing the robot pose
+        :param camera_pose: Pose of the camera relative to the robot, x forward, y left, positive pitch looks down
+        """
+        self.limelight = limelight
+        self.odometry = odometry
+        self.table = ntcore.NetworkTableInstance.getDefault().getTable("Notes")
+
+        self.camera_position = np.array([camera_pose.X(), camera_pose.Y(), camera_pose.Z()])
+        pitch = camera_pose.rotation().Y()
+        yaw = camera_pose.rotation().Z()
+        self.camera_rotation = np.array([
+            [math.cos(yaw), -math.sin(yaw), 0],
+            [math.sin(yaw), math.cos(yaw), 0],
+            [0, 0, 1],
+        ]) @ np.array([
+            [math.cos(pitch), 0, math.sin(pitch)],
+            [0, 1, 0],
+            [-math.sin(pitch), 0, math.cos(pitch)],
+        ])
+
+        size = config.note_tracker_max_tracks
+        self.x = np.zeros(size)
+        self.y = np.zeros(size)
+        self.variance = np.zeros(size)
+        self.hits = np.zeros(size, dtype=int)
+        self.last_seen = np.zeros(size)
+        self.active = np.zeros(size, dtype=bool)
+
+        self.last_time: seconds | None = None
+        self.nearest: Translation2d | None = None
+
+    def project(self, tx: degrees, ty: degrees) -> tuple[meters, meters] | None:
+        """
+        Projects a detection onto the floor in robot coordinates.
+
+        :param tx: Horizontal angle to the target, positive right
+        :param ty: Vertical angle to the target, positive up
+        :return: (x, y) relative to the robot, or None if the ray doesn't hit the floor in range
+        """
+        ray = self.camera_rotation @ np.array([1, -math.tan(math.radians(tx)), math.tan(math.radians(ty))])
+        if ray[2] >= 0:
+            return None
+
+        scale = -self.camera_position[2] / ray[2]
+        x, y = self.camera_position[:2] + scale * ray[:2]
+
+        if math.hypot(x, y) > config.note_tracker_max_range:
+            return None
+        return x, y
+
+    def to_field(self, robot_pose: Pose2d, x: meters, y: meters) -> tuple[meters, meters]:
+        heading = robot_pose.rotation().radians()
+        cos, sin = math.cos(heading), math.sin(heading)
+        return robot_pose.X() + x * cos - y * sin, robot_pose.Y() + x * sin + y * cos
+
+    def predict(self, now: seconds):
+        if self.last_time is not None:
+            self.variance[self.active] += config.note_tracker_process_noise * (now - self.last_time)
+        self.last_time = now
+
+        self.active &= now - self.last_seen <= config.note_tracker_expiry
+
+    def add_detection(self, now: seconds, x: meters, y: meters, std_dev: meters):
+        """
+        Associates a field relative detection with the closest track, or starts a new one.
+        """
+        measurement_variance = std_dev ** 2
+
+        distance = np.where(self.active, np.hypot(self.x - x, self.y - y), np.inf)
+        i = int(np.argmin(distance))
+
+        if distance[i] <= config.note_tracker_association_distance:
+            gain = self.variance[i] / (self.variance[i] + measurement_variance)
+            self.x[i] += gain * (x - self.x[i])
+            self.y[i] += gain * (y - self.y[i])
+            self.variance[i] *= 1 - gain
+            self.hits[i] += 1
+        else:
+            # reuse a free slot, otherwise drop the track that has gone unseen the longest
+            free = np.flatnonzero(~self.active)
+            i = int(free[0]) if free.size else int(np.argmin(self.last_seen))
+            self.x[i] = x
+            self.y[i] = y
+            self.variance[i] = measurement_variance
+            self.hits[i] = 1
+            self.active[i] = True
+
+        self.last_seen[i] = now
+
+    def update(self):
+        """
+        Updates the tracks from the latest limelight values. Call once a loop after the odometry update.
+        """
+        now = Timer.getFPGATimestamp()
+        robot_pose = self.odometry.getPose()
+
+        self.predict(now)
+
+        if self.limelight.tv >= 1:
+            detection = self.project(self.limelight.tx, self.limelight.ty)
+            if detection is not None:
+                std_dev = (
+                    config.note_tracker_measurement_std
+                    + config.note_tracker_measurement_std_per_meter * math.hypot(*detection)
+                )
+                self.add_detection(now, *self.to_field(robot_pose, *detection), std_dev)
+
+        self.update_nearest(robot_pose)
+
+    def confirmed(self) -> np.ndarray:
+        return self.active & (self.hits >= config.note_tracker_confirm_hits)
+
+    def update_nearest(self, robot_pose: Pose2d):
+        confirmed = self.confirmed()
+        if not confirmed.any():
+            self.nearest = None
+            return
+
+        distance = np.where(confirmed, np.hypot(self.x - robot_pose.X(), self.y - robot_pose.Y()), np.inf)
+        i = int(np.argmin(distance))
+        self.nearest = Translation2d(self.x[i], self.y[i])
+
+    def nearest_note(self) -> Translation2d | None:
+        """
+        :return: Field position of the closest confirmed note as of the last update, or None
+        """
+        return self.nearest
+
+    def get_notes(self) -> list[Translation2d]:
+        return [Translation2d(self.x[i], self.y[i]) for i in np.flatnonzero(self.confirmed())]
+
+    def update_tables(self):
+        confirmed = np.flatnonzero(self.confirmed())
+        self.table.putNumberArray("Tracked Notes", [
+            value for i in confirmed for value in (self.x[i], self.y[i], 0)
+        ])
+        self.table.putNumber("Track Count", int(self.active.sum()))
@@ -0,0 +1,173 @@
+import struct
+from dataclasses import dataclass, field
+from typing import BinaryIO, Iterator
+
+from wpimath.geometry import Pose3d, Rotation3d, Translation3d
+
+MAGIC = b"ODOLOG"
+VERSION = 1
+
+CAMERA = b"C"
+LOOP = b"L"
+
+# camera id, name length
+CAMERA_STRUCT = struct.Struct("<BB")
+
+# timestamp, heading, heading rate, accel x, accel y,
+# 4 x (module distance, module angle), vx, vy, omega,
+# pose before (x, y, theta), pose after (x, y, theta), flags, vision frame count
+LOOP_STRUCT = struct.Struct("<5d8d3d3d3dBB")
+
+# x, y, z, roll, pitch, yaw, timestamp, tag count, distance to target, tag area, tag id, megatag2, camera id
+FRAME_STRUCT = struct.Struct("<6d5d?B")
+
+FLAG_VISION_ON = 1
+FLAG_SPEAKER_TAGS = 2
+FLAG_SHOOTING = 4
+FLAG_RED = 8
+FLAG_VISION_NONE = 16  # the estimator returned None instead of a list
+
+
+@dataclass
+class OdometryLoop:
+    """
+    Every input one call of FieldOdometry.update consumed, plus the pose before and after it.
+    """
+    timestamp: float
+    heading: float
+    heading_rate: float
+    accel_x: float
+    accel_y: float
+    module_positions: tuple[tuple[float, float], ...]
+    chassis_speeds: tuple[float, float, float]
+    pose_before: tuple[float, float, float]
+    pose_after: tuple[float, float, float]
+    flags: int
+    vision: list[tuple[Pose3d, float, float, float, float, float, bool, str]] | None = field(default_factory=list)
+
+
+class OdometryRecorder:
+    """
+    Writes odometry inputs to a compact binary log that can be replayed offline.
+    """
+
+    def __init__(self, path: str, flush_every: int = 50):
+        self.file: BinaryIO = open(path, "wb")
+        self.file.write(MAGIC + struct.pack("<H", VERSION))
+        self.cameras: dict[str, int] = {}
+        self.flush_every = flush_every
+        self.count = 0
+
+    def camera_id(self, name: str) -> int:
+        if name not in self.cameras:
+            encoded = name.encode()
+            self.cameras[name] = len(self.cameras)
+            self.file.write(CAMERA + CAMERA_STRUCT.pack(self.cameras[name], len(encoded)) + encoded)
+        return self.cameras[name]
+
+    def record(self, loop: OdometryLoop):
+        frames = [frame for frame in loop.vision if frame is not None] if loop.vision is not None else []
+
+        flags = loop.flags | (FLAG_VISION_NONE if loop.vision is None else 0)
+        # register any new cameras before the loop record that references them
+        camera_ids = [self.camera_id(frame[7] if len(frame) > 7 else "") for frame in frames]
+
+        self.file.write(LOOP + LOOP_STRUCT.pack(
+            loop.timestamp,
+            loop.heading,
+            loop.heading_rate,
+            loop.accel_x,
+            loop.accel_y,
+            *(value for module in loop.module_positions for value in module),
+            *loop.chassis_speeds,
+            *loop.pose_before,
+            *loop.pose_after,
+            flags,
+            len(frames),
+        ))
+
+        for frame, camera_id in zip(frames, camera_ids):
+            pose: Pose3d = frame[0]
+            rotation = pose.rotation()
+            self.file.write(FRAME_STRUCT.pack(
+                pose.X(), pose.Y(), pose.Z(),
+                rotation.X(), rotation.Y(), rotation.Z(),
+                *frame[1:6],
+                bool(frame[6]),
+                camera_id,
+            ))
+
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def read_odometry_log(path: str) -> Iterator[OdometryLoop]:
+    """
+    Reads back a log written by OdometryRecorder.
+
+    :param path: Path to the log
+    :return: The recorded loops in order
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not an odometry log")
+    version, = struct.unpack_from("<H", data, len(MAGIC))
+    if version != VERSION:
+        raise ValueError(f"Unsupported odometry log version {version}")
+
+    offset = len(MAGIC) + 2
+    cameras: dict[int, str] = {}
+
+    while offset < len(data):
+        kind = data[offset:offset + 1]
+        offset += 1
+
+        if kind == CAMERA:
+            camera_id, length = CAMERA_STRUCT.unpack_from(data, offset)
+            offset += CAMERA_STRUCT.size
+            cameras[camera_id] = data[offset:offset + length].decode()
+            offset += length
+
+        elif kind == LOOP:
+            if offset + LOOP_STRUCT.size > len(data):
+                return  # truncated by power loss
+            values = LOOP_STRUCT.unpack_from(data, offset)
+            offset += LOOP_STRUCT.size
+
+            flags, frame_count = values[22], values[23]
+
+            if offset + FRAME_STRUCT.size * frame_count > len(data):
+                return
+            frames = []
+            for _ in range(frame_count):
+                x, y, z, roll, pitch, yaw, *rest, megatag2, camera_id = FRAME_STRUCT.unpack_from(data, offset)
+                offset += FRAME_STRUCT.size
+                frames.append((
+                    Pose3d(Translation3d(x, y, z), Rotation3d(roll, pitch, yaw)),
+                    *rest,
+                    megatag2,
+                    cameras[camera_id],
+                ))
+
+            yield OdometryLoop(
+                timestamp=values[0],
+                heading=values[1],
+                heading_rate=values[2],
+                accel_x=values[3],
+                accel_y=values[4],
+                module_positions=tuple((values[5 + 2 * i], values[6 + 2 * i]) for i in range(4)),
+                chassis_speeds=values[13:16],
+                pose_before=values[16:19],
+                pose_after=values[19:22],
+                flags=flags & ~FLAG_VISION_NONE,
+                vision=None if flags & FLAG_VISION_NONE else frames,
+            )
+
+        else:
+            raise ValueError(f"Corrupt odometry log at byte {offset - 1}")
@@ -0,0 +1,261 @@
+"""
+Replays odometry logs written by OdometryRecorder through FieldOdometry offline.
+
+Usage:
+    python -m sensors.odometry_replay logs/odometry_1718000000.odolog
+    python -m sensors.odometry_replay logs/odometry_1718000000.odolog --sweep sweep.json --workers 4
+
+The sweep file maps a parameter set name to config overrides, e.g.
+    {"tight gate": {"odometry_gate_chi2_threshold": 5.99}, "no fusion": {"odometry_fusion_enabled": false}}
+Overrides are applied to config in each worker process, so values must be plain JSON values.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+from wpimath.geometry import Pose2d, Rotation2d, Translation2d
+from wpimath.kinematics import ChassisSpeeds, SwerveDrive4Kinematics, SwerveDrive4Odometry, SwerveModulePosition
+from wpimath.estimator import SwerveDrive4PoseEstimator
+
+import config
+import constants
+from sensors.field_odometry import FieldOdometry
+from sensors.odometry_log import (
+    OdometryLoop, read_odometry_log, FLAG_VISION_ON, FLAG_SPEAKER_TAGS, FLAG_SHOOTING, FLAG_RED
+)
+
+
+class ReplayGyro:
+    """
+    Stands in for the drivetrain gyro, returning the recorded values.
+    """
+
+    def __init__(self):
+        self.heading: float = 0
+        self.heading_rate: float = 0
+        self.accel_x: float = 0
+        self.accel_y: float = 0
+
+    def get_robot_heading(self):
+        return self.heading
+
+    def get_robot_heading_rate(self):
+        return self.heading_rate
+
+    def get_x_accel(self):
+        return self.accel_x
+
+    def get_y_accel(self):
+        return self.accel_y
+
+
+class ReplayDrivetrain:
+    """
+    Stands in for the drivetrain, with the same estimator setup as SwerveDrivetrain.init
+    but fed from recorded loops instead of hardware.
+    """
+
+    def __init__(self, track_width: float = constants.track_width):
+        self.gyro = ReplayGyro()
+        self.heading = Rotation2d(0)
+        self.node_positions = tuple(SwerveModulePosition(0, Rotation2d(0)) for _ in range(4))
+        self.chassis_speeds = ChassisSpeeds(0, 0, 0)
+
+        self.kinematics = SwerveDrive4Kinematics(
+            Translation2d(.5 * track_width, .5 * track_width),
+            Translation2d(.5 * track_width, -.5 * track_width),
+            Translation2d(-.5 * track_width, .5 * track_width),
+            Translation2d(-.5 * track_width, -.5 * track_width)
+        )
+        self.odometry = SwerveDrive4Odometry(self.kinematics, self.heading, self.node_positions)
+        self.odometry_estimator = SwerveDrive4PoseEstimator(self.kinematics, self.heading, self.node_positions, Pose2d())
+
+    def load(self, loop: OdometryLoop):
+        self.gyro.heading = loop.heading
+        self.gyro.heading_rate = loop.heading_rate
+        self.gyro.accel_x = loop.accel_x
+        self.gyro.accel_y = loop.accel_y
+        self.heading = Rotation2d(loop.heading)
+        self.node_positions = tuple(
+            SwerveModulePosition(distance, Rotation2d(angle)) for distance, angle in loop.module_positions
+        )
+        self.chassis_speeds = ChassisSpeeds(*loop.chassis_speeds)
+        # the real drivetrain updates its plain odometry as it drives
+        self.odometry.update(self.heading, self.node_positions)
+
+    def get_heading(self) -> Rotation2d:
+        return self.heading
+
+    def reset_odometry(self, pose: Pose2d):
+        self.odometry.resetPosition(self.heading, self.node_positions, pose)
+        self.odometry_estimator.resetPosition(self.heading, self.node_positions, pose)
+
+
+class ReplayFieldOdometry(FieldOdometry):
+    """
+    FieldOdometry that takes its time and vision frames from a recorded loop.
+    """
+
+    def __init__(self, drivetrain: ReplayDrivetrain, field_width: float, field_length: float):
+        super().__init__(drivetrain, None, field_width, field_length)
+        self.replay = True
+        self.loop: OdometryLoop | None = None
+
+    def load(self, loop: OdometryLoop):
+        self.loop = loop
+        self.vision_on = bool(loop.flags & FLAG_VISION_ON)
+        self.use_speaker_tags = bool(loop.flags & FLAG_SPEAKER_TAGS)
+        self.shooting = bool(loop.flags & FLAG_SHOOTING)
+        config.active_team = config.Team.RED if loop.flags & FLAG_RED else config.Team.BLUE
+
+    def get_time(self):
+        return self.loop.timestamp
+
+    def get_vision_poses(self):
+        return self.loop.vision
+
+
+@dataclass
+class ReplayResult:
+    name: str
+    timestamps: np.ndarray
+    poses: np.ndarray  # (n, 3) x, y, theta after each loop
+    recorded: np.ndarray  # (n, 3) the pose the robot estimated live
+
+
+def replay(path: str, overrides: dict | None = None, name: str = "recorded config") -> ReplayResult:
+    """
+    Runs a recorded log back through FieldOdometry.
+
+    :param path: Odometry log path
+    :param overrides: config attributes to change before replaying
+    :param name: Name of the parameter set for the report
+    """
+    overrides = {**(overrides or {}), "odometry_record_enabled": False}
+    for key in overrides:
+        if not hasattr(config, key):
+            raise AttributeError(f"config has no attribute {key}")
+
+    original = {key: getattr(config, key) for key in [*overrides, "active_team"]}
+    try:
+        for key, value in overrides.items():
+            setattr(config, key, value)
+        return _replay(path, name)
+    finally:
+        for key, value in original.items():
+            setattr(config, key, value)
+
+
+def _replay(path: str, name: str) -> ReplayResult:
+    drivetrain = ReplayDrivetrain()
+    odometry = ReplayFieldOdometry(drivetrain, constants.field_width, constants.field_length)
+
+    timestamps, poses, recorded = [], [], []
+    last_pose_after = None
+
+    for loop in read_odometry_log(path):
+        drivetrain.load(loop)
+        odometry.load(loop)
+
+        # the estimator only moves between loops if something reset it, e.g. the auto start pose
+        if last_pose_after is None or not np.allclose(loop.pose_before, last_pose_after, atol=1e-9):
+            drivetrain.reset_odometry(Pose2d(loop.pose_before[0], loop.pose_before[1], loop.pose_before[2]))
+        last_pose_after = loop.pose_after
+
+        odometry.update()
+
+        pose = drivetrain.odometry_estimator.getEstimatedPosition()
+        timestamps.append(loop.timestamp)
+        poses.append((pose.X(), pose.Y(), pose.rotation().radians()))
+        recorded.append(loop.pose_after)
+
+    return ReplayResult(
+        name,
+        np.array(timestamps),
+        np.array(poses).reshape(-1, 3),
+        np.array(recorded).reshape(-1, 3),
+    )
+
+
+def _replay_set(args: tuple[str, str, dict]) -> ReplayResult:
+    path, name, overrides = args
+    return replay(path, overrides, name)
+
+
+def sweep(path: str, parameter_sets: dict[str, dict], workers: int | None = None) -> list[ReplayResult]:
+    """
+    Replays the same log with several parameter sets in parallel.
+    Each set runs in a fresh process so config overrides don't leak between them.
+
+    :param path: Odometry log path
+    :param parameter_sets: Parameter set name to config overrides
+    :param workers: Number of processes, defaults to the CPU count
+    """
+    jobs = [(path, name, overrides) for name, overrides in parameter_sets.items()]
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(_replay_set, jobs))
+
+
+def translation_error(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.hypot(a[:, 0] - b[:, 0], a[:, 1] - b[:, 1])
+
+
+def heading_error(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.abs(np.arctan2(np.sin(a[:, 2] - b[:, 2]), np.cos(a[:, 2] - b[:, 2])))
+
+
+def report(results: list[ReplayResult]) -> str:
+    """
+    Compares each replayed trajectory to the live estimate and to the first parameter set.
+    """
+    if not results:
+        return "No parameter sets replayed"
+
+    base = results[0]
+    lines = [
+        f"{len(base.timestamps)} loops, {base.timestamps[-1] - base.timestamps[0]:.1f}s" if len(base.timestamps)
+        else "0 loops",
+        f"{'parameter set':<24}{'rms vs live':>12}{'max vs live':>12}{'rms vs first':>18}"
+        f"{'max heading':>12}{'final pose':>26}",
+    ]
+
+    for result in results:
+        if len(result.timestamps) == 0:
+            lines.append(f"{result.name:<24}{'-':>12}")
+            continue
+
+        live = translation_error(result.poses, result.recorded)
+        other = translation_error(result.poses, base.poses)
+        final = result.poses[-1]
+
+        lines.append(
+            f"{result.name:<24}{math.sqrt(np.mean(live ** 2)):>11.3f}m{live.max():>11.3f}m"
+            f"{math.sqrt(np.mean(other ** 2)):>17.3f}m"
+            f"{math.degrees(heading_error(result.poses, result.recorded).max()):>10.1f}deg"
+            f"{f'({final[0]:.2f}, {final[1]:.2f}, {math.degrees(final[2]):.0f}deg)':>26}"
+        )
+
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Replay a recorded odometry log through FieldOdometry")
+    parser.add_argument("log", help="odometry log written with config.odometry_record_enabled")
+    parser.add_argument("--sweep", help="JSON file mapping parameter set names to config overrides")
+    parser.add_argument("--workers", type=int, default=None, help="processes to run the sweep on")
+    args = parser.parse_args(argv)
+
+    parameter_sets = {"recorded config": {}}
+    if args.sweep:
+        with open(args.sweep) as file:
+            parameter_sets.update(json.load(file))
+
+    print(report(sweep(args.log, parameter_sets, args.workers)))
+
+
+if __name__ == "__main__":
+    main()
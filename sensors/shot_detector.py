@@ -0,0 +1,103 @@
+import collections
+import threading
+from typing import Callable
+
+import numpy as np
+
+import config
+from units.SI import seconds
+
+# timestamp, total flywheel current in amps, flywheel velocity in rotations per second
+Sample = tuple[seconds, float, float]
+
+
+class ShotDetector:
+    """
+    Detects notes leaving the flywheel from its torque current and velocity, sampled faster than the robot loop.
+
+    A note hitting the flywheel is a short current spike, easy to miss sampling current once a loop. The
+    detector runs on its own thread, blocking on the flywheel's status signals at config.shot_detector_frequency,
+    and runs a one sided CUSUM change point detector on the current over the median of a ring buffer of recent
+    samples. A shot is the sum crossing config.shot_detector_threshold while the velocity is
+    config.shot_detector_velocity_drop under the buffer's peak, so spinning up, which also draws current, isn't
+    one. Each shot is timestamped with the sample the current started to rise at.
+
+    Timestamps are the status signal timestamps, Phoenix time rather than FPGA time. Commands should compare
+    count instead, see command.WaitForShot.
+    """
+
+    def __init__(self, sample: Callable[[seconds], Sample | None], window: int | None = None):
+        """
+        :param sample: Blocks for up to the given timeout for the next sample, None if there was none
+        :param window: Samples in the ring buffer, defaults to config.shot_detector_window
+        """
+        self.sample = sample
+        self.window = config.shot_detector_window if window is None else window
+        self.current = np.zeros(self.window)
+        self.velocity = np.zeros(self.window)
+        self.samples = 0
+
+        self.sum: float = 0
+        self.onset: seconds | None = None
+        self.shots: collections.deque[seconds] = collections.deque(maxlen=16)
+        self.count: int = 0
+
+        self.thread: threading.Thread | None = None
+        self.running = threading.Event()
+
+    @property
+    def last_shot(self) -> seconds | None:
+        return self.shots[-1] if self.shots else None
+
+    def add_sample(self, timestamp: seconds, current: float, velocity: float) -> seconds | None:
+        """
+        Runs the detector on one sample.
+
+        :param current: Total flywheel torque current in amps
+        :param velocity: Flywheel velocity in rotations per second
+        :return: Timestamp of the shot this sample completes, None if it doesn't
+        """
+        shot = None
+        if self.samples >= self.window:
+            baseline = float(np.median(self.current))
+            self.sum = max(self.sum + current - baseline - config.shot_detector_drift, 0)
+            if self.sum == 0:
+                self.onset = None
+            elif self.onset is None:
+                self.onset = timestamp
+
+            last_shot = self.last_shot
+            if (
+                self.sum > config.shot_detector_threshold
+                and velocity < self.velocity.max() - config.shot_detector_velocity_drop
+                and (last_shot is None or self.onset - last_shot >= config.shot_detector_holdoff)
+            ):
+                shot = self.onset
+                self.shots.append(shot)
+                self.count += 1
+                self.sum = 0
+                self.onset = None
+
+        index = self.samples % self.window
+        self.current[index] = current
+        self.velocity[index] = velocity
+        self.samples += 1
+        return shot
+
+    def run(self):
+        while self.running.is_set():
+            sample = self.sample(config.period)
+            if sample is not None:
+                self.add_sample(*sample)
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.running.set()
+            self.thread = threading.Thread(target=self.run, name="ShotDetector", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.running.clear()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
@@ -0,0 +1,259 @@
+"""
+Shot angles solved offline with the drag model, saved as a table the robot memory maps.
+
+TrajectoryCalculator.deriv models air resistance, but solving it every loop is too slow for the robot.
+This solves it ahead of time over a grid of distance to the target, target height above the shooter and
+flywheel exit speed, and writes the launch angle and time of flight of every cell to a binary file.
+TrajectoryCalculator maps the file read only at startup and interpolates it.
+
+Usage:
+    python -m sensors.shot_map
+    python -m sensors.shot_map --distance 0.5 10 0.05 --height -0.5 3 0.05 --speed 10 30 0.5 --workers 4
+
+The file records the drag constants it was solved with and is ignored when they no longer match
+constants.py, run this again after changing them.
+
+The map is written to deploy/shot_map.bin. At around 4 MB it's a build output, not source, so git ignores
+it. Generate it before deploying, robotpy deploy copies the project directory with it to the roboRIO.
+Without it TrajectoryCalculator solves each shot on the robot instead.
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+import constants
+
+MAGIC = b"SHOTMAP\0"
+VERSION = 1
+
+# magic, version, 3 x axis count, 3 x (axis start, axis step), drag constants c, rho_air, a, m, g
+HEADER_STRUCT = struct.Struct("<8sH3I6d5d")
+# tables start here, so they stay aligned
+HEADER_SIZE = 128
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "deploy", "shot_map.bin")
+
+SOLVE_TOLERANCE = 1e-4  # meters of height at the target
+SOLVE_ITERATIONS = 20
+
+
+@dataclass(frozen=True)
+class Axis:
+    start: float
+    step: float
+    count: int
+
+    @classmethod
+    def from_range(cls, start: float, stop: float, step: float) -> "Axis":
+        """
+        An axis from start to stop inclusive.
+        """
+        return cls(start, step, round((stop - start) / step) + 1)
+
+    def values(self) -> np.ndarray:
+        return self.start + self.step * np.arange(self.count)
+
+    def locate(self, value: float) -> tuple[int, float] | None:
+        """
+        Index of the cell below value and how far into the cell it is, or None outside the axis.
+        """
+        position = (value - self.start) / self.step
+        if not 0 <= position <= self.count - 1:
+            return None
+        index = min(int(position), self.count - 2)
+        return index, position - index
+
+
+def drag_constants() -> tuple[float, float, float, float, float]:
+    return constants.c, constants.rho_air, constants.a, constants.m, constants.g
+
+
+class ShotMap:
+    """
+    Solved launch angles and times of flight, memory mapped read only.
+
+    Indexed by distance to the target, height of the target above the shooter and flywheel exit speed.
+    Cells without a shot, out of range or never converged, are nan.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            header = file.read(HEADER_STRUCT.size)
+        if len(header) < HEADER_STRUCT.size:
+            raise ValueError(f"{path} is not a shot map")
+        magic, version, *values = HEADER_STRUCT.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a shot map")
+        if version != VERSION:
+            raise ValueError(f"{path} is shot map version {version}, expected {VERSION}")
+
+        counts, starts_steps, self.drag = values[:3], values[3:9], tuple(values[9:])
+        self.distance, self.height, self.speed = (
+            Axis(starts_steps[2 * i], starts_steps[2 * i + 1], counts[i]) for i in range(3)
+        )
+        self.tables = np.memmap(path, dtype="<f4", mode="r", offset=HEADER_SIZE, shape=(2, *counts))
+        self.angle, self.time = self.tables
+        # the same memory without the memmap subclass, which makes small slices slow
+        self._tables = self.tables.view(np.ndarray)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PATH) -> "ShotMap | None":
+        """
+        The shot map at path, or None when there isn't one or it was solved with other drag constants.
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            shot_map = cls(path)
+        except ValueError as error:
+            print(f"Ignoring shot map: {error}")
+            return None
+        if not np.allclose(shot_map.drag, drag_constants()):
+            print(f"Ignoring shot map {path}: solved with other drag constants, run python -m sensors.shot_map")
+            return None
+        return shot_map
+
+    def lookup(self, distance: float, height: float, speed: float) -> tuple[float, float]:
+        """
+        Trilinear interpolation of the launch angle and time of flight, nan outside the map or next to a
+        cell without a shot.
+
+        :param distance: Distance to the target in meters
+        :param height: Target height above the shooter in meters
+        :param speed: Flywheel exit speed in meters per second
+        :return: Launch angle in radians and time of flight in seconds
+        """
+        cells = (self.distance.locate(distance), self.height.locate(height), self.speed.locate(speed))
+        if None in cells:
+            return math.nan, math.nan
+        (i, di), (j, dj), (k, dk) = cells
+
+        # plain floats are faster than numpy for one cell
+        values = []
+        for table in self._tables[:, i:i + 2, j:j + 2, k:k + 2].tolist():
+            along_speed = [[low + (high - low) * dk for low, high in row] for row in table]
+            along_height = [low + (high - low) * dj for low, high in along_speed]
+            values.append(along_height[0] + (along_height[1] - along_height[0]) * di)
+        angle, flight = values
+        return angle, flight
+
+
+def simulate(calculator, thetas: np.ndarray, speeds: np.ndarray, distances: np.ndarray, active: np.ndarray):
+    """
+    Height and time at the target for each shot, nan for shots that never reach it.
+    """
+    zeros = np.zeros(thetas.size)
+    u0 = np.column_stack((zeros, speeds * np.cos(thetas), zeros, speeds * np.sin(thetas)))
+    t, u, reached = calculator.numerical_integration.dormand_prince_batch(
+        lambda t, u, distance: calculator.deriv_batch(t, u),
+        u0, 0, 60, 0.001, 1e-7,
+        root=lambda t, u, distance: u[:, 0] - distance,
+        params=distances,
+        active=active,
+    )
+    return np.where(reached, u[:, 2], np.nan), np.where(reached, t, np.nan)
+
+
+def solve(calculator, distances: np.ndarray, heights: np.ndarray, speeds: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Secant solve for the low launch angle of every shot at once, starting from the angle without drag.
+
+    :return: Launch angles and times of flight, nan where there is no shot
+    """
+    g = constants.g
+    phi = np.arctan2(heights, distances)
+    with np.errstate(invalid="ignore"):
+        theta_1 = 0.5 * np.arcsin(np.sin(phi) + g * distances * np.cos(phi) / speeds ** 2) + 0.5 * phi
+    active = ~np.isnan(theta_1)
+    theta_2 = theta_1 + math.radians(1)
+
+    z_1, _ = simulate(calculator, theta_1, speeds, distances, active)
+    z_2, flight = simulate(calculator, theta_2, speeds, distances, active)
+    solved = np.zeros(distances.size, dtype=bool)
+    for _ in range(SOLVE_ITERATIONS):
+        active &= ~np.isnan(z_1) & ~np.isnan(z_2) & (z_1 != z_2)
+        solved |= active & (np.abs(heights - z_2) < SOLVE_TOLERANCE)
+        active &= ~solved
+        if not active.any():
+            break
+        slope = (theta_2 - theta_1) / np.where(active, z_2 - z_1, 1)
+        theta_new = np.where(active, theta_2 + (heights - z_2) * slope, theta_2)
+        active &= (theta_new > 0) & (theta_new < math.pi / 2)
+        z_new, flight_new = simulate(calculator, theta_new, speeds, distances, active)
+        theta_1 = np.where(active, theta_2, theta_1)
+        z_1 = np.where(active, z_2, z_1)
+        theta_2 = np.where(active, theta_new, theta_2)
+        z_2 = np.where(active, z_new, z_2)
+        flight = np.where(active, flight_new, flight)
+
+    return np.where(solved, theta_2, np.nan), np.where(solved, flight, np.nan)
+
+
+def _solve_speeds(args: tuple[Axis, Axis, np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    from sensors.trajectory_calc import TrajectoryCalculator
+
+    distance, height, speeds = args
+    calculator = TrajectoryCalculator(None, None, None)
+    grid = np.meshgrid(distance.values(), height.values(), speeds, indexing="ij")
+    angle, flight = solve(calculator, *(axis.ravel() for axis in grid))
+    return angle.reshape(grid[0].shape), flight.reshape(grid[0].shape)
+
+
+def generate(distance: Axis, height: Axis, speed: Axis, workers: int | None = None) -> np.ndarray:
+    """
+    Solves every cell, split by speed across processes.
+
+    :return: Angle and time of flight tables, shape (2, distance count, height count, speed count)
+    """
+    chunks = np.array_split(speed.values(), min(speed.count, (workers or os.cpu_count() or 1) * 4))
+    jobs = [(distance, height, chunk) for chunk in chunks if chunk.size]
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        results = list(pool.map(_solve_speeds, jobs))
+    return np.stack((
+        np.concatenate([angle for angle, _ in results], axis=2),
+        np.concatenate([flight for _, flight in results], axis=2),
+    ))
+
+
+def write(path: str, distance: Axis, height: Axis, speed: Axis, tables: np.ndarray):
+    header = HEADER_STRUCT.pack(
+        MAGIC, VERSION, distance.count, height.count, speed.count,
+        distance.start, distance.step, height.start, height.step, speed.start, speed.step,
+        *drag_constants(),
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(header.ljust(HEADER_SIZE, b"\0"))
+        file.write(np.ascontiguousarray(tables, dtype="<f4").tobytes())
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Solve shot angles with the drag model into a shot map")
+    parser.add_argument("--distance", type=float, nargs=3, default=(0.5, 10, 0.05), metavar=("START", "STOP", "STEP"),
+                        help="distance to the target in meters")
+    parser.add_argument("--height", type=float, nargs=3, default=(-0.5, 3, 0.05), metavar=("START", "STOP", "STEP"),
+                        help="target height above the shooter in meters")
+    parser.add_argument("--speed", type=float, nargs=3, default=(10, 30, 0.5), metavar=("START", "STOP", "STEP"),
+                        help="flywheel exit speed in meters per second")
+    parser.add_argument("--workers", type=int, default=None, help="processes to solve on")
+    parser.add_argument("--output", default=DEFAULT_PATH, help="shot map file to write")
+    args = parser.parse_args(argv)
+
+    axes = [Axis.from_range(*values) for values in (args.distance, args.height, args.speed)]
+    start = time.perf_counter()
+    tables = generate(*axes, workers=args.workers)
+    write(args.output, *axes, tables)
+
+    solved = np.count_nonzero(~np.isnan(tables[0]))
+    print(f"{solved}/{tables[0].size} cells solved in {time.perf_counter() - start:.1f}s, wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,13 @@
 # import matplotlib.pyplot as plt
 # import ntcore
 import numpy as np
-from math import degrees, radians, isnan
+from math import degrees, hypot, radians, isnan
 import config, ntcore
 import constants
 from sensors.field_odometry import FieldOdometry
+from sensors.shot_map import ShotMap
 from subsystem import Elevator, Flywheel
-from toolkit.utils.toolkit_math import NumericalIntegration, extrapolate
+from toolkit.utils.toolkit_math import NumericalIntegration
 from utils import POI
 from wpimath.geometry import Rotation2d, Translation3d, Translation2d, Pose2d
 from units.SI import inches_to_meters
@@ -50,6 +51,7 @@ class TrajectoryCalculator:
         self.numerical_integration = NumericalIntegration()
         self.use_air_resistance = False
         self.tuning = False
+        self.shot_map: ShotMap | None = None
 
     def init(self):
         self.speaker = POI.Coordinates.Structures.Scoring.kSpeaker.getTranslation()
@@ -60,6 +62,8 @@ class TrajectoryCalculator:
         self.feed_zone_midline_z = POI.Coordinates.Structures.Scoring.kFeedMidline.getZ()
         self.feed_static = POI.Coordinates.Structures.Scoring.kFeedStatic.getTranslation()
         self.feed_static_z = POI.Coordinates.Structures.Scoring.kFeedStatic.getZ()
+        if config.shot_map_enabled:
+            self.shot_map = ShotMap.load()
         if self.tuning:
             self.table.putNumber('flywheel distance scalar', config.flywheel_distance_scalar)
             self.table.putNumber('flywheel minimum value', config.v0_flywheel_minimum)
@@ -226,6 +230,14 @@ class TrajectoryCalculator:
             self.t_total = self.distance_to_target / ((self.flywheel.get_velocity_linear() if self.flywheel.get_velocity_linear() > 0 else 1) * np.cos(theta_1))
             return theta_1
         else:
+            if self.shot_map is not None:
+                angle, flight = self.shot_map.lookup(
+                    self.distance_to_target, self.delta_z, self.flywheel.get_velocity_linear()
+                )
+                if not isnan(angle):
+                    self.shoot_angle = angle
+                    self.t_total = flight
+                    return angle
             theta_2 = theta_1 + np.radians(1)
             z_1 = self.run_sim(theta_1)
             z_2 = self.run_sim(theta_2)
@@ -358,9 +370,9 @@ class TrajectoryCalculator:
         self.table.putNumber('feed flywheel speed', self.get_flywheel_speed_feed(self.distance_to_feed_zone))
         
     def run_sim(self, shooter_theta):
-        def hit_target(t, u):
-            # We've hit the target if the distance to target is 0.
-            return u[0] > self.distance_to_target
+        def distance_past_target(t, u):
+            # Crosses zero when the note reaches the target.
+            return u[0] - self.distance_to_target
 
         u0 = (
             0,
@@ -369,19 +381,45 @@ class TrajectoryCalculator:
             self.flywheel.get_velocity_linear() * np.sin(shooter_theta),
         )
         t0, tf = 0, 60
-        # Stop the integration when we hit the target.
-        t, y = self.numerical_integration.adaptive_rk4(
-            self.deriv, u0, t0, tf, 0.001, 1e-9, hit_target
+        # Stop the integration exactly where the note reaches the target.
+        t, u = self.numerical_integration.dormand_prince(
+            self.deriv, u0, t0, tf, 0.001, 1e-7, root=distance_past_target, history=False
         )
 
-        # y[-2][0] is the penultimate x value
-        # y[-2][2] is the penultimate z value
-        # y[-1][0] is the final x value
-        # y[-1][2] is the final z value
-        return extrapolate(
-            self.distance_to_target, y[-2][0], y[-2][2], y[-1][0], y[-1][2]
+        # u[2] is the z value at the target
+        return u[2]
+
+    def run_sims(self, shooter_thetas, speeds=None, distances=None) -> np.ndarray:
+        """
+        run_sim for many shots at once, integrated together.
+        :param shooter_thetas: Launch angles.
+        :param speeds: Launch speeds, defaults to the flywheel's current speed.
+        :param distances: Target distances, defaults to distance_to_target.
+        :return: z at the target for each shot, nan for shots that never reach it.
+        """
+        if speeds is None:
+            speeds = self.flywheel.get_velocity_linear()
+        if distances is None:
+            distances = self.distance_to_target
+        shooter_thetas, speeds, distances = np.broadcast_arrays(
+            np.asarray(shooter_thetas, dtype=float), np.asarray(speeds, dtype=float),
+            np.asarray(distances, dtype=float),
         )
 
+        u0 = np.column_stack((
+            np.zeros(shooter_thetas.size),
+            (speeds * np.cos(shooter_thetas)).ravel(),
+            np.zeros(shooter_thetas.size),
+            (speeds * np.sin(shooter_thetas)).ravel(),
+        ))
+        t, u, reached = self.numerical_integration.dormand_prince_batch(
+            lambda t, u, distance: self.deriv_batch(t, u),
+            u0, 0, 60, 0.001, 1e-7,
+            root=lambda t, u, distance: u[:, 0] - distance,
+            params=distances.ravel(),
+        )
+        return np.where(reached, u[:, 2], np.nan).reshape(shooter_thetas.shape)
+
     def get_theta(self) -> radians:
         """
         Returns the angle of the trajectory.
@@ -394,7 +432,13 @@ class TrajectoryCalculator:
         if self.tuning:
             config.wrist_shot_tolerance = self.table.getNumber('wrist tolerance', config.wrist_shot_tolerance)
         
-        self.shoot_angle = self.calculate_angle_no_air(self.get_distance_to_target(), self.get_delta_z())
+        distance_to_target = self.get_distance_to_target()
+        delta_z = self.get_delta_z()
+        angle = np.nan
+        if self.shot_map is not None:
+            angle, _ = self.shot_map.lookup(distance_to_target, delta_z, self.get_flywheel_speed(distance_to_target))
+        # outside the shot map, or none, without drag
+        self.shoot_angle = angle if not isnan(angle) else self.calculate_angle_no_air(distance_to_target, delta_z)
         return self.shoot_angle + radians(config.shot_angle_offset)
 
     def get_feed_theta(self, force_amp: bool = False) -> radians:
@@ -437,11 +481,17 @@ class TrajectoryCalculator:
         
         return self.get_rotation_to_feed_zone(static_pose, True)
     
-    def get_distance_to_target(self) -> float:
-        
+    def get_distance_to_target(self, pose: Pose2d = None) -> float:
+        """
+        Distance from the shooter to the speaker, from the robot's pose or, without updating
+        distance_to_target, from the given pose.
+        """
         if type(self.speaker) == Translation3d:
             self.speaker = self.speaker.toTranslation2d()
-        
+
+        if pose is not None:
+            return pose.translation().distance(self.speaker) - constants.shooter_offset_y
+
         self.distance_to_target = (
             self.odometry.getPose().translation().distance(self.speaker) - constants.shooter_offset_y
         )
@@ -493,7 +543,15 @@ class TrajectoryCalculator:
 
     def deriv(self, t, u):
         x, xdot, z, zdot = u
-        speed = np.hypot(xdot, zdot)
+        speed = hypot(xdot, zdot)
         xdotdot = -self.k / constants.m * speed * xdot
         zdotdot = -self.k / constants.m * speed * zdot - constants.g
-        return np.array([xdot, xdotdot, zdot, zdotdot])
+        return xdot, xdotdot, zdot, zdotdot
+
+    def deriv_batch(self, t, u):
+        """
+        deriv for an (N, 4) array of states.
+        """
+        xdot, zdot = u[:, 1], u[:, 3]
+        drag = -self.k / constants.m * np.hypot(xdot, zdot)
+        return np.column_stack((xdot, drag * xdot, zdot, drag * zdot - constants.g))
@@ -0,0 +1,199 @@
+import math
+
+import numpy as np
+from wpimath.geometry import Pose3d
+
+import config
+from sensors.vision_gating import InnovationGate
+
+
+class VisionFusion:
+    """
+    Collects every vision frame seen in a loop, gates them together and fuses the
+    frames that agree into a single measurement per timestamp cluster.
+
+    Frames are the tuples returned by the vision estimator:
+    (pose, timestamp, tag_count, distance_to_target, tag_area, tag_id, megatag2, camera)
+    """
+
+    def __init__(self, field_width: float, field_length: float):
+        self.field_width = field_width
+        self.field_length = field_length
+
+        self.x: np.ndarray = np.zeros(0)
+        self.y: np.ndarray = np.zeros(0)
+        self.t: np.ndarray = np.zeros(0)
+        self.std: np.ndarray = np.zeros(0)
+        self.std_omega: np.ndarray = np.zeros(0)
+        self.accepted: np.ndarray = np.zeros(0, dtype=bool)
+        self.cameras: list[str] = []
+
+    def load(self, frames: list[tuple[Pose3d, float, float, float, float, float, bool, str]]):
+        """
+        Unpacks the frames of a loop into flat arrays.
+
+        :param frames: Vision frames from every camera, None entries are skipped
+        :return: (x, y, timestamp, tag_count, distance_to_target, tag_area, tag_id)
+        """
+        frames = [frame for frame in frames if frame is not None]
+        count = len(frames)
+
+        data = np.empty((7, count))
+        self.cameras = []
+        for i, frame in enumerate(frames):
+            pose = frame[0]
+            data[0, i] = pose.X()
+            data[1, i] = pose.Y()
+            data[2:, i] = frame[1:6]
+            self.cameras.append(frame[7] if len(frame) > 7 else "")
+
+        return data
+
+    def gate(
+            self,
+            data: np.ndarray,
+            robot_x: float,
+            robot_y: float,
+            use_speaker_tags: bool,
+            shooting: bool,
+            check_deviation: bool = True,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Applies the same gates and std-dev selection as FieldOdometry.add_vision_measure
+        to every frame at once.
+
+        :param check_deviation: Reject single tag frames too far from the current pose.
+        Turned off when an innovation gate is used instead.
+        :return: (accepted mask, translation std devs, rotation std devs)
+        """
+        x, y, _, tag_count, distance, area, tag_id = data
+
+        single = tag_count < 2
+        deviation = np.hypot(x - robot_x, y - robot_y)
+
+        accepted = (
+            (0 <= x) & (x <= self.field_length)
+            & (0 <= y) & (y <= self.field_width)
+            & (tag_count != 0)
+        )
+        accepted &= ~(single & (
+            (distance > config.odometry_tag_distance_threshold)
+            | (area < config.odometry_tag_area_threshold)
+            | (check_deviation & (deviation > config.odometry_distance_deviation_threshold))
+        ))
+        accepted &= ~((tag_count == 2) & (distance > config.odometry_two_tag_distance_threshold))
+
+        std = np.where(tag_count == 2, 0.5, 0.7)
+        std_omega = np.full(x.shape, math.radians(44))
+
+        speaker = np.zeros(x.shape, dtype=bool)
+        if use_speaker_tags:
+            speaker_ids = (3, 4) if config.active_team == config.Team.RED else (7, 8)
+            speaker = np.isin(tag_id, speaker_ids)
+            compensation = distance / (config.odometry_two_tag_distance_threshold * 2)
+            std = np.where(speaker, np.where(tag_count > 1, 0.2, 0.5) + compensation, std)
+
+        if shooting:
+            std_omega[:] = math.radians(9)
+            accepted &= ~single
+            std = np.where(~speaker & (tag_count < 3), 1.5, std)
+
+        return accepted, std, std_omega
+
+    def fuse(self, data: np.ndarray, accepted: np.ndarray, std: np.ndarray, std_omega: np.ndarray):
+        """
+        Groups the accepted frames into timestamp clusters and combines the frames in each
+        cluster that agree with each other by inverse-variance weighting.
+        Frames that disagree with their cluster are passed through on their own.
+
+        :return: list of (x, y, timestamp, (std_x, std_y, std_omega))
+        """
+        x, y, t = data[0][accepted], data[1][accepted], data[2][accepted]
+        std, std_omega = std[accepted], std_omega[accepted]
+
+        if x.size == 0:
+            return []
+
+        order = np.argsort(t)
+        x, y, t, std, std_omega = x[order], y[order], t[order], std[order], std_omega[order]
+
+        # a new cluster starts wherever the gap to the first frame of the current one is too large
+        cluster = np.zeros(t.shape, dtype=int)
+        start = t[0]
+        for i in range(1, t.size):
+            if t[i] - start > config.odometry_fusion_time_window:
+                cluster[i] = cluster[i - 1] + 1
+                start = t[i]
+            else:
+                cluster[i] = cluster[i - 1]
+
+        weight = 1 / std ** 2
+        weight_omega = 1 / std_omega ** 2
+
+        measurements = []
+        for c in range(cluster[-1] + 1):
+            members = cluster == c
+
+            # the frame with the most neighbours (then the lowest std dev) anchors the cluster,
+            # so a single bad frame can't drag the others apart
+            near = np.hypot(
+                x[members][:, None] - x[members][None, :],
+                y[members][:, None] - y[members][None, :],
+            ) <= config.odometry_fusion_agreement_threshold
+            anchor = np.lexsort((std[members], -near.sum(axis=1)))[0]
+            agree = near[anchor]
+
+            if agree.any():
+                w = weight[members][agree]
+                w_omega = weight_omega[members][agree]
+                measurements.append((
+                    np.dot(w, x[members][agree]) / w.sum(),
+                    np.dot(w, y[members][agree]) / w.sum(),
+                    np.dot(w, t[members][agree]) / w.sum(),
+                    (
+                        math.sqrt(1 / w.sum()),
+                        math.sqrt(1 / w.sum()),
+                        math.sqrt(1 / w_omega.sum()),
+                    ),
+                ))
+
+            for i in np.flatnonzero(~agree):
+                measurements.append((
+                    x[members][i],
+                    y[members][i],
+                    t[members][i],
+                    (std[members][i], std[members][i], std_omega[members][i]),
+                ))
+
+        return measurements
+
+    def process(
+            self,
+            frames: list[tuple[Pose3d, float, float, float, float, float, bool, str]],
+            robot_x: float,
+            robot_y: float,
+            use_speaker_tags: bool,
+            shooting: bool,
+            innovation_gate: InnovationGate | None = None,
+    ):
+        """
+        Runs the full load, gate and fuse pipeline on the frames of one loop.
+
+        :param innovation_gate: If given, frames that pass the fixed gates are also tested against it
+        :return: list of (x, y, timestamp, (std_x, std_y, std_omega))
+        """
+        data = self.load(frames)
+        accepted, std, std_omega = self.gate(
+            data, robot_x, robot_y, use_speaker_tags, shooting, check_deviation=innovation_gate is None
+        )
+
+        if innovation_gate is not None:
+            for i in np.flatnonzero(accepted):
+                accepted[i] = innovation_gate.test(
+                    self.cameras[i], data[3, i], data[0, i] - robot_x, data[1, i] - robot_y, std[i]
+                )
+
+        self.x, self.y, self.t = data[0], data[1], data[2]
+        self.std, self.std_omega, self.accepted = std, std_omega, accepted
+
+        return self.fuse(data, accepted, std, std_omega)
@@ -0,0 +1,117 @@
+import ntcore
+import numpy as np
+
+import config
+
+
+class InnovationWindow:
+    """
+    Fixed-size ring buffer of the normalized innovations and accept/reject results
+    seen for one camera and tag count bucket.
+    """
+
+    def __init__(self, size: int):
+        self.nis = np.zeros(size)
+        self.accepted = np.zeros(size, dtype=bool)
+        self.index: int = 0
+        self.count: int = 0
+        self.nis_index: int = 0
+        self.nis_count: int = 0
+
+    def add(self, nis: float, accepted: bool):
+        size = self.accepted.size
+
+        self.accepted[self.index] = accepted
+        self.index = (self.index + 1) % size
+        self.count = min(self.count + 1, size)
+
+        # only accepted innovations describe the spread of good measurements
+        if accepted:
+            self.nis[self.nis_index] = nis
+            self.nis_index = (self.nis_index + 1) % size
+            self.nis_count = min(self.nis_count + 1, size)
+
+    def mean_nis(self) -> float:
+        return float(self.nis[:self.nis_count].mean())
+
+    def accept_rate(self) -> float:
+        if self.count == 0:
+            return 0.0
+        return float(np.count_nonzero(self.accepted[:self.count])) / self.count
+
+
+class InnovationGate:
+    """
+    Rejects vision measurements by their Mahalanobis distance to the current pose estimate.
+
+    The pose estimator doesn't expose its covariance, so the gate keeps its own translation
+    variance that grows as the robot drives and shrinks the same way the estimator's does when
+    a measurement is accepted. The innovation covariance is that variance plus the measurement's.
+    Once a camera and tag count bucket has enough accepted samples, its covariance is inflated
+    by how far the windowed average normalized innovation sits above what it should be (2 for x, y).
+    """
+
+    def __init__(self):
+        self.table = ntcore.NetworkTableInstance.getDefault().getTable("Odometry").getSubTable("Vision Gate")
+        self.variance: float = config.odometry_gate_initial_variance
+        self.windows: dict[tuple[str, int], InnovationWindow] = {}
+
+    @staticmethod
+    def bucket(tag_count: float) -> int:
+        return int(min(max(tag_count, 1), 3))
+
+    def window(self, camera: str, tag_count: float) -> InnovationWindow:
+        key = (camera, self.bucket(tag_count))
+        if key not in self.windows:
+            self.windows[key] = InnovationWindow(config.odometry_gate_window)
+        return self.windows[key]
+
+    def predict(self, dt: float, speed: float):
+        """
+        Grows the pose variance for time passed and distance travelled since the last loop.
+
+        :param dt: Time since the last prediction in seconds
+        :param speed: Robot translational speed in meters per second
+        """
+        self.variance += (config.odometry_gate_process_noise + config.odometry_gate_drift * abs(speed)) * dt
+
+    def test(self, camera: str, tag_count: float, innovation_x: float, innovation_y: float, std_dev: float) -> bool:
+        """
+        Gates a single measurement and records the result.
+
+        :param camera: Name of the camera the measurement came from
+        :param tag_count: Number of tags in the measurement
+        :param innovation_x: Measured x minus estimated x
+        :param innovation_y: Measured y minus estimated y
+        :param std_dev: Translation std dev that would be given to the estimator
+        :return: True if the measurement should be used
+        """
+        window = self.window(camera, tag_count)
+        measurement_variance = std_dev ** 2
+        innovation_variance = self.variance + measurement_variance
+
+        scale = 1.0
+        if window.nis_count >= config.odometry_gate_min_samples:
+            scale = max(1.0, window.mean_nis() / 2)
+
+        nis = (innovation_x ** 2 + innovation_y ** 2) / innovation_variance
+        accepted = nis / scale <= config.odometry_gate_chi2_threshold
+
+        window.add(nis, accepted)
+
+        if accepted:
+            self.variance = self.variance * measurement_variance / innovation_variance
+
+        return accepted
+
+    def accept_rates(self) -> dict[str, float]:
+        return {
+            f"{camera} {bucket}{'+' if bucket == 3 else ''} tag": window.accept_rate()
+            for (camera, bucket), window in self.windows.items()
+        }
+
+    def update_tables(self):
+        for name, rate in self.accept_rates().items():
+            self.table.putNumber(f"{name} accept rate", rate)
+            self.table.putNumber(f"{name} reject rate", 1 - rate)
+        self.table.putNumber("pose variance", self.variance)
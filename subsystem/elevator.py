@@ -6,6 +6,7 @@ from units.SI import meters
 import ntcore
 from toolkit.subsystem import Subsystem
 from toolkit.motors.rev_motors import SparkMax
+from utils import SignalLogger
 import robot_states as states
 
 class Elevator(Subsystem):
@@ -44,6 +45,10 @@ class Elevator(Subsystem):
         # Limits motor acceleration
         self.motor_extend.motor.setClosedLoopRampRate(config.elevator_ramp_rate)
 
+        SignalLogger.double('elevator/height', self.get_length)
+        SignalLogger.double('elevator/target height', lambda: self.target_length)
+        SignalLogger.double('elevator/current', lambda: self.motor_extend.motor.getOutputCurrent())
+
         # Inverted b/c motors r parallel facing out.
 
         # self.zero()
@@ -74,9 +79,6 @@ class Elevator(Subsystem):
         length = self.limit_length(length)
         self.target_length = length
 
-        print(length)
-        print(self.length_to_rotations(length), 'elevator rotation')
-
         self.motor_extend.set_target_position(
             self.length_to_rotations(length), arbff
         )
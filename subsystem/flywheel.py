@@ -6,16 +6,99 @@ import config
 import constants
 from toolkit.motors.ctre_motors import TalonFX
 from toolkit.subsystem import Subsystem
+from utils import SignalLogger
 from units.SI import meters_per_second, radians_per_second
 import robot_states as states
-# from wpimath.controller import LinearQuadraticRegulator_1_1
-# from wpimath.estimator import KalmanFilter_1_1_1
-# from wpimath.system import LinearSystemLoop_1_1_1
-# from wpimath.system.plant import DCMotor, LinearSystemId
+from wpimath.system.plant import DCMotor
 
 foc_active = False
 
 
+def _dare(a: float, b: float, q: float, r: float) -> float:
+    """
+    Solves the scalar discrete algebraic Riccati equation p = a^2 p - (a b p)^2 / (r + b^2 p) + q.
+    """
+    s = q * b * b + r * (a * a - 1)
+    return (s + math.sqrt(s * s + 4 * q * r * b * b)) / (2 * b * b)
+
+
+class FlywheelStateSpace:
+    """
+    LQR, Kalman filter and plant inversion feed forward for one flywheel, the same design as wpimath's
+    LinearSystemLoop_1_1_1 for LinearSystemId.flywheelSystem, latency compensated like
+    LinearQuadraticRegulator.latencyCompensate.
+
+    The system is a single velocity state, so it runs on floats: every gain has a closed form, and it
+    skips converting 1x1 matrices to and from Eigen every loop.
+
+    :param motor: Motors on the flywheel
+    :param moi: Moment of inertia in kg*m^2
+    :param gearing: Motor rotations per flywheel rotation
+    :param velocity_tolerance: LQR velocity error tolerance in radians per second
+    :param voltage_tolerance: LQR control effort tolerance in volts
+    :param model_std: How far off we think the model is, in radians per second
+    :param encoder_std: How far off we think the encoder is, in radians per second
+    :param latency: Measurement latency in seconds
+    """
+
+    def __init__(
+        self,
+        motor: DCMotor,
+        moi: float,
+        gearing: float,
+        velocity_tolerance: radians_per_second,
+        voltage_tolerance: float,
+        model_std: radians_per_second,
+        encoder_std: radians_per_second,
+        latency: float,
+        dt: float = config.period,
+        max_voltage: float = 12.0,
+    ):
+        # continuous dx/dt = A x + B u, discretized exactly
+        A = -gearing ** 2 * motor.Kt / (motor.R * motor.Kv * moi)
+        B = gearing * motor.Kt / (motor.R * moi)
+        self.a = math.exp(A * dt)
+        self.b = (self.a - 1) / A * B
+        self.max_voltage = max_voltage
+
+        q, r = 1 / velocity_tolerance ** 2, 1 / voltage_tolerance ** 2
+        p = _dare(self.a, self.b, q, r)
+        self.K = self.a * self.b * p / (r + self.b ** 2 * p)
+        self.K *= (self.a - self.b * self.K) ** (latency / dt)
+
+        # steady state Kalman gain, process noise discretized over the loop and encoder noise per loop
+        process = model_std ** 2 * (self.a ** 2 - 1) / (2 * A)
+        measurement = encoder_std ** 2 / dt
+        p = _dare(self.a, 1, process, measurement)
+        self.L = p / (p + measurement)
+
+        self.xhat: radians_per_second = 0
+        self.r: radians_per_second = 0
+        self.next_r: radians_per_second = 0
+        self.u: float = 0
+
+    def reset(self, velocity: radians_per_second):
+        self.xhat = velocity
+        self.r = self.next_r = velocity
+        self.u = 0
+
+    def set_next_r(self, velocity: radians_per_second):
+        self.next_r = velocity
+
+    def correct(self, velocity: radians_per_second):
+        self.xhat += self.L * (velocity - self.xhat)
+
+    def predict(self) -> float:
+        """
+        Voltage for this loop, and the state estimate moved on to the next loop with it.
+        """
+        feed_forward = (self.next_r - self.a * self.r) / self.b
+        self.u = min(max(self.K * (self.next_r - self.xhat) + feed_forward, -self.max_voltage), self.max_voltage)
+        self.r = self.next_r
+        self.xhat = self.a * self.xhat + self.b * self.u
+        return self.u
+
+
 class Flywheel(Subsystem):
     def __init__(self):
         super().__init__()
@@ -44,67 +127,54 @@ class Flywheel(Subsystem):
         self.flywheel_top_target = 0
         self.flywheel_bottom_target = 0
 
-        # self.flywheel_MOI = (constants.flywheel_mass / 2) * (constants.flywheel_radius_outer ** 2)
-
-        # self.shaft_MOI = (constants.flywheel_shaft_mass / 2) * (constants.flywheel_shaft_radius ** 2)
+        self.flywheel_MOI = (constants.flywheel_mass / 2) * (constants.flywheel_radius_outer ** 2)
 
-        # self.total_MOI = .001284
+        self.shaft_MOI = (constants.flywheel_shaft_mass / 2) * (constants.flywheel_shaft_radius ** 2)
 
-        # self.flywheel_plant_top = LinearSystemId().flywheelSystem(
-        #     DCMotor.NEO(config.flywheel_motor_count), self.total_MOI, constants.flywheel_gear_ratio
-        # )
+        self.total_MOI = self.flywheel_MOI + self.shaft_MOI
 
-        # self.flywheel_plant_bottom = LinearSystemId().flywheelSystem(
-        #     DCMotor.NEO(config.flywheel_motor_count), self.total_MOI, constants.flywheel_gear_ratio
-        # )
+        # voltage control from the roboRIO instead of the Talon velocity loop, see set_state_space
+        self.state_space: bool = config.flywheel_state_space
+        self.top_flywheel_state = self.state_space_loop()
+        self.bottom_flywheel_state = self.state_space_loop()
 
-        # self.flywheel_observer_top = KalmanFilter_1_1_1(
-        #     self.flywheel_plant_top,
-        #     [3.0],  # how accurate we think our model is
-        #     [0.01],  # how accurate we think our encoder data is
-        #     config.period
-        # )
-
-        # self.flywheel_observer_bottom = KalmanFilter_1_1_1(
-        #     self.flywheel_plant_bottom,
-        #     [3.0],  # how accurate we think our model is
-        #     [0.01],  # how accurate we think our encoder data is
-        #     config.period
-        # )
+        self.ready_to_shoot: bool = False
+        self.spin_up: float = 0  # 0-1 of the way to the target velocity, updated in periodic
+        self.initialized: bool = False
 
-        # self.flywheel_controller_top = LinearQuadraticRegulator_1_1(
-        #     self.flywheel_plant_top,
-        #     [1.5],  # velocity error tolerance
-        #     [12.0],  # control effort tolerance
-        #     config.period
-        # )
+    def state_space_loop(self) -> FlywheelStateSpace:
+        return FlywheelStateSpace(
+            DCMotor.falcon500(config.flywheel_motor_count),
+            self.total_MOI,
+            constants.flywheel_gear_ratio,
+            config.flywheel_lqr_velocity_tolerance,
+            config.flywheel_lqr_voltage_tolerance,
+            config.flywheel_kalman_model_std,
+            config.flywheel_kalman_encoder_std,
+            config.flywheel_measurement_latency,
+        )
 
-        # self.flywheel_controller_bottom = LinearQuadraticRegulator_1_1(
-        #     self.flywheel_plant_bottom,
-        #     [1.5],  # velocity error tolerance
-        #     [12.0],  # control effort tolerance
-        #     config.period
-        # )
+    def set_state_space(self, enabled: bool) -> None:
+        """
+        Switches between the state space loop and the Talon velocity loop, keeping the current targets.
+        """
+        self.state_space = enabled
+        self.top_flywheel_state.reset(self.get_velocity(1))
+        self.bottom_flywheel_state.reset(self.get_velocity(2))
+        self.set_velocity(self.flywheel_top_target, 1)
+        self.set_velocity(self.flywheel_bottom_target, 2)
 
-        # self.flywheel_controller_top.latencyCompensate(self.flywheel_plant_top, config.period, 0.025)
-        # self.flywheel_controller_bottom.latencyCompensate(self.flywheel_plant_bottom, config.period, 0.025)
-        # self.top_flywheel_state = LinearSystemLoop_1_1_1(
-        #     self.flywheel_plant_top,
-        #     self.flywheel_controller_top,
-        #     self.flywheel_observer_top,
-        #     12.0,
-        #     config.period
-        # )
-        # self.bottom_flywheel_state = LinearSystemLoop_1_1_1(
-        #     self.flywheel_plant_bottom,
-        #     self.flywheel_controller_bottom,
-        #     self.flywheel_observer_bottom,
-        #     12.0,
-        #     config.period
-        # )
+    def update_state_space(self) -> None:
+        """
+        Runs one loop of the state space controllers and applies their voltages.
+        """
+        # Correct the state estimate with the encoder and voltage
+        self.top_flywheel_state.correct(self.get_velocity(1))
+        self.bottom_flywheel_state.correct(self.get_velocity(2))
 
-        self.ready_to_shoot: bool = False
-        self.initialized: bool = False
+        # Update our LQR to generate new voltage commands and use the voltage
+        self.motor_1.set_target_voltage(self.top_flywheel_state.predict())
+        self.motor_2.set_target_voltage(self.bottom_flywheel_state.predict())
 
     @staticmethod
     def rpm_to_angular_velocity(rpm):
@@ -131,13 +201,13 @@ class Flywheel(Subsystem):
         return rps
 
     @staticmethod
-    def linear_velocity_to_angular_velocity(linear_velocity):
+    def linear_velocity_to_angular_velocity(linear_velocity: meters_per_second) -> radians_per_second:
         # convert linear to angular velocity
         vel = linear_velocity / constants.flywheel_radius_outer
         return vel
 
     @staticmethod
-    def angular_velocity_to_linear_velocity(angular_velocity):
+    def angular_velocity_to_linear_velocity(angular_velocity: radians_per_second) -> meters_per_second:
         # Convert radians per second to RPM
         vel = angular_velocity * constants.flywheel_radius_outer
         return vel
@@ -145,6 +215,17 @@ class Flywheel(Subsystem):
     def init(self) -> None:
         self.motor_1.init()
         self.motor_2.init()
+        if config.shot_detector_enabled:
+            self.motor_1.set_signal_frequency(config.shot_detector_frequency)
+            self.motor_2.set_signal_frequency(config.shot_detector_frequency)
+
+        SignalLogger.double('flywheel/top velocity', lambda: self.get_velocity_linear(1))
+        SignalLogger.double('flywheel/bottom velocity', lambda: self.get_velocity_linear(2))
+        SignalLogger.double('flywheel/top target', lambda: self.angular_velocity_to_linear_velocity(self.flywheel_top_target))
+        SignalLogger.double('flywheel/bottom target', lambda: self.angular_velocity_to_linear_velocity(self.flywheel_bottom_target))
+        SignalLogger.double('flywheel/top current', lambda: self.get_current(1))
+        SignalLogger.double('flywheel/bottom current', lambda: self.get_current(2))
+        SignalLogger.boolean('flywheel/ready to shoot', lambda: self.ready_to_shoot)
 
         # self.motor_1.optimize_sparkmax_no_position()
         # self.motor_2.optimize_sparkmax_no_position()
@@ -164,6 +245,21 @@ class Flywheel(Subsystem):
 
         # self.initialized = True
 
+    def wait_for_shot_signals(self, timeout: float) -> tuple[float, float, float] | None:
+        """
+        Blocks until both motors' next velocity and torque current update, for the ShotDetector thread.
+
+        Reads its own copies of the signals, never the ones the robot loop refreshes.
+
+        :return: Timestamp, total current of both motors and their mean velocity in rotations per second, None if
+            they didn't both update within timeout
+        """
+        samples = TalonFX.wait_for_signals(timeout, self.motor_1, self.motor_2)
+        if samples is None:
+            return None
+        (timestamp, top_velocity, top_current), (_, bottom_velocity, bottom_current) = samples
+        return timestamp, top_current + bottom_current, (top_velocity + bottom_velocity) / 2
+
     def note_shot(self) -> bool:
         return (
             self.get_current(1) > config.flywheel_shot_current_threshold
@@ -172,29 +268,22 @@ class Flywheel(Subsystem):
 
     def set_velocity(self, angular_velocity: radians_per_second, motor=0) -> None:
         if motor == 1:
-            # self.top_flywheel_state.setNextR([angular_velocity])
+            self.top_flywheel_state.set_next_r(angular_velocity)
             self.flywheel_top_target = angular_velocity
-            self.motor_1.set_target_velocity(
-                self.angular_velocity_to_rps(angular_velocity), 0
-            )
+            if not self.state_space:
+                self.motor_1.set_target_velocity(
+                    self.angular_velocity_to_rps(angular_velocity), 0
+                )
         elif motor == 2:
-            # self.bottom_flywheel_state.setNextR([angular_velocity])
+            self.bottom_flywheel_state.set_next_r(angular_velocity)
             self.flywheel_bottom_target = angular_velocity
-            self.motor_2.set_target_velocity(
-                self.angular_velocity_to_rps(angular_velocity), 0
-            )
+            if not self.state_space:
+                self.motor_2.set_target_velocity(
+                    self.angular_velocity_to_rps(angular_velocity), 0
+                )
         else:
-            # self.top_flywheel_state.setNextR([angular_velocity])
-            self.flywheel_top_target = angular_velocity
-            self.flywheel_bottom_target = angular_velocity
-            self.motor_1.set_target_velocity(
-                self.angular_velocity_to_rps(angular_velocity), 0
-            )
-
-            # self.bottom_flywheel_state.setNextR([angular_velocity])
-            self.motor_2.set_target_velocity(
-                self.angular_velocity_to_rps(angular_velocity), 0
-            )
+            self.set_velocity(angular_velocity, 1)
+            self.set_velocity(angular_velocity, 2)
 
     def set_velocity_linear(self, linear_velocity: meters_per_second, motor=0) -> None:
         angular_velocity = linear_velocity / constants.flywheel_radius_outer
@@ -339,17 +428,8 @@ class Flywheel(Subsystem):
             )
 
     def periodic(self):
-        # # Correct the state estimate with the encoder and voltage
-        # self.top_flywheel_state.correct([self.get_velocity(1)])
-        # self.bottom_flywheel_state.correct([self.get_velocity(2)])
-
-        # # Update our LQR to generate new voltage commands and use the voltage
-        # self.top_flywheel_state.predict(config.period)
-        # self.bottom_flywheel_state.predict(config.period)
-
-        # # # Set the next setpoint for the flywheel
-        # self.set_voltage(self.top_flywheel_state.U(0), 1)
-        # self.set_voltage(self.bottom_flywheel_state.U(0), 2)
+        if self.state_space:
+            self.update_state_space()
 
         if (
             self.within_velocity_linear(
@@ -366,6 +446,11 @@ class Flywheel(Subsystem):
         else:
             self.ready_to_shoot = False
 
+        if self.flywheel_top_target > 0:
+            self.spin_up = min(max(self.get_velocity(1) / self.flywheel_top_target, 0), 1)
+        else:
+            self.spin_up = 0
+
         if config.NT_FLYWHEEL:
         
             table = ntcore.NetworkTableInstance.getDefault().getTable("flywheel")
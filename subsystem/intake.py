@@ -31,6 +31,7 @@ class Intake(Subsystem):
         self.distance_sensor: AnalogInput = None
 
         self.note_in_intake: bool = False
+        self.note_sensed: bool = False
         self.intake_running: bool = False
         self.intake_deployed: bool = False
 
@@ -60,14 +61,18 @@ class Intake(Subsystem):
 
         self.outer_motor.set_raw_output(vel * constants.intake_outer_gear_ratio)
 
+    def update_note_state(self):
+        """
+        Reads the distance sensor once a loop, for detect_note
+        """
+        self.note_sensed = self.distance_sensor.getVoltage() > config.intake_distance_sensor_threshold
+
     def detect_note(self) -> bool:
         """
-        Detects if there is a note in the intake
-        Also sets class variable note_in_intake
+        Detects if there is a note in the intake, as of this loop's update_note_state
         :return: if there is a note
         """
-        note_in_intake = self.distance_sensor.getVoltage() > config.intake_distance_sensor_threshold
-        return note_in_intake
+        return self.note_sensed
 
     def detect_note_leaving(self) -> bool:
         """
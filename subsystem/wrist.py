@@ -7,8 +7,63 @@ import constants
 from toolkit.motors.rev_motors import SparkMax
 from toolkit.subsystem import Subsystem
 from toolkit.utils.toolkit_math import bounded_angle_diff
-from units.SI import radians
-from wpilib import DigitalInput
+from units.SI import meters, radians, radians_per_second, seconds
+from utils import SignalLogger
+from utils.beam_break import BeamBreak
+from wpimath.system.plant import DCMotor
+from wpimath.trajectory import TrapezoidProfile
+
+
+class WristFeedForward:
+    """
+    Wrist feed forward in volts, with the gravity term precomputed over wrist angle and elevator height.
+
+    Gravity is config.wrist_max_ff * cos(angle - config.wrist_ff_offset), scaled by
+    1 + config.wrist_ff_height_gain * height for whatever changes with the elevator's height. The
+    velocity term is the NEO's back EMF through the wrist gearing.
+    """
+
+    def __init__(self):
+        self.angle_start = constants.wrist_min_rotation
+        self.angle_step = config.wrist_ff_angle_step
+        self.height_step = config.wrist_ff_height_step
+        angles = [
+            self.angle_start + self.angle_step * i
+            for i in range(math.ceil((constants.wrist_max_rotation - self.angle_start) / self.angle_step) + 1)
+        ]
+        heights = [
+            self.height_step * i for i in range(math.ceil(constants.elevator_max_length / self.height_step) + 1)
+        ]
+        # plain lists, a lookup a loop is faster without numpy
+        self.table = [
+            [
+                config.wrist_max_ff * math.cos(angle - config.wrist_ff_offset)
+                * (1 + config.wrist_ff_height_gain * height)
+                for height in heights
+            ]
+            for angle in angles
+        ]
+        self.kV = constants.wrist_gear_ratio / DCMotor.NEO(1).Kv
+
+    @staticmethod
+    def _locate(value: float, start: float, step: float, count: int) -> tuple[int, float]:
+        position = min(max((value - start) / step, 0), count - 1)
+        index = min(int(position), count - 2)
+        return index, position - index
+
+    def gravity(self, angle: radians, height: meters = 0) -> float:
+        """
+        Bilinear lookup of the gravity feed forward, clamped to the table.
+        """
+        i, di = self._locate(angle, self.angle_start, self.angle_step, len(self.table))
+        j, dj = self._locate(height, 0, self.height_step, len(self.table[0]))
+        low = self.table[i][j] + (self.table[i][j + 1] - self.table[i][j]) * dj
+        high = self.table[i + 1][j] + (self.table[i + 1][j + 1] - self.table[i + 1][j]) * dj
+        return low + (high - low) * di
+
+    def calculate(self, angle: radians, velocity: radians_per_second, height: meters = 0) -> float:
+        return self.gravity(angle, height) + self.kV * velocity
+
 
 class Wrist(Subsystem):
     def __init__(self):
@@ -25,14 +80,22 @@ class Wrist(Subsystem):
         self.wrist_zeroed: bool = False
         self.rotation_disabled: bool = False
         self.feed_disabled: bool = False
-        self.beam_break_first: DigitalInput = None
-        self.beam_break_second: DigitalInput = None   
+        self.beam_break_first = BeamBreak(config.feeder_beam_break_first_channel, 'first')
+        self.beam_break_second = BeamBreak(config.feeder_beam_break_second_channel, 'second')
         self.disable_rotation: bool = False
         self.locked: bool = False
         self.ready_to_shoot: bool = False
         self.target_angle: radians = 0
         self.wrist_moving: bool = False
 
+        self.feed_forward = WristFeedForward()
+        # aim_wrist follows this toward the aim angle instead of jumping to it
+        self.profile = TrapezoidProfile(
+            TrapezoidProfile.Constraints(config.wrist_max_velocity, config.wrist_max_acceleration)
+        )
+        self.setpoint = TrapezoidProfile.State(0, 0)
+        self.time_to_settle: seconds = 0
+
     def init(self):
         self.wrist_motor.init()
         self.table = ntcore.NetworkTableInstance.getDefault().getTable('wrist')
@@ -41,11 +104,20 @@ class Wrist(Subsystem):
         self.wrist_abs_encoder = self.wrist_motor.abs_encoder()
         self.feed_motor.init()
         self.feed_motor.optimize_sparkmax_no_position()
-        self.beam_break_first = DigitalInput(config.feeder_beam_break_first_channel)
-        self.beam_break_second = DigitalInput(config.feeder_beam_break_second_channel)
+        self.beam_break_first.init()
+        self.beam_break_second.init()
+        if config.beam_break_interrupts:
+            self.beam_break_first.start()
+            self.beam_break_second.start()
         self.table.getSubTable('wrist motor').putNumber('P', config.WRIST_AIM_CONFIG.k_P)
         self.table.getSubTable('wrist motor').putNumber('I', config.WRIST_AIM_CONFIG.k_I)
         self.table.getSubTable('wrist motor').putNumber('D', config.WRIST_AIM_CONFIG.k_D)
+
+        SignalLogger.double('wrist/angle', self.get_wrist_angle)
+        SignalLogger.double('wrist/target angle', lambda: self.target_angle)
+        SignalLogger.double('wrist/current', lambda: self.wrist_motor.motor.getOutputCurrent())
+        SignalLogger.boolean('wrist/note detected', self.note_detected)
+        SignalLogger.double('wrist/time to settle', lambda: self.time_to_settle)
         
         
         
@@ -97,10 +169,11 @@ class Wrist(Subsystem):
             return angle / (2 * math.pi)
 
     # wrist methods
-    def set_wrist_angle(self, angle: radians, slot=0):
+    def set_wrist_angle(self, angle: radians, slot=0, height: meters = 0):
         """
         Sets the wrist angle to the given position
         :param pos: The position to set the wrist to(float)
+        :param height: Elevator height, for the feed forward
         :return: None
         """
         
@@ -112,9 +185,7 @@ class Wrist(Subsystem):
         angle = self.limit_angle(angle)
         self.target_angle = angle
 
-        current_angle = self.get_wrist_angle()
-
-        ff = config.wrist_max_ff * math.cos(angle - config.wrist_ff_offset)
+        ff = self.feed_forward.gravity(angle, height)
 
         if not self.rotation_disabled:
             self.wrist_motor.set_target_position(
@@ -122,11 +193,20 @@ class Wrist(Subsystem):
                 ff,# if angle < current_angle else 0,
                 slot=slot
             )
-            
-    def aim_wrist(self, angle: radians):
+
+    def reset_profile(self):
         """
-        Sets the wrist angle to the given position
+        Starts the aim profile from where the wrist is and how fast it is moving.
+        """
+        # the Spark reports rpm, so get_wrist_velocity is 60 times radians per second
+        self.setpoint = TrapezoidProfile.State(self.get_wrist_angle(), self.get_wrist_velocity() / 60)
+        self.time_to_settle = 0
+
+    def aim_wrist(self, angle: radians, height: meters = 0):
+        """
+        Moves the wrist one loop along a trapezoid profile toward the given angle, which can move every loop
         :param pos: The position to set the wrist to(float)
+        :param height: Elevator height, for the feed forward
         :return: None
         """
         
@@ -137,13 +217,17 @@ class Wrist(Subsystem):
         
         angle = self.limit_angle(angle)
         self.target_angle = angle
-        
-        ff = config.wrist_max_ff * math.cos(angle - config.wrist_ff_offset)
+
+        self.setpoint = self.profile.calculate(config.period, self.setpoint, TrapezoidProfile.State(angle, 0))
+        # from the last setpoint, so less the loop just taken
+        self.time_to_settle = max(self.profile.totalTime() - config.period, 0)
+
+        ff = self.feed_forward.calculate(self.setpoint.position, self.setpoint.velocity, height)
 
         if not self.rotation_disabled:
             self.wrist_motor.set_target_position(
-                (angle / (pi * 2)) * constants.wrist_gear_ratio,
-                ff - .2,# if angle < current_angle else 0,
+                (self.setpoint.position / (pi * 2)) * constants.wrist_gear_ratio,
+                ff + config.wrist_aim_ff_offset,
                 slot=1
             )
             
@@ -161,14 +245,22 @@ class Wrist(Subsystem):
         
         # return self.get_wrist_abs_angle()
 
+    def update_note_state(self):
+        """
+        Snapshots both beam breaks, once a loop before anything reads them.
+        """
+        self.beam_break_first.update()
+        self.beam_break_second.update()
+
     def note_detected(self) -> bool:
-        return not self.beam_break_second.get()
+        return self.beam_break_second.blocked
 
     def detect_note_first(self) -> bool:
-        return not self.beam_break_first.get()
+        # a note can pass the first beam break between loops when feeding fast
+        return self.beam_break_first.tripped
     
     def detect_note_second(self) -> bool:
-        return not self.beam_break_second.get()
+        return self.beam_break_second.blocked
     
     def note_in_feeder(self) -> bool:
         return self.detect_note_first() or self.detect_note_second()
@@ -258,13 +350,14 @@ class Wrist(Subsystem):
             self.table.putBoolean('note detected', self.note_detected())
             self.table.putBoolean('wrist zeroed', self.wrist_zeroed)
             self.table.putBoolean('ready to shoot', self.ready_to_shoot)
-            self.table.putBoolean('first beam break', not self.beam_break_first.get())
-            self.table.putBoolean('second beam break', not self.beam_break_second.get())
+            self.table.putBoolean('first beam break', self.beam_break_first.blocked)
+            self.table.putBoolean('second beam break', self.beam_break_second.blocked)
             self.table.putBoolean('rotation disabled', self.rotation_disabled)
             self.table.putBoolean('feed disabled', self.feed_disabled)
             self.table.putBoolean('locked', self.locked)
             self.table.putNumber('target angle', math.degrees(self.target_angle))
             self.table.putNumber('target angle raw', self.radians_to_abs(self.target_angle))
+            self.table.putNumber('time to settle', self.time_to_settle)
             self.table.putBoolean('wrist moving', self.wrist_moving)
             self.table.putNumber('wrist current', self.wrist_motor.motor.getOutputCurrent())
             self.table.putNumber('wrist applied output', self.wrist_motor.motor.getAppliedOutput())
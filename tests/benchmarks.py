@@ -0,0 +1,331 @@
+"""
+Timing benchmarks for the code that runs every robot loop.
+
+Each case times one loop's worth of a hot path against the robot running in simulation, with the
+mechanisms on physics backed sim motors (see physics.py). Every case has a budget, its share of
+config.period, and fails only when it takes longer than its budget. Timings from a saved baseline
+are printed next to them, and cases slower than theirs by more than TOLERANCE of their budget are
+flagged, but a baseline is one machine's timings, so it never fails a case.
+
+Shot trajectory throughput, run_sim one shot at a time against run_sims integrating them all
+together, and flywheel spin up and recovery times for both flywheel control modes are printed after
+the cases. They have no budget, they're for comparing.
+
+Baselines are machine specific, save one on the machine you compare on, before the change being
+measured.
+
+Usage:
+    python -m tests.benchmarks
+    python -m tests.benchmarks --save
+    python -m pytest tests/test_benchmarks.py --benchmark
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import timeit
+from dataclasses import dataclass
+from typing import Callable
+
+from wpimath.geometry import Pose2d, Pose3d, Rotation2d, Rotation3d
+from wpimath.kinematics import ChassisSpeeds, SwerveModulePosition
+
+import numpy as np
+
+import config
+import constants
+import robot_states as states
+from toolkit.motors.sim import FlywheelPlant, SimMotor
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'benchmark_baseline.json')
+TOLERANCE = 0.25  # share of a case's budget it may get slower than its baseline by before it's flagged
+SHOT_SPEED_LOSS = 0.15  # share of the flywheel's speed a note takes with it
+
+
+@dataclass
+class Case:
+    """
+    :param run: Does one loop's worth of the work being timed
+    :param share: Share of config.period the work may take
+    """
+    name: str
+    run: Callable[[], object]
+    share: float
+
+    @property
+    def budget(self) -> float:
+        return self.share * config.period
+
+
+@dataclass
+class Result:
+    name: str
+    seconds: float
+    budget: float
+    baseline: float | None
+
+    @property
+    def passed(self) -> bool:
+        return self.seconds <= self.budget
+
+    @property
+    def regressed(self) -> bool:
+        """
+        Slower than the baseline by more than TOLERANCE of the budget, only meaningful on the baseline's machine.
+        """
+        return self.baseline is not None and self.seconds > self.baseline + TOLERANCE * self.budget
+
+    def format(self) -> str:
+        baseline = f'{self.baseline * 1e6:>10.1f}us' if self.baseline is not None else f'{"-":>12}'
+        status = 'ok' if self.passed else 'SLOW'
+        if self.regressed:
+            status += ', slower than baseline'
+        return f'{self.name:<36}{self.seconds * 1e6:>10.1f}us{baseline}{self.budget * 1e6:>10.1f}us  {status}'
+
+
+class SimRobot:
+    """
+    The robot after robotInit in simulation, with its mechanisms on sim motors.
+
+    The LED Notifier isn't started, the LED case calls ALeds.cycle itself, and neither are the shot detector
+    and beam break threads.
+    """
+
+    def __init__(self):
+        import physics
+        import robot
+        from robot_systems import Field, LEDs, Robot, Sensors
+
+        SimMotor.clear()
+        physics.attach_plants()
+        # the LED case calls cycle itself, and a running Notifier keeps the process from exiting
+        LEDs.leds.start_scheduler = lambda *args, **kwargs: None
+        Sensors.shot_detector.start = lambda: None
+        for beam_break in (Robot.wrist.beam_break_first, Robot.wrist.beam_break_second):
+            beam_break.start = lambda: None
+        self.robot = robot._Robot()
+        self.robot.robotInit()
+        self.Field, self.LEDs, self.Robot, self.Sensors = Field, LEDs, Robot, Sensors
+
+        # somewhere in range of the speaker with the flywheel spun up, so the shot calculations do real work
+        Robot.drivetrain.reset_odometry(Pose2d(3, 5.5, Rotation2d(math.pi)))
+        Robot.flywheel.set_velocity_linear(config.v0_flywheel_maximum, 0)
+        for _ in range(round(2 / config.period)):
+            SimMotor.update_all(config.period)
+
+    def close(self):
+        del self.LEDs.leds.start_scheduler
+        del self.Sensors.shot_detector.start
+        for beam_break in (self.Robot.wrist.beam_break_first, self.Robot.wrist.beam_break_second):
+            del beam_break.start
+        SimMotor.clear()
+
+
+class _Vision:
+    """
+    Two limelight frames a little off the odometry pose every loop, captured 30ms ago.
+    """
+
+    def __init__(self, odometry):
+        self.odometry = odometry
+
+    def get_estimated_robot_pose(self):
+        pose = self.odometry.drivetrain.odometry_estimator.getEstimatedPosition()
+        t = self.odometry.get_time()
+        heading = pose.rotation().radians()
+        return [
+            (Pose3d(pose.X() + 0.1, pose.Y() - 0.05, 0, Rotation3d(0, 0, heading)), t - 0.03, 2, 2.5, 0.4, 7, False,
+             'limelight-f'),
+            (Pose3d(pose.X() + 0.08, pose.Y(), 0, Rotation3d(0, 0, heading)), t - 0.03, 1, 1.5, 0.3, 8, True,
+             'limelight-b'),
+        ]
+
+
+def odometry_case() -> Callable[[], Pose2d]:
+    """
+    FieldOdometry.update on a replay drivetrain moving forward 1.25 m/s, with vision every loop.
+    """
+    from sensors.field_odometry import FieldOdometry
+    from sensors.odometry_replay import ReplayDrivetrain
+
+    drivetrain = ReplayDrivetrain()
+    odometry = FieldOdometry(drivetrain, None, constants.field_width, constants.field_length)
+    odometry.vision_estimator = _Vision(odometry)
+    odometry.replay = True
+    drivetrain.reset_odometry(Pose2d(3, 4, 0))
+    loop = [0]
+    odometry.get_time = lambda: loop[0] * config.period
+
+    def update():
+        loop[0] += 1
+        distance = loop[0] * 1.25 * config.period
+        drivetrain.node_positions = tuple(SwerveModulePosition(distance, Rotation2d(0)) for _ in range(4))
+        drivetrain.chassis_speeds = ChassisSpeeds(1.25, 0, 0)
+        return odometry.update()
+
+    return update
+
+
+def cases(sim: SimRobot) -> list[Case]:
+    from autonomous.routines.FOUR_NOTE_MIDDLE.coords import get_second_note
+    from command.autonomous.trajectory import CustomTrajectory
+
+    calculations = sim.Field.calculations
+    leds = sim.LEDs.leds
+    drivetrain = sim.Robot.drivetrain
+
+    def update_shooter(air: bool):
+        def run():
+            calculations.use_air_resistance = air
+            return calculations.update_shooter()
+        return run
+
+    leds.set_LED(config.LEDType.KRainbow(), 1, 5)
+
+    def leds_cycle():
+        # a tick later every call, so every call renders and writes a new rainbow frame
+        leds.get_tick()
+        leds.start_time -= config.period
+        leds.cycle()
+
+    trajectory = CustomTrajectory(
+        get_second_note[0], get_second_note[1], get_second_note[2],
+        config.drivetrain_max_vel_auto, config.drivetrain_max_accel_auto,
+    )
+
+    return [
+        Case('TrajectoryCalculator.get_theta', calculations.get_theta, 0.005),
+        Case('update_shooter, no air resistance', update_shooter(False), 0.01),
+        Case('update_shooter, air resistance', update_shooter(True), 0.5),
+        Case('FieldOdometry.update with vision', odometry_case(), 0.05),
+        Case('set_robot_centric', lambda: drivetrain.set_robot_centric((1.5, 0.5), 1), 0.02),
+        Case('ALeds.cycle', leds_cycle, 0.02),
+        Case('POI.setNTValues', sim.Field.POI.setNTValues, 0.05),
+        Case('CustomTrajectory.generate', trajectory.generate, 0.25),
+        Case('robotPeriodic', sim.robot.robotPeriodic, 0.5),
+    ]
+
+
+def time_case(case: Case, number: int, repeat: int) -> float:
+    """
+    Seconds per call, the median of repeat runs of number calls.
+    """
+    case.run()  # first call outside the timing, it can build caches
+    return statistics.median(timeit.repeat(case.run, number=number, repeat=repeat)) / number
+
+
+def load_baseline(path: str = BASELINE_PATH) -> dict[str, float]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_baseline(results: list[Result], path: str = BASELINE_PATH):
+    with open(path, 'w') as file:
+        json.dump({result.name: result.seconds for result in results}, file, indent=2)
+        file.write('\n')
+
+
+def run(sim: SimRobot, number: int = 50, repeat: int = 5, path: str = BASELINE_PATH) -> list[Result]:
+    baseline = load_baseline(path)
+    return [
+        Result(case.name, time_case(case, number, repeat), case.budget, baseline.get(case.name))
+        for case in cases(sim)
+    ]
+
+
+def throughput(sim: SimRobot, count: int = 1000) -> dict[str, float]:
+    """
+    Shot trajectories integrated per second, one at a time and batched.
+    """
+    calculations = sim.Field.calculations
+    angles = np.linspace(math.radians(10), math.radians(60), count)
+
+    start = timeit.default_timer()
+    for angle in angles:
+        calculations.run_sim(angle)
+    single = timeit.default_timer() - start
+
+    start = timeit.default_timer()
+    calculations.run_sims(angles)
+    batched = timeit.default_timer() - start
+
+    return {'run_sim': count / single, 'run_sims': count / batched}
+
+
+def flywheel_response(state_space: bool, speed: float = 20, timeout: float = 3) -> tuple[float, float]:
+    """
+    Simulated seconds for the flywheel to get from rest to within states.flywheel_tolerance of speed, and
+    to get back within it after a shot takes SHOT_SPEED_LOSS of its speed. nan if it doesn't in timeout.
+
+    :param state_space: Flywheel.state_space, the LQR instead of the Talon velocity loop
+    :param speed: Target in meters per second
+    """
+    from subsystem import Flywheel
+    from wpimath.system.plant import DCMotor
+
+    flywheel = Flywheel()
+    sims = [
+        motor.attach_sim(FlywheelPlant(DCMotor.falcon500(1), flywheel.total_MOI, constants.flywheel_gear_ratio))
+        for motor in (flywheel.motor_1, flywheel.motor_2)
+    ]
+    flywheel.set_state_space(state_space)
+    flywheel.set_velocity_linear(speed)
+
+    def settle() -> float:
+        for loop in range(1, round(timeout / config.period) + 1):
+            flywheel.periodic()
+            for sim in sims:
+                sim.update(config.period)
+            if flywheel.within_velocity_linear(speed, states.flywheel_tolerance):
+                return loop * config.period
+        return math.nan
+
+    try:
+        spin_up = settle()
+        for sim in sims:
+            sim.plant.velocity *= 1 - SHOT_SPEED_LOSS
+        return spin_up, settle()
+    finally:
+        for sim in sims:
+            SimMotor.instances.remove(sim)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Time the robot's per loop hot paths against their budgets")
+    parser.add_argument("--number", type=int, default=50, help="calls per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per case, the median is kept")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="save these timings as the new baseline")
+    args = parser.parse_args(argv)
+
+    sim = SimRobot()
+    try:
+        results = run(sim, args.number, args.repeat, args.baseline)
+        rates = throughput(sim)
+    finally:
+        sim.close()
+
+    print(f"{'case':<36}{'time':>12}{'baseline':>12}{'budget':>12}")
+    for result in results:
+        print(result.format())
+    print()
+    for name, rate in rates.items():
+        print(f'{name:<36}{rate:>10.0f} trajectories/s')
+    print()
+    print(f"{'flywheel':<36}{'spin up':>12}{'recovery':>12}")
+    for name, state_space in (('Talon velocity loop', False), ('state space', True)):
+        spin_up, recovery = flywheel_response(state_space)
+        print(f'{name:<36}{spin_up:>11.2f}s{recovery:>11.2f}s')
+
+    if args.save:
+        save_baseline(results, args.baseline)
+        print(f'saved {args.baseline}')
+    elif not all(result.passed for result in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,52 @@
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--check-units", action="store_true",
+        help="check the unit annotations of tests.unit_checks.CHECKED_FUNCTIONS on every call made while testing"
+    )
+    parser.addoption(
+        "--benchmark", action="store_true",
+        help="run the tests marked benchmark, which time the robot's hot paths against tests/benchmark_baseline.json"
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: times a hot path against its budget, only runs with --benchmark")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="benchmarks only run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def unit_checker():
+    # imported here so only the tests that check units load the subsystems
+    from tests.unit_checks import wrap_checked_functions
+
+    checker = wrap_checked_functions()
+    yield checker
+    checker.unwrap()
+
+
+@pytest.fixture(autouse=True, scope="session")
+def check_units(request):
+    if not request.config.getoption("--check-units"):
+        yield None
+        return
+    from tests.unit_checks import wrap_checked_functions
+
+    checker = wrap_checked_functions()
+    yield checker
+    checker.unwrap()
+
+
 # import pytest
 # import wpilib
 # from unittest import mock
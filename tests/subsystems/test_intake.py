@@ -60,8 +60,14 @@ def test_set_outer_velocity(test_input, intake:Intake):
 
 def test_detect_note(intake: Intake):
     intake.distance_sensor.getVoltage.return_value = 1
-    intake.detect_note()
+    intake.update_note_state()
     intake.distance_sensor.getVoltage.assert_called()
+    assert intake.detect_note() == (1 > config.intake_distance_sensor_threshold)
+
+    # read once a loop
+    intake.distance_sensor.getVoltage.reset_mock()
+    intake.detect_note()
+    intake.distance_sensor.getVoltage.assert_not_called()
 
 
 def test_roll_in(intake: Intake):
@@ -123,3 +123,53 @@ def test_feed_out(test_input, wrist: Wrist):
         wrist.feed_motor.set_target_voltage.assert_not_called()
     else:
         wrist.feed_motor.set_target_voltage.assert_called_with(-config.feeder_voltage_trap)
+
+
+@pytest.mark.parametrize("angle", [constants.wrist_min_rotation, -0.3, 0.123, 0.5, constants.wrist_max_rotation])
+def test_feed_forward_table(angle, wrist: Wrist):
+    expected = config.wrist_max_ff * math.cos(angle - config.wrist_ff_offset)
+    assert wrist.feed_forward.gravity(angle) == pytest.approx(expected, abs=1e-4)
+    assert wrist.feed_forward.gravity(angle, constants.elevator_max_length / 3) == pytest.approx(
+        expected * (1 + config.wrist_ff_height_gain * constants.elevator_max_length / 3), abs=1e-4
+    )
+    assert wrist.feed_forward.calculate(angle, 2) == pytest.approx(
+        wrist.feed_forward.gravity(angle) + 2 * wrist.feed_forward.kV
+    )
+
+
+def test_feed_forward_table_clamps(wrist: Wrist):
+    assert wrist.feed_forward.gravity(constants.wrist_max_rotation + 1) == pytest.approx(
+        wrist.feed_forward.gravity(constants.wrist_max_rotation)
+    )
+    assert wrist.feed_forward.gravity(0, -1) == pytest.approx(wrist.feed_forward.gravity(0, 0))
+
+
+def test_aim_wrist_follows_profile(wrist: Wrist):
+    wrist.wrist_motor.get_sensor_position.return_value = 0
+    wrist.wrist_motor.get_sensor_velocity.return_value = 0
+    wrist.reset_profile()
+
+    target = math.radians(40)
+    wrist.aim_wrist(target)
+    # one loop of accelerating from rest, not a jump to the target
+    step = config.wrist_max_acceleration * config.period
+    assert wrist.setpoint.velocity == pytest.approx(step)
+    assert wrist.setpoint.position == pytest.approx(step * config.period / 2)
+    position, ff = wrist.wrist_motor.set_target_position.call_args.args
+    assert position == pytest.approx(wrist.setpoint.position / (2 * pi) * constants.wrist_gear_ratio)
+    assert ff == pytest.approx(
+        wrist.feed_forward.calculate(wrist.setpoint.position, wrist.setpoint.velocity) + config.wrist_aim_ff_offset
+    )
+    assert wrist.wrist_motor.set_target_position.call_args.kwargs == {'slot': 1}
+
+    settle = wrist.time_to_settle
+    assert settle > 0
+    loops = 1
+    while wrist.time_to_settle > 0:
+        last = wrist.time_to_settle
+        wrist.aim_wrist(target)
+        assert wrist.time_to_settle == pytest.approx(max(last - config.period, 0), abs=1e-6)
+        loops += 1
+    assert loops * config.period == pytest.approx(settle + config.period, abs=config.period)
+    assert wrist.setpoint.position == pytest.approx(target)
+    assert wrist.setpoint.velocity == pytest.approx(0)
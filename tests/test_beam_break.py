@@ -0,0 +1,148 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+import wpilib
+from wpilib.simulation import DIOSim
+
+import config
+from command import FeedIn
+from subsystem import Wrist
+from utils.beam_break import BeamBreak
+
+
+def settle():
+    # unlike the FPGA, the sim only sees edges while the thread is waiting on the interrupt
+    time.sleep(0.05)
+
+
+def wait_for(condition, timeout: float = 1) -> bool:
+    end = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > end:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+@pytest.fixture()
+def beam_breaks():
+    created: list[BeamBreak] = []
+
+    def make(channel: int) -> tuple[BeamBreak, DIOSim]:
+        beam_break = BeamBreak(channel, str(channel))
+        beam_break.init()
+        sim = DIOSim(beam_break.input)
+        sim.setValue(True)
+        beam_break.update()
+        created.append(beam_break)
+        return beam_break, sim
+
+    yield make
+    for beam_break in created:
+        beam_break.stop()
+
+
+def test_latches_edges_between_snapshots(beam_breaks):
+    beam_break, sim = beam_breaks(7)
+    beam_break.start()
+    settle()
+
+    before = wpilib.Timer.getFPGATimestamp()
+    sim.setValue(False)
+    assert wait_for(lambda: beam_break.count == 1)
+    settle()
+    sim.setValue(True)
+    assert wait_for(lambda: beam_break.count == 2)
+
+    # the note came and went within a loop
+    assert not beam_break.blocked
+    assert not beam_break.update()
+    assert beam_break.tripped
+    assert before <= beam_break.blocked_at <= beam_break.cleared_at
+    assert [blocked for _, blocked in beam_break.edges] == [True, False]
+
+    # and only counts for that loop
+    beam_break.update()
+    assert not beam_break.tripped
+
+
+def test_snapshot_holds_for_the_loop(beam_breaks):
+    beam_break, sim = beam_breaks(6)
+    sim.setValue(False)
+    assert not beam_break.blocked
+    assert beam_break.update()
+    sim.setValue(True)
+    assert beam_break.blocked
+
+
+def test_feed_in_stops_on_interrupt(beam_breaks):
+    wrist = Wrist()
+    wrist.feed_motor = MagicMock()
+    wrist.beam_break_first, first = beam_breaks(8)
+    wrist.beam_break_second, second = beam_breaks(9)
+    wrist.beam_break_second.start()
+    settle()
+
+    feed = FeedIn(wrist)
+    feed.initialize()
+    feed.execute()
+    wrist.feed_motor.set_target_voltage.assert_called_with(config.feeder_voltage_feed)
+
+    # no snapshot taken, the interrupt stops the feeder
+    second.setValue(False)
+    assert wait_for(lambda: feed.isFinished())
+    wrist.feed_motor.set_target_voltage.assert_called_with(0)
+    assert not wrist.detect_note_second()
+
+    # a loop that snapshotted before the edge doesn't start it again
+    feed.execute()
+    wrist.feed_motor.set_target_voltage.assert_called_with(0)
+
+    feed.end(False)
+    assert wrist.beam_break_second.on_blocked == []
+    assert wrist.note_staged
+
+
+def test_feed_in_stop_wins_a_race_with_the_loop():
+    wrist = Wrist()
+    wrist.feed_motor = MagicMock()
+    feed = FeedIn(wrist)
+    feed.initialize()
+
+    # the note reaches the second beam break while the loop is writing the crawl voltage
+    writes, interrupt = [], threading.Thread(target=feed.stop_on_note, args=(0,))
+
+    def write(voltage):
+        if voltage and not interrupt.is_alive() and not writes:
+            interrupt.start()
+            time.sleep(0.05)
+        writes.append(voltage)
+
+    wrist.feed_motor.set_target_voltage.side_effect = write
+    feed.execute()
+    interrupt.join()
+    assert writes == [config.feeder_voltage_feed, 0]
+    feed.end(False)
+
+
+def test_missed_edge_keeps_direction(beam_breaks):
+    beam_break, sim = beam_breaks(5)
+    blocked_at = []
+    beam_break.on_blocked.append(blocked_at.append)
+
+    def edge(value: bool):
+        waiter = threading.Thread(target=beam_break.wait, args=(1,))
+        waiter.start()
+        settle()
+        sim.setValue(value)
+        waiter.join()
+
+    edge(False)
+    # nothing waiting, so the beam clearing is missed
+    sim.setValue(True)
+    edge(False)
+
+    assert [blocked for _, blocked in beam_break.edges] == [True, True]
+    assert len(blocked_at) == 2
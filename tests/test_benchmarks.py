@@ -0,0 +1,71 @@
+import pytest
+from pytest import MonkeyPatch
+
+import config
+from tests import benchmarks
+from tests.benchmarks import Case, Result
+
+
+@pytest.fixture(scope="module")
+def sim() -> benchmarks.SimRobot:
+    sim = benchmarks.SimRobot()
+    try:
+        yield sim
+    finally:
+        sim.close()
+
+
+@pytest.fixture(scope="module")
+def results(sim: benchmarks.SimRobot) -> list[Result]:
+    return benchmarks.run(sim)
+
+
+def test_budget_follows_period(monkeypatch: MonkeyPatch):
+    case = Case('case', lambda: None, 0.5)
+    monkeypatch.setattr(config, "period", 0.02)
+    assert case.budget == pytest.approx(0.01)
+    monkeypatch.setattr(config, "period", 0.04)
+    assert case.budget == pytest.approx(0.02)
+
+
+def test_only_the_budget_fails():
+    assert Result('case', 0.009, 0.01, None).passed
+    assert not Result('case', 0.011, 0.01, None).passed
+
+    # slower than the baseline by more than the tolerance is flagged, but under budget still passes
+    result = Result('case', 0.005, 0.01, 0.001)
+    assert result.regressed
+    assert result.passed
+    assert not Result('case', 0.001 + benchmarks.TOLERANCE * 0.01, 0.01, 0.001).regressed
+
+    # a fast baseline doesn't save a case over budget
+    result = Result('case', 0.0105, 0.01, 0.0104)
+    assert not result.regressed
+    assert not result.passed
+
+
+def test_baseline_round_trip(tmp_path):
+    path = str(tmp_path / "baseline.json")
+    assert benchmarks.load_baseline(path) == {}
+    benchmarks.save_baseline([Result('a', 0.001, 0.01, None), Result('b', 0.002, 0.01, 0.003)], path)
+    assert benchmarks.load_baseline(path) == {'a': 0.001, 'b': 0.002}
+
+
+@pytest.mark.benchmark
+def test_hot_paths(results: list[Result]):
+    assert len(results) == 9
+    slow = [result.format() for result in results if not result.passed]
+    assert not slow, '\n'.join(slow)
+
+
+@pytest.mark.benchmark
+def test_batched_trajectories_are_faster(sim: benchmarks.SimRobot):
+    rates = benchmarks.throughput(sim, 200)
+    assert rates['run_sims'] > rates['run_sim']
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("state_space", [False, True])
+def test_flywheel_response(state_space: bool):
+    spin_up, recovery = benchmarks.flywheel_response(state_space)
+    assert 0 < recovery < spin_up < 2
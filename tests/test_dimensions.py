@@ -0,0 +1,76 @@
+import math
+
+import pytest
+
+import constants
+from subsystem import Elevator, Flywheel
+from tests.unit_checks import CHECKED_FUNCTIONS
+from toolkit.utils import toolkit_math
+from units.dimensions import (
+    DIMENSIONLESS, LENGTH, TIME, DimensionChecker, DimensionError, Quantity, function_annotations, module_annotations
+)
+
+
+def test_annotations_read_from_source():
+    assert function_annotations(Flywheel.linear_velocity_to_angular_velocity) == (
+        {'linear_velocity': 'meters_per_second'}, 'radians_per_second'
+    )
+    assert function_annotations(toolkit_math.ft_to_m) == ({'ft': 'feet'}, 'meters')
+    assert module_annotations(constants)['elevator_driver_gear_circumference'] == 'meters'
+
+
+def test_quantity():
+    length, time = Quantity(2, LENGTH), Quantity(4, TIME)
+    speed = length / time
+    assert speed.value == 0.5
+    assert speed.dimension == (1, -1, 0)
+    assert (length * length / length + 1 * length).dimension == LENGTH
+    assert (length / length).dimension == DIMENSIONLESS
+    assert math.isclose(math.cos(length / length), math.cos(1))
+    # zero works with any dimension, so comparisons like `length < 0` check out
+    assert length > 0
+
+    with pytest.raises(DimensionError):
+        length + time
+    with pytest.raises(DimensionError):
+        length < time
+    with pytest.raises(DimensionError):
+        math.cos(length)
+
+
+@pytest.mark.parametrize("owner, name", CHECKED_FUNCTIONS)
+def test_checked_functions(owner, name):
+    checker = DimensionChecker(modules=[constants, toolkit_math])
+    low_gear = {'low_gear': True} if 'talon' in name else {}
+    checker.verify(owner, name, **low_gear)
+    assert checker.checked == 20
+
+
+def test_wrapped_calls_are_checked(unit_checker):
+    # wrapping doesn't change the results, or make static methods need an instance
+    assert Elevator.length_to_rotations(1.0) == pytest.approx(
+        constants.elevator_gear_ratio / constants.elevator_driver_gear_circumference
+    )
+    assert Flywheel.linear_velocity_to_angular_velocity(10) == pytest.approx(10 / constants.flywheel_radius_outer)
+    assert toolkit_math.ft_to_m(1) == pytest.approx(0.3048)
+    assert unit_checker.checked == 3
+
+    # the constants are only tagged while checking
+    assert type(constants.elevator_driver_gear_circumference) is float
+
+
+def test_wrong_units_caught():
+    class Mistakes:
+        @staticmethod
+        def adds_time(length: 'meters', time: 'seconds') -> 'meters':
+            return length + time
+
+        @staticmethod
+        def wrong_return(linear_velocity: 'meters_per_second') -> 'radians_per_second':
+            return linear_velocity * constants.flywheel_radius_outer
+
+    checker = DimensionChecker(modules=[constants])
+    with pytest.raises(DimensionError, match='m and s'):
+        checker.verify(Mistakes, 'adds_time')
+    with pytest.raises(DimensionError, match='annotated radians_per_second'):
+        checker.verify(Mistakes, 'wrong_return')
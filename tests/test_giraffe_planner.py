@@ -0,0 +1,124 @@
+import math
+
+import pytest
+from wpimath.system.plant import DCMotor
+
+import config
+import constants
+from command import SetGiraffe
+from subsystem import Elevator, Wrist
+from toolkit.motors.sim import ArmPlant, ElevatorPlant, SimMotor
+from utils.giraffe_planner import GiraffePlanner
+
+START = (0, math.radians(50))
+GOAL = (constants.elevator_max_length, math.radians(-20))
+# in the way of both moving at once from START to GOAL
+BOX = ((0.1, 0.3), (math.radians(-10), math.radians(30)))
+
+
+class Clock:
+    """
+    Stands in for SetGiraffe's wpilib.Timer.
+    """
+
+    def __init__(self):
+        self.time = 0.0
+
+    def restart(self):
+        self.time = 0.0
+
+    def get(self) -> float:
+        return self.time
+
+
+def samples(plan, dt=0.005):
+    return [plan.sample(i * dt) for i in range(math.ceil(plan.duration / dt) + 1)]
+
+
+def test_each_axis_at_its_limits():
+    plan = GiraffePlanner([]).plan(*START, *GOAL)
+    assert plan.elevator_delay == plan.wrist_delay == 0
+    assert plan.duration == pytest.approx(max(plan.elevator_time, plan.wrist_time))
+    assert plan.sample(0) == pytest.approx(START)
+    assert plan.sample(plan.duration) == pytest.approx(GOAL)
+
+    # elevator: accelerate to the velocity limit, cruise and decelerate
+    distance = GOAL[0] - START[0]
+    cruise = distance / config.elevator_max_velocity - config.elevator_max_velocity / config.elevator_max_acceleration
+    assert plan.elevator_time == pytest.approx(
+        cruise + 2 * config.elevator_max_velocity / config.elevator_max_acceleration
+    )
+
+    heights, angles = zip(*samples(plan))
+    dt = 0.005
+    assert max(abs(b - a) for a, b in zip(heights, heights[1:])) / dt <= config.elevator_max_velocity + 1e-6
+    assert max(abs(b - a) for a, b in zip(angles, angles[1:])) / dt <= config.wrist_max_velocity + 1e-6
+
+
+def test_keep_out():
+    free = GiraffePlanner([]).plan(*START, *GOAL)
+    assert any(GiraffePlanner._inside(BOX, *point) for point in samples(free))
+
+    plan = GiraffePlanner([BOX]).plan(*START, *GOAL)
+    assert plan.elevator_delay > 0 or plan.wrist_delay > 0
+    assert not any(GiraffePlanner._inside(BOX, *point) for point in samples(plan))
+    assert plan.sample(plan.duration) == pytest.approx(GOAL)
+    # only as much later as it has to be, short of one axis after the other
+    assert free.duration < plan.duration < free.elevator_time + free.wrist_time
+
+
+def test_no_way_around():
+    # a wall across every height
+    wall = ((-1, 1), (math.radians(0), math.radians(10)))
+    assert GiraffePlanner([wall]).plan(*START, *GOAL) is None
+    # the goal inside it is still reachable
+    assert GiraffePlanner([wall]).plan(*START, 0.2, math.radians(5)) is not None
+
+
+def test_cache():
+    planner = GiraffePlanner([])
+    idle = (config.Giraffe.kIdle.height, config.Giraffe.kIdle.wrist_angle)
+    amp = (config.Giraffe.kAmp.height, config.Giraffe.kAmp.wrist_angle)
+    cached = len(planner.plans)
+    assert cached > 0
+
+    plan = planner.plan(*idle, *amp)
+    assert len(planner.plans) == cached
+    # resting close to idle
+    assert planner.plan(idle[0] + 0.005, idle[1] - 0.005, *amp) is plan
+    assert planner.plan(idle[0] + 0.1, idle[1], *amp) is not plan
+
+
+def test_set_giraffe_follows_plan():
+    elevator, wrist = Elevator(), Wrist()
+    elevator.motor_extend.attach_sim(ElevatorPlant(
+        DCMotor.NEO(2), 6, constants.elevator_driver_gear_circumference / (2 * math.pi),
+        constants.elevator_gear_ratio, max_height=constants.elevator_max_length,
+    ))
+    wrist.wrist_motor.attach_sim(ArmPlant(
+        DCMotor.NEO(1), constants.wrist_gear_ratio, 0.3, 3,
+        constants.wrist_min_rotation, constants.wrist_max_rotation,
+    ))
+
+    try:
+        plan = GiraffePlanner([]).plan(elevator.get_length(), wrist.get_wrist_angle(), *GOAL)
+        command = SetGiraffe(elevator, wrist, plan)
+        # on loop time, the sim's timing belongs to whoever runs the tests
+        command.timer = Clock()
+        command.initialize()
+        assert elevator.elevator_moving and wrist.wrist_moving
+
+        loops = 0
+        while not command.isFinished() and loops < round((plan.duration + 2) / config.period):
+            SimMotor.update_all(config.period)
+            command.timer.time += config.period
+            command.execute()
+            loops += 1
+        assert command.isFinished()
+        command.end(False)
+        assert not elevator.elevator_moving and not wrist.wrist_moving
+        assert elevator.get_length() == pytest.approx(GOAL[0], abs=0.01)
+        # done within a few loops of the plan
+        assert loops * config.period < plan.duration + 0.3
+    finally:
+        SimMotor.clear()
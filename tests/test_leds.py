@@ -0,0 +1,214 @@
+import math
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from pytest import MonkeyPatch
+from wpilib import AddressableLED
+
+import config
+import sensors.leds
+from sensors.leds import ALeds, Overlay, Progress, Segment
+
+
+@pytest.fixture
+def clock(monkeypatch: MonkeyPatch):
+    clock = MagicMock(return_value=100.0)
+    monkeypatch.setattr(sensors.leds.Timer, "getFPGATimestamp", clock)
+    return clock
+
+
+@pytest.fixture
+def leds(clock) -> ALeds:
+    leds = ALeds(0, 10)
+    leds.m_led = MagicMock()
+    leds.m_led.LEDData = AddressableLED.LEDData
+    leds.led_data = leds.get_led_data()
+    leds.last_frame = np.zeros((leds.size, 3), dtype=np.uint8)
+    return leds
+
+
+def colors(leds: ALeds) -> list[tuple[int, int, int]]:
+    return [(led.r, led.g, led.b) for led in leds.led_data]
+
+
+def cycle(leds: ALeds, clock: MagicMock, ticks: int = 1):
+    """
+    Renders the current frame, then moves the clock forward.
+    """
+    leds.cycle()
+    clock.return_value += ticks * config.period
+
+
+def test_static_writes_once(leds: ALeds):
+    for _ in range(5):
+        leds.set_LED(config.LEDType.KStatic(0, 0, 255), 1, 5)
+        leds.cycle()
+
+    assert leds.m_led.setData.call_count == 1
+    assert colors(leds) == [(0, 0, 255)] * leds.size
+
+
+def test_set_led_keeps_last_distinct_mode(leds: ALeds):
+    leds.set_LED(config.LEDType.KStatic(255, 0, 0), 1, 5)
+    leds.set_LED(config.LEDType.KBlink(0, 255, 0), 1, 2)
+    leds.set_LED(config.LEDType.KBlink(0, 255, 0), 1, 2)
+
+    leds.set_last_current()
+    assert leds.active_mode == config.LEDType.KStatic(255, 0, 0)
+
+
+def test_rainbow_matches_hsv(leds: ALeds, clock):
+    leds.set_LED(config.LEDType.KRainbow(), 1, 7)
+
+    for tick in range(3):
+        cycle(leds, clock)
+        expected = AddressableLED.LEDData()
+        for i in range(leds.size):
+            expected.setHSV(math.floor((tick * 7 + i * 180 / leds.size) % 180), 255, 128)
+            assert colors(leds)[i] == (expected.r, expected.g, expected.b)
+
+    assert leds.m_led.setData.call_count == 3
+
+
+def test_blink(leds: ALeds, clock):
+    leds.set_LED(config.LEDType.KBlink(0, 255, 0), 1, 2)
+
+    lit = []
+    for _ in range(10):
+        cycle(leds, clock)
+        lit.append(colors(leds)[0] == (0, 255, 0))
+
+    # on while index / (2 * speed) <= .5, index runs 0 to 2 * speed
+    assert lit == [True, True, True, False, False] * 2
+    assert leds.m_led.setData.call_count == 4
+
+
+def test_track(leds: ALeds, clock):
+    leds.set_LED(config.LEDType.KTrack(0, 0, 255, 255, 0, 0), 1, 5)
+    cycle(leds, clock, 2)
+    leds.cycle()
+
+    red = [i for i, color in enumerate(colors(leds)) if color == (255, 0, 0)]
+    assert red == [2, 6]
+
+
+@pytest.mark.parametrize("percent, filled", [(0, 0), (0.5, 5), (0.55, 5), (1, 10), (2, 10)])
+def test_ladder(leds: ALeds, percent, filled):
+    leds.set_LED(config.LEDType.KLadder(
+        config.LEDType.KStatic(0, 0, 255), config.LEDType.KStatic(255, 0, 0), percent, 5
+    ), 1, 5)
+    leds.cycle()
+
+    assert colors(leds) == [(255, 0, 0)] * filled + [(0, 0, 255)] * (leds.size - filled)
+
+
+def test_frames_are_cached(leds: ALeds, clock):
+    leds.set_LED(config.LEDType.KRainbow(), 1, 5)
+    for _ in range(50):
+        cycle(leds, clock)
+
+    assert list(leds.frames) == [(2, 5, leds.size)]
+    assert leds.frames[(2, 5, leds.size)].shape == (36, leds.size, 3)
+
+
+def test_animation_follows_time(leds: ALeds, clock):
+    leds.set_LED(config.LEDType.KBlink(0, 255, 0), 1, 2)
+
+    # rendering more often than once a tick doesn't speed the animation up
+    for _ in range(6):
+        cycle(leds, clock, 0.5)
+    assert leds.tick == 2
+    assert colors(leds)[0] == (0, 255, 0)
+
+    # an overrun loop skips ahead instead of slowing it down
+    cycle(leds, clock, 10)
+    cycle(leds, clock)
+    assert leds.tick == 13
+
+
+def test_nothing_rendered_without_mode(leds: ALeds):
+    leds.cycle()
+    leds.m_led.setData.assert_not_called()
+
+
+def test_state_is_one_tuple(leds: ALeds):
+    leds.set_LED(config.LEDType.KRainbow(), 0.5, 3)
+    assert leds.state == (config.LEDType.KRainbow(), 0.5, 3)
+
+    leds.set_LED(config.LEDType.KStatic(1, 2, 3), 1, 5)
+    leds.set_last_current()
+    assert leds.state == (config.LEDType.KRainbow(), 0.5, 3)
+
+
+def test_scheduler(leds: ALeds, monkeypatch: MonkeyPatch):
+    notifier = MagicMock()
+    monkeypatch.setattr(sensors.leds, "Notifier", notifier)
+
+    leds.start_scheduler(25)
+    leds.start_scheduler(25)
+
+    notifier.assert_called_once_with(leds.cycle)
+    notifier.return_value.startPeriodic.assert_called_with(1 / 25)
+
+    leds.stop_scheduler()
+    notifier.return_value.stop.assert_called_once()
+
+
+def test_progress_callable(leds: ALeds, clock):
+    progress = {"value": 0.0}
+    leds.set_LED(config.LEDType.KLadder(
+        config.LEDType.KStatic(255, 0, 0), config.LEDType.KStatic(0, 255, 0), lambda: progress["value"], 5
+    ), 1, 5)
+
+    for value, filled in [(0.0, 0), (0.35, 3), (0.9, 9), (1.2, 10)]:
+        progress["value"] = value
+        cycle(leds, clock)
+        assert colors(leds) == [(0, 255, 0)] * filled + [(255, 0, 0)] * (leds.size - filled)
+
+
+def test_layers(leds: ALeds, clock):
+    red, blue, white = config.LEDType.KStatic(255, 0, 0), config.LEDType.KStatic(0, 0, 255), config.LEDType.KStatic(9, 9, 9)
+    layers = config.LEDType.KLayers(
+        Segment(red, 0, 5),
+        Segment(blue, 5),
+        Progress(blue, red, 0.5, reverse=True),
+        Overlay(white, [i % 3 == 0 for i in range(leds.size)]),
+    )
+    leds.set_LED(layers, 1, 5)
+    cycle(leds, clock)
+
+    # the reversed progress bar covers both segments, then the overlay goes on top
+    W, B, R = (9, 9, 9), (0, 0, 255), (255, 0, 0)
+    assert colors(leds) == [W, B, B, W, B, R, W, R, R, W]
+
+    leds.set_LED(config.LEDType.KLayers(Segment(red, 0, 5), Segment(blue, 5)), 1, 5)
+    cycle(leds, clock)
+    assert colors(leds) == [R] * 5 + [B] * 5
+
+
+def test_animated_segments(leds: ALeds, clock):
+    leds.set_LED(config.LEDType.KLayers(
+        Segment(config.LEDType.KStatic(0, 0, 255)),
+        Segment(config.LEDType.KBlink(0, 255, 0), 2, 4, speed=1),
+    ), 1, 5)
+
+    lit = []
+    for _ in range(3):
+        cycle(leds, clock)
+        lit.append(colors(leds)[2:4] == [(0, 255, 0)] * 2)
+        assert colors(leds)[:2] == [(0, 0, 255)] * 2
+
+    assert lit == [True, True, False]
+    # segment frames are cached at their own length
+    assert leds.frames[(4, 0, 255, 0, 1, 2)].shape == (3, 2, 3)
+
+
+def test_no_buffer_reallocation(leds: ALeds, clock):
+    leds.set_LED(config.LEDType.KLadder(
+        config.LEDType.KRainbow(), config.LEDType.KBlink(0, 255, 0), 0.5, 2
+    ), 1, 5)
+    buffer = leds.buffer
+    for _ in range(5):
+        cycle(leds, clock)
+    assert leds.match(leds.active_mode) is buffer
@@ -0,0 +1,87 @@
+import math
+from unittest.mock import MagicMock
+
+import pytest
+from pytest import MonkeyPatch
+from wpimath.geometry import Pose3d
+
+import config
+from sensors.limelight import Limelight, LimelightController
+
+
+@pytest.fixture
+def controller(monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(config, "active_team", config.Team.BLUE)
+
+    limelights = [Limelight(Pose3d(), "limelight-f"), Limelight(Pose3d(), "limelight-b")]
+    for limelight in limelights:
+        limelight.table = MagicMock()
+        limelight.table.getNumber.return_value = -1  # no tags
+
+    gyro = MagicMock()
+    gyro.refresh_heading.return_value = (math.radians(90), math.radians(5))
+
+    controller = LimelightController(limelights, gyro)
+    controller.nt = MagicMock()
+    return controller
+
+
+def orientation_writes(controller: LimelightController) -> list:
+    return [
+        call
+        for limelight in controller.limelights
+        for call in limelight.table.getEntry.return_value.setDoubleArray.call_args_list
+    ]
+
+
+def test_one_gyro_read_per_loop(controller: LimelightController):
+    # what robotPeriodic does each loop
+    controller.set_orientations()
+    controller.get_estimated_robot_pose()
+
+    assert controller.gyro.refresh_heading.call_count == 1
+    controller.gyro.get_robot_heading.assert_not_called()
+    controller.gyro.get_robot_heading_rate.assert_not_called()
+
+
+def test_one_nt_write_per_camera(controller: LimelightController):
+    controller.set_orientations()
+    controller.get_estimated_robot_pose()
+
+    writes = orientation_writes(controller)
+    assert len(writes) == len(controller.limelights)
+    assert writes[0].args[0] == pytest.approx([90, 5, 0, 0, 0, 0])
+    controller.nt.flush.assert_called_once()
+
+    for limelight in controller.limelights:
+        requested = [call.args[0] for call in limelight.table.getEntry.call_args_list]
+        assert requested == ["robot_orientation_set"]
+
+
+def test_red_orientation(controller: LimelightController, monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(config, "active_team", config.Team.RED)
+    controller.set_orientations()
+
+    assert orientation_writes(controller)[0].args[0][0] == pytest.approx(-90)
+
+
+@pytest.mark.parametrize(
+    "rate, megatag2",
+    [
+        (0, True),
+        (config.odometry_megatag2_max_angular_velocity - 1, True),
+        (config.odometry_megatag2_max_angular_velocity + 1, False),
+    ],
+)
+def test_megatag2_uses_sampled_rate(controller: LimelightController, rate, megatag2):
+    controller.gyro.refresh_heading.return_value = (0, math.radians(rate))
+    for limelight in controller.limelights:
+        limelight.april_tag_exists = MagicMock(return_value=True)
+        limelight.get_pipeline_mode = MagicMock(return_value=config.LimelightPipeline.feducial)
+        limelight.get_bot_pose = MagicMock()
+
+    controller.set_orientations()
+    controller.get_estimated_robot_pose()
+
+    for limelight in controller.limelights:
+        limelight.get_bot_pose.assert_called_once_with(megatag2)
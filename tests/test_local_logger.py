@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+from pytest import MonkeyPatch
+
+import config
+from utils import LocalLogger
+from utils.local_logger import LogWriter
+
+
+@pytest.fixture
+def logger(monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(config, "LOGGING", False)
+    monkeypatch.setattr(config, "LOG_OUT_LEVEL", 0)
+    monkeypatch.setattr(LocalLogger, "writer", LogWriter(8))
+    return LocalLogger("Test")
+
+
+class Counted:
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "counted"
+
+
+def test_messages_are_written(logger: LocalLogger, capsys):
+    logger.info("shot %d at %.1f rpm", 3, 4200)
+    logger.warn("plain message")
+    LocalLogger.flush()
+
+    out = capsys.readouterr().out.splitlines()
+    assert "Test: shot 3 at 4200.0 rpm" in out[0]
+    assert "WARN" in out[1] and "Test: plain message" in out[1]
+
+
+def test_filtered_messages_are_not_formatted(logger: LocalLogger, monkeypatch: MonkeyPatch, capsys):
+    monkeypatch.setattr(config, "LOG_OUT_LEVEL", LocalLogger.LogLevels.INFO)
+    value = Counted()
+
+    logger.debug("value %s", value)
+    LocalLogger.flush()
+    assert value.calls == 0
+    assert capsys.readouterr().out == ""
+
+    logger.info("value %s", value)
+    LocalLogger.flush()
+    assert value.calls == 1
+
+
+def test_full_buffer_drops_and_reports(logger: LocalLogger, capsys):
+    writer = LocalLogger.writer
+    release = threading.Event()
+    writer.submit(lambda: release.wait())
+    # the writer thread may or may not have taken the blocking record off the queue yet
+    for i in range(20):
+        logger.info("message %d", i)
+
+    assert LocalLogger.dropped() >= 20 - writer.queue.maxsize
+    dropped = LocalLogger.dropped()
+
+    release.set()
+    LocalLogger.flush()
+
+    out = capsys.readouterr().out
+    assert f"dropped {dropped} messages" in out
+    assert "message 0" in out
+    assert "message 19" not in out
+
+
+def test_prefix_is_taken_when_logged(logger: LocalLogger, capsys):
+    from wpilib.simulation import DriverStationSim
+
+    release = threading.Event()
+    LocalLogger.writer.submit(lambda: release.wait())
+    DriverStationSim.setAutonomous(False)
+    DriverStationSim.setEnabled(True)
+    DriverStationSim.notifyNewData()
+    try:
+        logger.info("enabled")
+        DriverStationSim.setEnabled(False)
+        DriverStationSim.notifyNewData()
+    finally:
+        release.set()
+        DriverStationSim.setEnabled(False)
+        DriverStationSim.notifyNewData()
+    LocalLogger.flush()
+
+    out = capsys.readouterr().out
+    assert "TELEOP" in out and "DISABLED" not in out
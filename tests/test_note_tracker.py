@@ -0,0 +1,101 @@
+import math
+from unittest.mock import MagicMock
+
+import pytest
+from pytest import MonkeyPatch
+from wpimath.geometry import Pose2d, Pose3d, Rotation3d
+
+import config
+import sensors.note_tracker
+from sensors.note_tracker import NoteTracker
+
+
+@pytest.fixture
+def tracker(monkeypatch: MonkeyPatch):
+    # 1m up, looking 45 degrees down, so a centered target is 1m in front of the camera
+    limelight = MagicMock()
+    limelight.tv = 0
+    odometry = MagicMock()
+    odometry.getPose.return_value = Pose2d(2, 3, 0)
+    tracker = NoteTracker(limelight, odometry, Pose3d(0.5, 0, 1, Rotation3d(0, math.radians(45), 0)))
+
+    tracker.time = 0.0
+    monkeypatch.setattr(sensors.note_tracker.Timer, "getFPGATimestamp", lambda: tracker.time)
+    return tracker
+
+
+def see(tracker: NoteTracker, tx, ty, time):
+    tracker.time = time
+    tracker.limelight.tv = 1
+    tracker.limelight.tx = tx
+    tracker.limelight.ty = ty
+    tracker.update()
+
+
+@pytest.mark.parametrize(
+    "tx, ty, expected",
+    [
+        (0, 0, (1.5, 0)),
+        (0, -15, (0.5 + 1 / math.tan(math.radians(60)), 0)),
+        (45, 0, (1.5, -math.sqrt(2))),  # positive tx is to the right of the camera
+        (0, 45, None),  # at the horizon
+        (0, 40, None),  # hits the floor past the max range
+    ],
+)
+def test_project(tracker: NoteTracker, tx, ty, expected):
+    point = tracker.project(tx, ty)
+    if expected is None:
+        assert point is None
+    else:
+        assert point == pytest.approx(expected)
+
+
+def test_to_field(tracker: NoteTracker):
+    assert tracker.to_field(Pose2d(1, 1, math.radians(90)), 1, 0) == pytest.approx((1, 2))
+
+
+def test_confirm_and_nearest(tracker: NoteTracker):
+    for i in range(config.note_tracker_confirm_hits - 1):
+        see(tracker, 0, 0, i * 0.02)
+        assert tracker.nearest_note() is None
+
+    see(tracker, 0.5, 0, 0.1)
+    note = tracker.nearest_note()
+    assert note.X() == pytest.approx(3.5, abs=0.01)
+    assert note.Y() == pytest.approx(3, abs=0.02)
+    assert tracker.active.sum() == 1
+    assert len(tracker.get_notes()) == 1
+
+
+def test_new_track_outside_gate(tracker: NoteTracker):
+    see(tracker, 0, 0, 0)
+    tracker.odometry.getPose.return_value = Pose2d(2, 5, 0)
+    see(tracker, 0, 0, 0.02)
+
+    assert tracker.active.sum() == 2
+    assert tracker.hits[tracker.active].tolist() == [1, 1]
+
+
+def test_expiry_and_slot_reuse(tracker: NoteTracker, monkeypatch: MonkeyPatch):
+    see(tracker, 0, 0, 0)
+    tracker.limelight.tv = 0
+    tracker.time = config.note_tracker_expiry + 0.1
+    tracker.update()
+    assert not tracker.active.any()
+
+    monkeypatch.setattr(config, "note_tracker_max_tracks", 2)
+    small = NoteTracker(tracker.limelight, tracker.odometry)
+    small.add_detection(0, 1, 1, 0.1)
+    small.add_detection(1, 5, 5, 0.1)
+    small.add_detection(2, 9, 1, 0.1)
+
+    # the track seen longest ago is replaced
+    assert sorted(small.x[small.active].tolist()) == [5, 9]
+
+
+def test_filter_converges(tracker: NoteTracker):
+    tracker.add_detection(0, 1.0, 1.0, 0.1)
+    tracker.add_detection(0, 1.2, 1.0, 0.1)
+
+    assert tracker.x[tracker.active][0] == pytest.approx(1.1)
+    assert tracker.variance[tracker.active][0] == pytest.approx(0.005)
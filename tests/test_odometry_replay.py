@@ -0,0 +1,110 @@
+import math
+
+import numpy as np
+import pytest
+from pytest import MonkeyPatch
+from wpimath.geometry import Pose2d, Pose3d, Rotation2d, Rotation3d
+from wpimath.kinematics import ChassisSpeeds, SwerveModulePosition
+
+import config
+import constants
+from sensors.field_odometry import FieldOdometry
+from sensors.odometry_log import read_odometry_log
+from sensors.odometry_replay import ReplayDrivetrain, replay, report
+
+
+class FakeVision:
+    def __init__(self):
+        self.frames = None
+
+    def get_estimated_robot_pose(self):
+        return self.frames
+
+
+@pytest.fixture
+def recording(tmp_path, monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(config, "odometry_record_enabled", False)
+    monkeypatch.setattr(config, "active_team", config.Team.BLUE)
+
+    path = str(tmp_path / "test.odolog")
+    drivetrain = ReplayDrivetrain()
+    vision = FakeVision()
+
+    odometry = FieldOdometry(drivetrain, vision, constants.field_width, constants.field_length)
+    odometry.replay = True  # use the estimator pose like the real robot does
+    drivetrain.reset_odometry(Pose2d(1, 1, 0))
+    odometry.start_recording(path)
+
+    t = 0.0
+    monkeypatch.setattr(odometry, "get_time", lambda: t)
+
+    for i in range(60):
+        t = i * config.period
+        distance = i * 0.05
+        heading = Rotation2d(i * 0.01)
+        drivetrain.heading = heading
+        drivetrain.gyro.heading = heading.radians()
+        drivetrain.gyro.heading_rate = 0.25
+        drivetrain.node_positions = tuple(SwerveModulePosition(distance, Rotation2d(0)) for _ in range(4))
+        drivetrain.chassis_speeds = ChassisSpeeds(1.25, 0, 0.25)
+
+        if i == 30:
+            drivetrain.reset_odometry(Pose2d(3, 2, heading))
+
+        if i % 4 == 0:
+            pose = drivetrain.odometry_estimator.getEstimatedPosition()
+            vision.frames = [
+                (Pose3d(pose.X() + 0.1, pose.Y() - 0.05, 0, Rotation3d(0, 0, heading.radians())),
+                 t - 0.03, 2, 2.5, 0.4, 7, False, "limelight-f"),
+                None,
+                (Pose3d(pose.X() + 0.08, pose.Y(), 0, Rotation3d()), t - 0.02, 1, 1.5, 0.3, 8, True, "limelight-b"),
+            ]
+        else:
+            vision.frames = None
+
+        odometry.shooting = i > 50
+        odometry.update()
+
+    odometry.stop_recording()
+    return path
+
+
+def test_log_round_trip(recording):
+    loops = list(read_odometry_log(recording))
+
+    assert len(loops) == 60
+    assert loops[1].timestamp == pytest.approx(config.period)
+    assert loops[1].vision is None
+    assert loops[2].module_positions[3] == pytest.approx((0.1, 0))
+    assert loops[59].flags & 4
+
+    frames = loops[4].vision
+    assert len(frames) == 2
+    assert [frame[7] for frame in frames] == ["limelight-f", "limelight-b"]
+    assert frames[0][1:7] == pytest.approx((4 * config.period - 0.03, 2, 2.5, 0.4, 7, False))
+    assert frames[1][6] is True
+
+
+def test_replay_is_deterministic(recording):
+    result = replay(recording)
+
+    assert result.poses.shape == (60, 3)
+    np.testing.assert_allclose(result.poses, result.recorded, atol=1e-9)
+
+    # the reset before loop 30 is picked up from the recorded poses
+    assert result.poses[30, 0] == pytest.approx(3, abs=0.2)
+
+
+def test_replay_overrides(recording):
+    enabled = config.odometry_fusion_enabled
+    result = replay(recording, {"odometry_fusion_enabled": not enabled}, "flipped fusion")
+
+    assert config.odometry_fusion_enabled == enabled
+    assert not np.allclose(result.poses, result.recorded, atol=1e-9)
+
+    text = report([replay(recording), result])
+    assert "flipped fusion" in text
+    assert "60 loops" in text
+
+    with pytest.raises(AttributeError):
+        replay(recording, {"not_a_config_value": 1})
@@ -0,0 +1,90 @@
+from unittest.mock import MagicMock
+
+import pytest
+from pytest import MonkeyPatch
+from wpilib.simulation import RoboRioSim
+from wpimath.geometry import Pose2d
+from wpimath.kinematics import ChassisSpeeds
+from wpimath.system.plant import DCMotor
+
+import config
+from command import FlywheelPreSpin
+from subsystem import Flywheel
+from toolkit.motors.sim import FlywheelPlant, SimMotor
+
+
+@pytest.fixture
+def prespin():
+    wrist, intake = MagicMock(), MagicMock()
+    wrist.note_in_feeder.return_value = False
+    intake.detect_note.return_value = False
+
+    traj = MagicMock()
+    traj.odometry.getPose.return_value = Pose2d(2, 0, 0)
+    traj.odometry.drivetrain.chassis_speeds = ChassisSpeeds(2, 0, 0)
+    # the speaker at the origin, the feed zone 10 meters past it
+    traj.get_distance_to_target.side_effect = lambda pose: pose.X()
+    traj.get_distance_to_feed_zone.side_effect = lambda pose: 10 - pose.X()
+    traj.get_flywheel_speed.side_effect = lambda distance: 10 + distance
+    traj.get_flywheel_speed_feed.side_effect = lambda distance: 20 + distance
+
+    power = MagicMock()
+    power.getTotalCurrent.return_value = 0
+
+    flywheel = Flywheel()
+    for motor in (flywheel.motor_1, flywheel.motor_2):
+        motor.attach_sim(FlywheelPlant(DCMotor.falcon500(1), flywheel.total_MOI))
+
+    RoboRioSim.setVInVoltage(12)
+    command = FlywheelPreSpin(flywheel, wrist, intake, traj, power)
+    command.initialize()
+    yield command
+    SimMotor.clear()
+
+
+def target(command: FlywheelPreSpin) -> float:
+    command.execute()
+    return command.subsystem.angular_velocity_to_linear_velocity(command.subsystem.flywheel_top_target)
+
+
+def test_idles_without_note(prespin):
+    assert target(prespin) == pytest.approx(config.idle_flywheel)
+
+
+def test_speaker_speed_from_predicted_pose(prespin):
+    prespin.wrist.note_in_feeder.return_value = True
+    # 2 m/s for the lookahead past x = 2
+    distance = 2 + 2 * config.prespin_lookahead
+    assert target(prespin) == pytest.approx(10 + distance)
+
+    # robot relative speeds, facing back toward the speaker
+    prespin.traj.odometry.getPose.return_value = Pose2d(2, 0, 3.141592653589793)
+    assert target(prespin) == pytest.approx(10 + 2 - 2 * config.prespin_lookahead)
+
+
+def test_feed_speed_out_of_range(prespin):
+    prespin.intake.detect_note.return_value = True
+    prespin.traj.odometry.getPose.return_value = Pose2d(config.prespin_speaker_range, 0, 0)
+    distance = 10 - config.prespin_speaker_range - 2 * config.prespin_lookahead
+    assert target(prespin) == pytest.approx(20 + distance)
+
+
+def test_battery_and_current_budget(prespin, monkeypatch: MonkeyPatch):
+    prespin.wrist.note_in_feeder.return_value = True
+    monkeypatch.setattr(config, "prespin_speaker_range", 100)
+    prespin.traj.get_flywheel_speed.side_effect = lambda distance: 1000
+
+    RoboRioSim.setVInVoltage(8)
+    limit = prespin.battery_limit()
+    rps = (8 - config.prespin_voltage_reserve) / config.FLYWHEEL_CONFIG.kV
+    assert limit == pytest.approx(Flywheel.angular_velocity_to_linear_velocity(Flywheel.rps_to_angular_velocity(rps)))
+    assert target(prespin) == pytest.approx(limit)
+
+    # over the current budget it holds instead of speeding up
+    RoboRioSim.setVInVoltage(12)
+    prespin.power.getTotalCurrent.return_value = config.prespin_current_budget + 1
+    assert target(prespin) == pytest.approx(limit)
+
+    # but still slows down
+    prespin.wrist.note_in_feeder.return_value = False
+    assert target(prespin) == pytest.approx(config.idle_flywheel)
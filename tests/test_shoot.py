@@ -1,6 +1,7 @@
 import math
 from unittest.mock import MagicMock
 
+import numpy as np
 import pytest
 from pytest import MonkeyPatch
 from wpimath.geometry import Pose2d, Translation2d
@@ -140,3 +141,16 @@ def test_update_base(
     assert trajectory_calc.update_base().radians() == pytest.approx(
         math.radians(expected_angle)
     )
+
+
+def test_run_sims_matches_run_sim(trajectory_calc):
+    trajectory_calc.flywheel.get_velocity_linear.return_value = 15
+    trajectory_calc.distance_to_target = 5
+    angles = np.linspace(0.2, 1.0, 9)
+
+    batch = trajectory_calc.run_sims(angles)
+    single = [trajectory_calc.run_sim(angle) for angle in angles]
+    assert batch == pytest.approx(single, abs=1e-9)
+
+    # straight up never gets there
+    assert np.isnan(trajectory_calc.run_sims(math.pi / 2))
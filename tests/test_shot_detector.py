@@ -0,0 +1,138 @@
+import time
+
+import numpy as np
+import pytest
+from wpimath.system.plant import DCMotor
+
+import config
+from command import WaitForShot
+from sensors import ShotDetector
+from subsystem import Flywheel
+from toolkit.motors.ctre_motors import TalonFX
+from toolkit.motors.sim import FlywheelPlant, SimMotor
+
+DT = 1 / config.shot_detector_frequency
+
+
+def signals(seconds: float, seed: int = 0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Flywheel holding 60 rotations per second on 10 amps, with a little noise.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(round(seconds / DT)) * DT
+    return t, 10 + rng.normal(0, 1, t.size), 60 + rng.normal(0, 0.1, t.size)
+
+
+def shoot(t, current, velocity, at: float):
+    """
+    A note leaving the flywheel at at: a 40 amp spike for 12 ms and a 5 rotations per second dip.
+    """
+    start = np.searchsorted(t, at)
+    current[start:start + 3] += 40
+    velocity[start:] -= 5 * np.exp(-(t[start:] - at) / 0.1)
+    return t[start]
+
+
+def run(detector: ShotDetector, t, current, velocity) -> list[float]:
+    shots = [detector.add_sample(*sample) for sample in zip(t, current, velocity)]
+    return [shot for shot in shots if shot is not None]
+
+
+def test_detects_shot_at_onset():
+    t, current, velocity = signals(2)
+    onset = shoot(t, current, velocity, 1)
+    detector = ShotDetector(lambda timeout: None)
+    assert run(detector, t, current, velocity) == [pytest.approx(onset)]
+    assert detector.count == 1
+    assert detector.last_shot == pytest.approx(onset)
+
+
+def test_missed_at_loop_rate():
+    t, current, velocity = signals(2)
+    # the spike falls between the 20ms loop's samples
+    shoot(t, current, velocity, 1.004)
+    loop = np.arange(0, t.size, round(config.period / DT))
+    assert (current[loop] < config.flywheel_shot_current_threshold).all()
+
+    assert len(run(ShotDetector(lambda timeout: None), t, current, velocity)) == 1
+
+
+def test_ignores_spin_up():
+    t, current, velocity = signals(2)
+    # drawing more current to speed up
+    start = np.searchsorted(t, 1)
+    current[start:] += 60 * np.exp(-(t[start:] - 1) / 0.3)
+    velocity[start:] += 20 * (1 - np.exp(-(t[start:] - 1) / 0.3))
+    assert run(ShotDetector(lambda timeout: None), t, current, velocity) == []
+
+
+def test_holdoff():
+    t, current, velocity = signals(3)
+    first = shoot(t, current, velocity, 1)
+    shoot(t, current, velocity, 1 + config.shot_detector_holdoff / 2)
+    second = shoot(t, current, velocity, 2)
+    assert run(ShotDetector(lambda timeout: None), t, current, velocity) == [
+        pytest.approx(first), pytest.approx(second)
+    ]
+
+
+def test_thread():
+    t, current, velocity = signals(2)
+    onset = shoot(t, current, velocity, 1)
+    samples = iter(zip(t, current, velocity))
+
+    detector = ShotDetector(lambda timeout: next(samples, None))
+    detector.start()
+    try:
+        deadline = time.monotonic() + 5
+        while detector.count == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        detector.stop()
+    assert detector.last_shot == pytest.approx(onset)
+    assert detector.thread is None
+
+
+def test_flywheel_signals():
+    flywheel = Flywheel()
+    for motor in (flywheel.motor_1, flywheel.motor_2):
+        motor.attach_sim(FlywheelPlant(DCMotor.falcon500(1), flywheel.total_MOI))
+        motor.set_signal_frequency(1000)
+    try:
+        flywheel.set_velocity_linear(15, 1)
+        SimMotor.update_all(config.period)
+        _, current, velocity = flywheel.wait_for_shot_signals(config.period)
+        assert current == pytest.approx(flywheel.get_current(1))
+        assert velocity == pytest.approx(flywheel.motor_1.get_sensor_velocity() / 2)
+    finally:
+        SimMotor.clear()
+
+
+def test_phoenix_signals_are_waited_on_apart_from_the_loop():
+    motors = [TalonFX(41 + i, optimize=False) for i in range(2)]
+    for motor in motors:
+        motor.init()
+        motor.set_signal_frequency(config.shot_detector_frequency)
+
+    samples = TalonFX.wait_for_signals(0.5, *motors)
+    assert samples is not None and len(samples) == 2
+    for motor in motors:
+        assert motor._motor_vel not in motor._thread_signals
+        assert motor._motor_current not in motor._thread_signals
+
+
+def test_wait_for_shot():
+    detector = ShotDetector(lambda timeout: None)
+    wait = WaitForShot(detector, 10)
+    wait.mark()
+    wait.initialize()
+    assert not wait.isFinished()
+    # seen while the note was still being passed, before the wait started
+    detector.count += 1
+    wait.initialize()
+    assert wait.isFinished()
+
+    wait.mark()
+    assert not wait.isFinished()
+    wait.timeout = 0
+    assert wait.isFinished()
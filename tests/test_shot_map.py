@@ -0,0 +1,102 @@
+import math
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from pytest import MonkeyPatch
+
+import constants
+from sensors import shot_map
+from sensors.shot_map import Axis, ShotMap
+from sensors.trajectory_calc import TrajectoryCalculator
+
+DISTANCE = Axis.from_range(2, 6, 0.5)
+HEIGHT = Axis.from_range(0.8, 2, 0.2)
+SPEED = Axis.from_range(16, 24, 2)
+
+
+@pytest.fixture
+def calculator():
+    calculator = TrajectoryCalculator(MagicMock(), MagicMock(), MagicMock())
+    calculator.odometry = MagicMock()
+    return calculator
+
+
+@pytest.fixture
+def map_path(tmp_path, calculator):
+    grid = np.meshgrid(DISTANCE.values(), HEIGHT.values(), SPEED.values(), indexing="ij")
+    angle, flight = shot_map.solve(calculator, *(axis.ravel() for axis in grid))
+    path = str(tmp_path / "shot_map.bin")
+    tables = np.stack((angle.reshape(grid[0].shape), flight.reshape(grid[0].shape)))
+    shot_map.write(path, DISTANCE, HEIGHT, SPEED, tables)
+    return path
+
+
+def test_axis():
+    axis = Axis.from_range(1, 2, 0.25)
+    assert axis.count == 5
+    assert axis.values() == pytest.approx([1, 1.25, 1.5, 1.75, 2])
+    assert axis.locate(1.6) == (2, pytest.approx(0.4))
+    # the last value is in the last cell
+    assert axis.locate(2) == (3, pytest.approx(1))
+    assert axis.locate(0.9) is None
+    assert axis.locate(2.1) is None
+
+
+def test_lookup_hits_target(map_path, calculator):
+    table = ShotMap.load(map_path)
+    assert (table.distance, table.height, table.speed) == (DISTANCE, HEIGHT, SPEED)
+    assert not np.isnan(table.angle).any()
+
+    for distance, height, speed in [(2, 0.8, 16), (3.3, 1.45, 19), (5.9, 1.9, 23.5)]:
+        angle, flight = table.lookup(distance, height, speed)
+        calculator.distance_to_target = distance
+        calculator.flywheel.get_velocity_linear.return_value = speed
+        # a coarse grid, still within a couple of centimeters
+        assert calculator.run_sim(angle) == pytest.approx(height, abs=0.02)
+        assert distance / speed < flight < 2 * distance / speed
+
+
+def test_lookup_outside_map(map_path):
+    table = ShotMap.load(map_path)
+    assert all(math.isnan(value) for value in table.lookup(1, 1, 20))
+    assert all(math.isnan(value) for value in table.lookup(3, 1, 30))
+
+
+def test_load_rejects_other_maps(map_path, tmp_path, monkeypatch: MonkeyPatch):
+    assert ShotMap.load(str(tmp_path / "missing.bin")) is None
+
+    other = tmp_path / "other.bin"
+    other.write_bytes(b"not a shot map" * 20)
+    with pytest.raises(ValueError):
+        ShotMap(str(other))
+    assert ShotMap.load(str(other)) is None
+
+    monkeypatch.setattr(constants, "c", constants.c * 1.1)
+    assert ShotMap.load(map_path) is None
+
+
+def test_get_theta_uses_map(map_path, calculator):
+    calculator.init()
+    calculator.shot_map = ShotMap.load(map_path)
+    calculator.get_distance_to_target = lambda: 4
+    calculator.get_delta_z = lambda: 1.5
+    calculator.get_flywheel_speed = lambda distance: 20
+
+    angle, _ = calculator.shot_map.lookup(4, 1.5, 20)
+    calculator.get_theta()
+    assert calculator.shoot_angle == pytest.approx(angle)
+
+    # off the map it falls back to the angle without drag
+    calculator.get_distance_to_target = lambda: 9
+    calculator.get_theta()
+    assert calculator.shoot_angle == pytest.approx(calculator.calculate_angle_no_air(9, 1.5))
+
+
+def test_generate_matches_solve(calculator):
+    speed = Axis.from_range(18, 20, 2)
+    tables = shot_map.generate(DISTANCE, HEIGHT, speed, workers=1)
+    grid = np.meshgrid(DISTANCE.values(), HEIGHT.values(), speed.values(), indexing="ij")
+    angle, _ = shot_map.solve(calculator, *(axis.ravel() for axis in grid))
+    assert tables.shape == (2, DISTANCE.count, HEIGHT.count, speed.count)
+    assert tables[0].ravel() == pytest.approx(angle, abs=1e-6)
@@ -0,0 +1,109 @@
+from wpiutil.log import DataLog, DataLogReader
+import gc
+
+import ntcore
+import pytest
+from pytest import MonkeyPatch
+
+import config
+from utils import SignalLogger
+
+
+@pytest.fixture
+def path(tmp_path, monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(SignalLogger, "log", DataLog(str(tmp_path), "signals.wpilog"))
+    monkeypatch.setattr(SignalLogger, "channels", [])
+    monkeypatch.setattr(SignalLogger, "errors", 0)
+    monkeypatch.setattr(SignalLogger, "failed", set())
+    monkeypatch.setattr(config, "SIGNAL_LOGGING", True)
+    return tmp_path / "signals.wpilog"
+
+
+def read(path) -> dict[str, list]:
+    """
+    Closes the log and reads back every value, keyed by entry name.
+    """
+    # the DataLog only finishes writing the file once it is destroyed
+    SignalLogger.channels.clear()
+    SignalLogger.log = None
+    gc.collect()
+
+    reader = DataLogReader(str(path))
+    names, values = {}, {}
+    for record in reader:
+        if record.isStart():
+            start = record.getStartData()
+            names[start.entry] = (start.name, start.type)
+        elif not record.isControl():
+            name, type = names[record.getEntry()]
+            match type:
+                case "double":
+                    value = record.getDouble()
+                case "double[]":
+                    value = list(record.getDoubleArray())
+                case "boolean":
+                    value = record.getBoolean()
+                case _:
+                    continue
+            values.setdefault(name, []).append(value)
+    return values
+
+
+def test_channels_are_logged_each_update(path):
+    state = {"velocity": 1.0, "ready": False}
+    SignalLogger.double("flywheel/velocity", lambda: state["velocity"])
+    SignalLogger.double_array("odometry/pose", lambda: [1, 2, state["velocity"]])
+    SignalLogger.boolean("flywheel/ready", lambda: state["ready"])
+    manual = SignalLogger.double("manual")
+
+    SignalLogger.update()
+    state["velocity"], state["ready"] = 2.0, True
+    SignalLogger.update()
+    manual.append(5.0)
+    del manual
+
+    values = read(path)
+    assert values["flywheel/velocity"] == [1.0, 2.0]
+    assert values["odometry/pose"] == [[1, 2, 1], [1, 2, 2]]
+    assert values["flywheel/ready"] == [False, True]
+    assert values["manual"] == [5.0]
+
+
+def test_failing_getter_doesnt_stop_others(path, monkeypatch: MonkeyPatch):
+    # the report would go to this same log through LocalLogger
+    monkeypatch.setattr(SignalLogger, "_report", lambda name, error: None)
+    SignalLogger.double("broken", lambda: 1 / 0)
+    SignalLogger.double("working", lambda: 3.0)
+
+    SignalLogger.update()
+
+    assert SignalLogger.errors == 1
+    assert read(path)["working"] == [3.0]
+
+
+def test_failing_getter_is_reported_once(path, monkeypatch: MonkeyPatch):
+    reported = []
+    monkeypatch.setattr(SignalLogger, "_report", lambda name, error: reported.append((name, type(error))))
+    SignalLogger.double("broken", lambda: 1 / 0)
+
+    for _ in range(3):
+        SignalLogger.update()
+
+    assert reported == [("broken", ZeroDivisionError)]
+    assert SignalLogger.errors == 3
+    errors = ntcore.NetworkTableInstance.getDefault().getTable('logging').getNumber('signal errors', 0)
+    assert errors == 3
+
+
+def test_disabled(path, monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(config, "SIGNAL_LOGGING", False)
+    getter_calls = []
+    SignalLogger.double("value", lambda: getter_calls.append(1) or 0.0)
+
+    SignalLogger.update()
+    assert getter_calls == []
+
+
+def test_log_started_once(monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(SignalLogger, "log", None)
+    assert SignalLogger.get_log() is SignalLogger.get_log()
@@ -0,0 +1,219 @@
+import math
+import time
+
+import pytest
+from pytest import MonkeyPatch
+from wpimath.controller import LinearQuadraticRegulator_1_1
+from wpimath.estimator import KalmanFilter_1_1_1
+from wpimath.system.plant import DCMotor, LinearSystemId
+
+import config
+import constants
+import physics
+import robot_states as states
+from subsystem import Elevator, Flywheel, Wrist
+from subsystem.flywheel import FlywheelStateSpace
+from toolkit.motors import SparkMax, SparkMaxConfig, TalonConfig, TalonFX
+from toolkit.motors.sim import ArmPlant, ElevatorPlant, FlywheelPlant, SimMotor, SwerveSteerPlant
+
+
+@pytest.fixture(autouse=True)
+def clear_sim():
+    SimMotor.clear()
+    yield
+    SimMotor.clear()
+
+
+def run(seconds: float, dt: float = config.period):
+    for _ in range(round(seconds / dt)):
+        SimMotor.update_all(dt)
+
+
+def flywheel_moi() -> float:
+    return constants.flywheel_mass / 2 * constants.flywheel_radius_outer ** 2
+
+
+def test_flywheel_spins_up():
+    flywheel = Flywheel()
+    for motor in (flywheel.motor_1, flywheel.motor_2):
+        motor.attach_sim(FlywheelPlant(DCMotor.falcon500(1), flywheel_moi()))
+
+    flywheel.set_velocity_linear(15, 1)
+    run(1.5)
+    assert flywheel.get_velocity_linear(1) == pytest.approx(15, rel=0.02)
+    # motor 2 never got a target
+    assert flywheel.get_velocity(2) == pytest.approx(0)
+
+    flywheel.set_velocity_linear(0, 1)
+    run(2)
+    assert abs(flywheel.get_velocity_linear(1)) < 0.5
+
+
+@pytest.mark.parametrize("latency", [0, 0.025])
+def test_flywheel_state_space_matches_wpimath(latency):
+    motor, moi = DCMotor.falcon500(1), flywheel_moi()
+    loop = FlywheelStateSpace(motor, moi, 1, 1.5, 12, 3, 0.01, latency)
+
+    plant = LinearSystemId.flywheelSystem(motor, moi, 1)
+    controller = LinearQuadraticRegulator_1_1(plant, [1.5], [12], config.period)
+    if latency:
+        controller.latencyCompensate(plant, config.period, latency)
+    assert loop.K == pytest.approx(controller.K().item())
+
+    observer = KalmanFilter_1_1_1(plant, [3], [0.01], config.period)
+    p = observer.P().item()
+    assert loop.L == pytest.approx(p / (p + 0.01 ** 2 / config.period))
+
+
+def test_flywheel_state_space_mode():
+    flywheel = Flywheel()
+    sims = [
+        motor.attach_sim(FlywheelPlant(DCMotor.falcon500(1), flywheel.total_MOI))
+        for motor in (flywheel.motor_1, flywheel.motor_2)
+    ]
+    flywheel.set_state_space(True)
+    flywheel.set_velocity_linear(15)
+    for _ in range(round(1.5 / config.period)):
+        flywheel.periodic()
+        SimMotor.update_all(config.period)
+    assert all(sim.mode == 'voltage' for sim in sims)
+    assert flywheel.within_velocity_linear(15, states.flywheel_tolerance)
+
+    # back on the Talon velocity loop with the same target
+    flywheel.set_state_space(False)
+    assert all(sim.mode == 'velocity' for sim in sims)
+    assert sims[0].target == pytest.approx(flywheel.angular_velocity_to_rps(flywheel.flywheel_top_target))
+
+
+def test_current_limit():
+    motor = TalonFX(1, config=TalonConfig(0, 0, 0, 0, 0, current_limit=40))
+    sim = motor.attach_sim(FlywheelPlant(DCMotor.falcon500(1), flywheel_moi()))
+    motor.set_raw_output(1)
+    for _ in range(10):
+        SimMotor.update_all(0.02)
+        assert motor.get_motor_current() <= 40 + 1e-6
+    assert sim.plant.voltage < 12
+
+
+def test_elevator_holds_against_gravity():
+    elevator = Elevator()
+    plant = ElevatorPlant(
+        DCMotor.NEO(2), 6, constants.elevator_driver_gear_circumference / (2 * math.pi),
+        constants.elevator_gear_ratio, max_height=constants.elevator_max_length,
+    )
+    elevator.motor_extend.attach_sim(plant)
+
+    target = constants.elevator_max_length / 2
+    elevator.set_length(target)
+    run(3)
+    assert elevator.get_length() == pytest.approx(target, abs=0.02)
+    assert plant.height == pytest.approx(elevator.get_length())
+
+    # with no output gravity back drives it, slowly since the shorted motors brake it
+    elevator.motor_extend.set_raw_output(0)
+    run(3)
+    assert 0 < elevator.get_length() < target - 0.02
+    run(60)
+    assert elevator.get_length() == pytest.approx(0)
+
+
+def test_sensor_offset():
+    motor = SparkMax(2, config=SparkMaxConfig(0.1, 0, 0, 0))
+    sim = motor.attach_sim(FlywheelPlant(DCMotor.NEO(1), flywheel_moi()))
+    motor.set_raw_output(0.5)
+    run(0.5)
+    motor.set_sensor_position(0)
+    assert motor.get_sensor_position() == pytest.approx(0)
+    before = sim.plant.motor_rotations
+    run(0.5)
+    assert motor.get_sensor_position() == pytest.approx(sim.plant.motor_rotations - before)
+
+
+def test_wrist_stops_at_hard_stop():
+    wrist = Wrist()
+    plant = ArmPlant(
+        DCMotor.NEO(1), constants.wrist_gear_ratio, 0.3, 3,
+        constants.wrist_min_rotation, constants.wrist_max_rotation,
+    )
+    wrist.wrist_motor.attach_sim(plant)
+
+    wrist.wrist_motor.set_raw_output(0.5)
+    run(2)
+    assert plant.position == pytest.approx(constants.wrist_max_rotation)
+    assert wrist.get_wrist_angle() == pytest.approx(constants.wrist_max_rotation)
+
+    wrist.set_wrist_angle(math.radians(10))
+    run(2)
+    assert wrist.get_wrist_angle() == pytest.approx(math.radians(10), abs=math.radians(3))
+
+
+def test_wrist_aim_profile_settles(monkeypatch: MonkeyPatch):
+    # the offset trims the real wrist, the sim arm has nothing for it to make up for
+    monkeypatch.setattr(config, "wrist_aim_ff_offset", 0)
+    wrist = Wrist()
+    # a light arm, the feed forward is tuned for the real one, aim_wrist runs on slot 1's aim gains
+    sim = wrist.wrist_motor.attach_sim(
+        ArmPlant(DCMotor.NEO(1), constants.wrist_gear_ratio, 0.3, 0.5, constants.wrist_min_rotation,
+                 constants.wrist_max_rotation),
+    )
+    wrist.reset_profile()
+
+    target, peak = math.radians(35), 0
+    for _ in range(round(0.6 / config.period)):
+        wrist.aim_wrist(target)
+        SimMotor.update_all(config.period)
+        peak = max(peak, wrist.get_wrist_angle())
+    assert wrist.time_to_settle == 0
+    assert wrist.is_at_angle(target, math.radians(config.wrist_shot_tolerance))
+    assert peak < target + math.radians(1)
+    assert sim.slot == 1 and sim.kP == config.WRIST_AIM_CONFIG.k_P
+
+
+def test_spark_position_slots():
+    fast = SparkMaxConfig(0.4, 0, 0, 0, (-1, 1))
+    slow = SparkMaxConfig(0.02, 0, 0, 0, (-0.2, 0.2))
+    positions = []
+    for slot in (0, 1):
+        motor = SparkMax(6 + slot, config=fast, config_others=[slow])
+        motor.attach_sim(FlywheelPlant(DCMotor.NEO(1), flywheel_moi()))
+        motor.set_target_position(20, slot=slot)
+        run(0.3)
+        positions.append(motor.get_sensor_position())
+    # same target, only the slot differs
+    assert positions[0] > 2 * positions[1] > 0
+
+    # and switching back picks slot 0's gains up again
+    sim = motor.attach_sim(FlywheelPlant(DCMotor.NEO(1), flywheel_moi()))
+    motor.set_target_position(20, slot=1)
+    assert (sim.kP, sim.output_range) == (0.02, (-0.2, 0.2))
+    motor.set_target_position(20)
+    assert (sim.kP, sim.output_range) == (0.4, (-1, 1))
+
+
+def test_spark_velocity_is_rpm():
+    motor = SparkMax(3, config=SparkMaxConfig(0.0002, 0, 0, 1 / 5676))
+    motor.attach_sim(FlywheelPlant(DCMotor.NEO(1), flywheel_moi()))
+    motor.set_target_velocity(3000)
+    run(1)
+    assert motor.get_sensor_velocity() == pytest.approx(3000, rel=0.05)
+
+
+def test_follower_reads_master():
+    master = SparkMax(4, config=config.TURN_CONFIG)
+    follower = SparkMax(5)
+    master.attach_sim(SwerveSteerPlant(DCMotor.NEO(1), constants.drivetrain_turn_gear_ratio))
+    follower.follow(master)
+
+    master.set_target_position(5)
+    run(1)
+    assert master.get_sensor_position() == pytest.approx(5, abs=0.1)
+    assert follower.get_sensor_position() == master.get_sensor_position()
+
+
+def test_robot_runs_faster_than_real_time():
+    physics.attach_plants()
+    assert len(SimMotor.instances) == 2 + 1 + 1 + 8
+
+    start = time.perf_counter()
+    run(10)
+    assert time.perf_counter() - start < 10
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from units import IncompatibleUnitsError, Unum, UnumArray
+from units.benchmark import cases, define_units
+
+
+@pytest.fixture
+def u():
+    table = Unum.getUnitTable()
+    Unum.reset()
+    yield define_units()
+    Unum.reset(table)
+    Unum.CACHE = True
+
+
+def test_cached_matches_uncached(u):
+    for name, case in cases(u).items():
+        Unum.CACHE = False
+        expected = case()
+        Unum.CACHE = True
+        Unum.clearCache()
+        # first call fills the cache, the second reads it
+        assert str(case()) == str(expected), name
+        assert str(case()) == str(expected), name
+
+
+def test_cache_cleared_with_unit_table(u):
+    assert (12 * u['in']).asNumber(u['ft']) == pytest.approx(1)
+    assert Unum._matchCache
+
+    Unum.unit('yd', 3 * u['ft'], 'yard')
+    assert not Unum._matchCache
+
+
+def test_incompatible_not_cached(u):
+    for _ in range(2):
+        with pytest.raises(IncompatibleUnitsError):
+            u['m'] + u['s']
+
+
+def test_unum_array(u):
+    m, ft, inch, s = u['m'], u['ft'], u['in'], u['s']
+    distances = UnumArray([1, 2, 3], ft)
+
+    total = distances + 6 * inch
+    assert isinstance(total, UnumArray)
+    assert np.allclose(total.asNumber(m), (np.array([1, 2, 3]) + 0.5) * 0.3048)
+
+    # numpy arrays on the left hand side don't broadcast the Unum across themselves
+    doubled = np.array([2, 2, 2]) * distances
+    assert isinstance(doubled, UnumArray)
+    assert np.allclose(doubled.asNumber(ft), [2, 4, 6])
+
+    speeds = distances / (2 * s)
+    assert np.allclose(speeds.asUnit(m / s).asNumber(m / s), np.array([1, 2, 3]) * 0.3048 / 2)
+
+    assert isinstance(distances[1:], UnumArray)
+    assert distances[0].asNumber(ft) == 1
+    assert list(distances < 2 * ft) == [True, False, False]
+
+    with pytest.raises(IncompatibleUnitsError):
+        distances + 1 * s
@@ -0,0 +1,94 @@
+import math
+
+import numpy as np
+import pytest
+from pytest import MonkeyPatch
+from wpimath.geometry import Pose3d, Rotation3d
+
+import config
+from sensors.vision_fusion import VisionFusion
+
+
+def frame(x, y, t, tag_count=2, distance=2, area=1, tag_id=1):
+    return Pose3d(x, y, 0, Rotation3d()), t, tag_count, distance, area, tag_id, False
+
+
+@pytest.fixture
+def fusion():
+    return VisionFusion(8.2, 16.5)
+
+
+def test_empty(fusion: VisionFusion):
+    assert fusion.process([], 0, 0, False, False) == []
+    assert fusion.process([None], 0, 0, False, False) == []
+
+
+@pytest.mark.parametrize(
+    "test_frame, accepted",
+    [
+        (frame(1, 1, 0), True),
+        (frame(-1, 1, 0), False),  # outside field
+        (frame(1, 9, 0), False),  # outside field
+        (frame(1, 1, 0, tag_count=0), False),
+        (frame(1, 1, 0, tag_count=1, distance=config.odometry_tag_distance_threshold + 1), False),
+        (frame(1, 1, 0, tag_count=1), True),
+        (frame(3, 3, 0, tag_count=1), False),  # too far from the current pose
+        (frame(1, 1, 0, tag_count=2, distance=config.odometry_two_tag_distance_threshold + 1), False),
+        (frame(1, 1, 0, tag_count=3, distance=config.odometry_two_tag_distance_threshold + 1), True),
+    ],
+)
+def test_gate(fusion: VisionFusion, test_frame, accepted):
+    data = fusion.load([test_frame])
+    mask, _, _ = fusion.gate(data, 1, 1, False, False)
+    assert mask[0] == accepted
+
+
+def test_gate_std(fusion: VisionFusion, monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(config, "active_team", config.Team.RED)
+    data = fusion.load([
+        frame(1, 1, 0, tag_count=2),
+        frame(1, 1, 0, tag_count=3),
+        frame(1, 1, 0, tag_count=2, tag_id=3, distance=4),
+    ])
+
+    _, std, std_omega = fusion.gate(data, 1, 1, False, False)
+    assert std == pytest.approx([0.5, 0.7, 0.5])
+    assert std_omega == pytest.approx([math.radians(44)] * 3)
+
+    _, std, _ = fusion.gate(data, 1, 1, True, False)
+    assert std[2] == pytest.approx(0.2 + 4 / (config.odometry_two_tag_distance_threshold * 2))
+
+    mask, std, std_omega = fusion.gate(data, 1, 1, True, True)
+    assert mask.all()
+    assert std[0] == pytest.approx(1.5)
+    assert std_omega == pytest.approx([math.radians(9)] * 3)
+
+
+def test_fuse_agreeing(fusion: VisionFusion):
+    measurements = fusion.process([frame(1, 1, 0.100), frame(1.1, 1, 0.105, tag_count=3)], 1, 1, False, False)
+
+    assert len(measurements) == 1
+    x, y, t, std = measurements[0]
+
+    w1, w2 = 1 / 0.5 ** 2, 1 / 0.7 ** 2
+    assert x == pytest.approx((1 * w1 + 1.1 * w2) / (w1 + w2))
+    assert y == pytest.approx(1)
+    assert 0.100 < t < 0.105
+    assert std[0] == pytest.approx(math.sqrt(1 / (w1 + w2)))
+    assert std[0] < 0.5
+
+
+def test_fuse_disagreeing(fusion: VisionFusion):
+    measurements = fusion.process([frame(1, 1, 0.1), frame(1, 1.1, 0.1), frame(3, 3, 0.1)], 1, 1, False, False)
+
+    assert len(measurements) == 2
+    assert measurements[1][:2] == pytest.approx((3, 3))
+    assert measurements[1][3] == pytest.approx((0.5, 0.5, math.radians(44)))
+
+
+def test_fuse_time_clusters(fusion: VisionFusion):
+    measurements = fusion.process([frame(1, 1, 0.2), frame(1, 1, 0.1), frame(1, 1, 0.11)], 1, 1, False, False)
+
+    assert len(measurements) == 2
+    assert [m[2] for m in measurements] == pytest.approx([0.105, 0.2])
+    assert np.count_nonzero(fusion.accepted) == 3
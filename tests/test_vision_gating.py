@@ -0,0 +1,90 @@
+import pytest
+from pytest import MonkeyPatch
+from wpimath.geometry import Pose3d, Rotation3d
+
+import config
+from sensors.vision_fusion import VisionFusion
+from sensors.vision_gating import InnovationGate, InnovationWindow
+
+
+@pytest.fixture
+def gate(monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(config, "odometry_gate_initial_variance", 0.01)
+    return InnovationGate()
+
+
+@pytest.mark.parametrize(
+    "innovation, accepted",
+    [
+        (0.0, True),
+        (0.5, True),
+        (1.5, True),
+        (2.0, False),
+        (-3.0, False),
+    ],
+)
+def test_gate_threshold(gate: InnovationGate, innovation, accepted):
+    # S = 0.01 + 0.5 ** 2 = 0.26, so the cutoff is sqrt(9.21 * 0.26) ~= 1.55m
+    assert gate.test("limelight-f", 2, innovation, 0, 0.5) == accepted
+
+
+def test_variance(gate: InnovationGate):
+    gate.predict(1, 2)
+    variance = 0.01 + config.odometry_gate_process_noise + config.odometry_gate_drift * 2
+    assert gate.variance == pytest.approx(variance)
+
+    gate.test("limelight-f", 2, 0, 0, 0.5)
+    assert gate.variance == pytest.approx(variance * 0.25 / (variance + 0.25))
+
+    variance = gate.variance
+    gate.test("limelight-f", 2, 10, 0, 0.5)
+    assert gate.variance == variance
+
+
+def test_windowed_inflation(gate: InnovationGate, monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(config, "odometry_gate_min_samples", 5)
+
+    # a camera whose good frames are consistently noisier than its std dev claims
+    assert not gate.test("limelight-b", 1, 1.6, 0, 0.5)
+    for _ in range(5):
+        gate.variance = 0.01
+        assert gate.test("limelight-b", 1, 1.5, 0, 0.5)
+
+    gate.variance = 0.01
+    assert gate.test("limelight-b", 1, 1.6, 0, 0.5)
+
+    # other buckets are unaffected
+    gate.variance = 0.01
+    assert not gate.test("limelight-b", 2, 1.6, 0, 0.5)
+
+
+def test_accept_rates(gate: InnovationGate):
+    gate.test("limelight-f", 1, 0, 0, 0.5)
+    gate.test("limelight-f", 1, 10, 0, 0.5)
+    gate.test("limelight-f", 4, 0, 0, 0.5)
+
+    assert gate.accept_rates() == {
+        "limelight-f 1 tag": 0.5,
+        "limelight-f 3+ tag": 1.0,
+    }
+
+
+def test_window_wraps():
+    window = InnovationWindow(3)
+    for nis in (1, 2, 3, 4):
+        window.add(nis, True)
+    window.add(100, False)
+
+    assert window.nis_count == 3
+    assert window.mean_nis() == pytest.approx(3)
+    assert window.accept_rate() == pytest.approx(2 / 3)
+
+
+def test_fusion_uses_gate(gate: InnovationGate):
+    fusion = VisionFusion(8.2, 16.5)
+    frame = (Pose3d(1.5, 1, 0, Rotation3d()), 0, 1, 1, 1, 1, False, "limelight-f")
+
+    # 0.5m off is past the fixed deviation cutoff but well inside the innovation gate
+    assert fusion.process([frame], 1, 1, False, False) == []
+    assert len(fusion.process([frame], 1, 1, False, False, gate)) == 1
+    assert fusion.cameras == ["limelight-f"]
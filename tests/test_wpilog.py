@@ -0,0 +1,154 @@
+import gc
+
+import numpy as np
+import pytest
+from wpiutil.log import BooleanLogEntry, DataLog, DoubleArrayLogEntry, DoubleLogEntry, IntegerLogEntry, StringLogEntry
+
+from utils import log_analysis
+from utils.wpilog import WPILog
+
+
+def write(tmp_path, fill) -> str:
+    """
+    Writes a log with fill(log) and returns its path once the file is finished.
+    """
+    log = DataLog(str(tmp_path), "test.wpilog")
+    fill(log)
+    # the DataLog only finishes writing the file once it is destroyed
+    del log
+    gc.collect()
+    return str(tmp_path / "test.wpilog")
+
+
+def us(seconds: float) -> int:
+    return int(round(seconds * 1e6))
+
+
+@pytest.fixture
+def typed(tmp_path) -> str:
+    def fill(log: DataLog):
+        count = IntegerLogEntry(log, "count")
+        value = DoubleLogEntry(log, "value")
+        ready = BooleanLogEntry(log, "ready")
+        pose = DoubleArrayLogEntry(log, "pose")
+        message = StringLogEntry(log, "message")
+        for i in range(1000):
+            count.append(i, us(1 + i * 0.02))
+            value.append(i / 2, us(1 + i * 0.02))
+            ready.append(i % 3 == 0, us(1 + i * 0.02))
+            pose.append([i, -i, 0.5], us(1 + i * 0.02))
+            if i % 100 == 0:
+                message.append(f"loop {i}", us(1 + i * 0.02))
+
+    return write(tmp_path, fill)
+
+
+def test_channels(typed):
+    with WPILog(typed) as log:
+        assert {"count", "value", "ready", "pose", "message"} <= set(log.names())
+
+        count = log.channel("count")
+        assert count.type == "int64"
+        assert np.array_equal(count.values, np.arange(1000))
+        assert np.allclose(count.timestamps, 1 + np.arange(1000) * 0.02)
+
+        assert np.array_equal(log.channel("value").values, np.arange(1000) / 2)
+        assert np.array_equal(log.channel("ready").values, np.arange(1000) % 3 == 0)
+
+        pose = log.channel("pose").values
+        assert pose.shape == (1000, 3)
+        assert np.array_equal(pose[:, 1], -np.arange(1000))
+
+        assert log.channel("message").values == [f"loop {i}" for i in range(0, 1000, 100)]
+
+        with pytest.raises(KeyError):
+            log.channel("missing")
+
+
+def test_truncated(typed, tmp_path):
+    data = open(typed, "rb").read()
+    cut = tmp_path / "cut.wpilog"
+
+    with WPILog(typed) as full:
+        offsets = full.offsets
+
+    for length in (len(data) - 1, len(data) - 20, len(data) // 2 + 3):
+        cut.write_bytes(data[:length])
+        with WPILog(str(cut)) as log:
+            # only whole records are kept, and they are the same records as in the full log
+            assert np.array_equal(log.offsets, offsets[:len(log.offsets)])
+            count = log.channel("count").values
+            assert np.array_equal(count, np.arange(len(count)))
+
+
+def test_not_a_log(tmp_path):
+    path = tmp_path / "bad.wpilog"
+    path.write_bytes(b"NOTALOG" * 4)
+    with pytest.raises(ValueError):
+        WPILog(str(path))
+
+
+def test_entry_restarted(tmp_path):
+    def fill(log: DataLog):
+        first = log.start("value", "double", "", us(1))
+        log.appendDouble(first, 1.0, us(2))
+        log.finish(first, us(3))
+        log.appendDouble(first, 99.0, us(4))  # after the finish, doesn't belong to anything
+        second = log.start("value", "double", "", us(5))
+        log.appendDouble(second, 2.0, us(6))
+
+    with WPILog(write(tmp_path, fill)) as log:
+        assert np.array_equal(log.channel("value").values, [1.0, 2.0])
+
+
+@pytest.fixture
+def match(tmp_path) -> str:
+    def fill(log: DataLog):
+        pose = DoubleArrayLogEntry(log, log_analysis.POSE)
+        vision = DoubleArrayLogEntry(log, log_analysis.VISION)
+        goal = DoubleArrayLogEntry(log, log_analysis.AUTO_GOAL)
+        ready = BooleanLogEntry(log, log_analysis.READY_TO_SHOOT)
+        target = DoubleLogEntry(log, log_analysis.FLYWHEEL_TARGET)
+
+        time = 1.0
+        target.append(20, us(time))
+        for i in range(200):
+            # every 50th loop overruns to 3 periods
+            time += 0.06 if i % 50 == 49 else 0.02
+            pose.append([time, 0, 0], us(time))
+            if i % 10 == 5:
+                # captured 0.1s ago, 0.25m off in y from where odometry had the robot then
+                vision.append([time - 0.1, 0.25, time - 0.1], us(time))
+            goal.append([time + 0.1, 0, 0], us(time))
+            # drops out for 5 loops every 40 loops
+            ready.append(i % 40 >= 5, us(time))
+
+    return write(tmp_path, fill)
+
+
+def test_reports(match):
+    with WPILog(match) as log:
+        loops, overruns = log_analysis.loop_times(log, period=0.02)
+        assert loops.count == 199
+        assert loops.p50 == pytest.approx(0.02)
+        assert loops.max == pytest.approx(0.06)
+        assert overruns == 4
+
+        vision = log_analysis.vision_residuals(log)
+        assert vision.count == 20
+        assert vision.max == pytest.approx(0.25)
+
+        recovery = log_analysis.flywheel_recovery(log)
+        assert recovery.count == 4
+        assert recovery.p50 == pytest.approx(0.1)
+
+        assert log_analysis.path_tracking(log).mean == pytest.approx(0.1)
+
+        text = log_analysis.report(log)
+        for name in log_analysis.REPORTS:
+            assert name in text
+
+
+def test_report_missing_channels(typed):
+    with WPILog(typed) as log:
+        assert "missing odometry/pose" in log_analysis.report(log, ["loops"])
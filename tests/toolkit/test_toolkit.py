@@ -1,9 +1,17 @@
 import math
 
+import numpy as np
 import pytest
 from pytest import approx
 
-from toolkit.utils.toolkit_math import bounded_angle_diff, clamp, ft_to_m, rotate_vector
+from toolkit.utils.toolkit_math import (
+    NumericalIntegration,
+    bounded_angle_diff,
+    clamp,
+    crossed,
+    ft_to_m,
+    rotate_vector,
+)
 
 
 @pytest.mark.parametrize(
@@ -61,3 +69,149 @@ def test_clamp(val, min, max, expected):
 )
 def test_ft_to_m(val, expected):
     assert ft_to_m(val) == approx(expected)
+
+
+def projectile(t, u):
+    # 4 state projectile with quadratic drag, like TrajectoryCalculator.deriv
+    x, xdot, z, zdot = u
+    speed = math.hypot(xdot, zdot)
+    return xdot, -0.015 * speed * xdot, zdot, -0.015 * speed * zdot - 9.8
+
+
+@pytest.mark.parametrize("scalar", [True, False])
+def test_dormand_prince_exponential(scalar):
+    t, y = NumericalIntegration().dormand_prince(lambda t, y: [-y[0], y[0] - y[1]], (1, 0), 0, 2, 0.01, 1e-10,
+                                                 scalar=scalar)
+    assert t[-1] == 2  # the last step is cut short to land on tf
+    assert y[-1] == approx([math.exp(-2), 2 * math.exp(-2)], abs=1e-8)
+    assert y.shape == (len(t), 2)
+
+
+def test_dormand_prince_evaluations():
+    calls = 0
+
+    def counted(t, u):
+        nonlocal calls
+        calls += 1
+        return projectile(t, u)
+
+    t, _ = NumericalIntegration().dormand_prince(counted, (0, 10, 0, 10), 0, 1.5, 0.001, 1e-9)
+    steps = len(t) - 1
+    # 6 a step (first same as last), plus the first evaluation and any rejected steps
+    assert 6 * steps + 1 <= calls <= 6 * steps + 1 + 6 * 3
+
+
+@pytest.mark.parametrize("scalar", [True, False])
+def test_dormand_prince_matches_adaptive_rk4(scalar):
+    integration = NumericalIntegration()
+    u0 = (0, 15 * math.cos(0.6), 0, 15 * math.sin(0.6))
+
+    def hit(t, u):
+        return u[0] > 5
+
+    t_rk4, y_rk4 = integration.adaptive_rk4(lambda t, u: np.array(projectile(t, u)), u0, 0, 60, 0.001, 1e-9, hit)
+    t_dp, y_dp = integration.dormand_prince(projectile, u0, 0, 60, 0.001, 1e-9, hit, scalar=scalar)
+    assert y_dp[-1][0] > 5 >= y_dp[-2][0]
+
+    # height where the path crosses x = 5
+    def height(y):
+        return np.interp(5, y[:, 0], y[:, 2])
+
+    assert height(y_dp) == approx(height(y_rk4), abs=1e-3)
+
+
+def falling(t, u):
+    # dropped from 10m
+    z, zdot = u
+    return zdot, -9.8
+
+
+@pytest.mark.parametrize("method, kwargs", [
+    ("adaptive_rk4", {}),
+    ("dormand_prince", {"scalar": True}),
+    ("dormand_prince", {"scalar": False}),
+])
+# rk4 is exact on a quadratic, so its error estimate is 0
+@pytest.mark.filterwarnings("error::RuntimeWarning")
+def test_root_located_with_large_steps(method, kwargs):
+    integrate = getattr(NumericalIntegration(), method)
+    f = falling if method == "dormand_prince" else lambda t, u: np.array(falling(t, u))
+
+    # big steps and a loose tolerance, the located crossing is still exact for a quadratic
+    t, y = integrate(f, (10, 0), 0, 60, 0.5, 1e-3, root=lambda t, u: u[0], history=False, **kwargs)
+    assert t == approx(math.sqrt(10 / 4.9), abs=1e-9)
+    assert y == approx([0, -9.8 * math.sqrt(10 / 4.9)], abs=1e-8)
+
+    t_values, y_values = integrate(f, (10, 0), 0, 60, 0.5, 1e-3, root=lambda t, u: u[0], **kwargs)
+    assert t_values[-1] == approx(t)
+    assert y_values[-1] == approx(y, abs=1e-12)
+    assert np.all(y_values[:-1, 0] > 0)
+
+
+def test_root_projectile_height():
+    u0 = (0, 15 * math.cos(0.5), 0, 15 * math.sin(0.5))
+    integration = NumericalIntegration()
+
+    _, reference = integration.dormand_prince(projectile, u0, 0, 60, 1e-4, 1e-14, root=lambda t, u: u[0] - 5,
+                                              history=False)
+    _, y = integration.dormand_prince(projectile, u0, 0, 60, 0.001, 1e-7, root=lambda t, u: u[0] - 5,
+                                      history=False)
+    assert y[0] == approx(5)
+    assert y[2] == approx(reference[2], abs=1e-5)
+
+
+def test_no_root_runs_to_end():
+    t, y = NumericalIntegration().dormand_prince(falling, (10, 0), 0, 1, 0.1, 1e-9, root=lambda t, u: u[0] + 100,
+                                                 history=False)
+    assert t == 1
+    assert y[0] == approx(10 - 4.9)
+
+
+@pytest.mark.parametrize("g0, g1, expected", [
+    (-1, 1, True),
+    (1, -1, True),
+    (-1, 0, True),
+    (-1, -0.5, False),
+    (0, 1, False),
+    (None, 1, False),
+])
+def test_crossed(g0, g1, expected):
+    assert crossed(g0, g1) is expected
+
+
+def projectile_batch(t, u):
+    xdot, zdot = u[:, 1], u[:, 3]
+    drag = -0.015 * np.hypot(xdot, zdot)
+    return np.column_stack((xdot, drag * xdot, zdot, drag * zdot - 9.8))
+
+
+def test_dormand_prince_batch_matches_single():
+    angles = np.linspace(0.2, 1.2, 7)
+    targets = np.linspace(1, 7, 7)
+    u0 = np.column_stack((np.zeros(7), 15 * np.cos(angles), np.zeros(7), 15 * np.sin(angles)))
+    integration = NumericalIntegration()
+
+    t, y, stopped = integration.dormand_prince_batch(
+        lambda t, u, target: projectile_batch(t, u), u0, 0, 60, 0.001, 1e-9,
+        root=lambda t, u, target: u[:, 0] - target, params=targets,
+    )
+    assert stopped.all()
+    for row in range(7):
+        t_single, y_single = integration.dormand_prince(
+            projectile, u0[row], 0, 60, 0.001, 1e-9, root=lambda t, u: u[0] - targets[row], history=False,
+        )
+        assert t[row] == approx(t_single, abs=1e-12)
+        assert y[row] == approx(y_single, abs=1e-12)
+
+
+def test_dormand_prince_batch_end_and_mask():
+    u0 = np.array([[10.0, 0.0], [10.0, 0.0], [10.0, 0.0]])
+    t, y, stopped = NumericalIntegration().dormand_prince_batch(
+        lambda t, u: np.column_stack((u[:, 1], np.full(len(t), -9.8))),
+        u0, 0, np.array([0.5, 1.0, 1.0]), 0.1, 1e-9,
+        root=lambda t, u: u[:, 0], active=[True, True, False],
+    )
+    # nothing hits the ground before tf, and the inactive row doesn't move
+    assert not stopped.any()
+    assert t == approx([0.5, 1.0, 0])
+    assert y[:, 0] == approx([10 - 4.9 * 0.25, 10 - 4.9, 10])
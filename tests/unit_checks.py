@@ -0,0 +1,29 @@
+"""
+Functions whose unit annotations are checked, see units.dimensions.
+
+Used by the unit_checker fixture and by --check-units, which wraps them for the whole session.
+"""
+import config  # noqa, has to be imported before constants
+import constants
+from subsystem import Elevator, Flywheel
+from toolkit.utils import toolkit_math
+from units.dimensions import DimensionChecker
+
+CHECKED_FUNCTIONS = [
+    (Elevator, 'length_to_rotations'),
+    (Elevator, 'rotations_to_length'),
+    (Flywheel, 'linear_velocity_to_angular_velocity'),
+    (Flywheel, 'angular_velocity_to_linear_velocity'),
+    (toolkit_math, 'ft_to_m'),
+    (toolkit_math, 'talon_sensor_units_to_inches'),
+    (toolkit_math, 'talon_sensor_units_to_meters'),
+    (toolkit_math, 'meters_to_talon_sensor_units'),
+    (toolkit_math, 'inches_to_talon_sensor_units'),
+]
+
+
+def wrap_checked_functions() -> DimensionChecker:
+    checker = DimensionChecker(modules=[constants, toolkit_math])
+    for owner, name in CHECKED_FUNCTIONS:
+        checker.wrap(owner, name)
+    return checker
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
-from phoenix6 import StatusCode, StatusSignal, configs, controls, hardware, signals
+import time
+
+from phoenix6 import BaseStatusSignal, StatusCode, StatusSignal, configs, controls, hardware, signals
+from phoenix6 import utils as phoenix_utils
 import config
 from toolkit.motor import PIDMotor
 from units.SI import rotations, rotations_per_second
-from utils import LocalLogger
+import utils
+from toolkit.motors.sim import Plant, SimMotor
 from wpilib import TimedRobot
 radians_per_second_squared = float
 
@@ -95,7 +99,7 @@ class TalonConfig:
 class TalonFX(PIDMotor):
     _motor: hardware.TalonFX
     
-    _logger: LocalLogger
+    _logger: utils.LocalLogger
 
     _config: configs.TalonFXConfigurator
 
@@ -113,6 +117,8 @@ class TalonFX(PIDMotor):
 
     _mm_p_v: controls.MotionMagicVoltage
 
+    _v_o: controls.VoltageOut
+
     _d_o: controls.DutyCycleOut
 
     _foc: bool
@@ -123,6 +129,12 @@ class TalonFX(PIDMotor):
 
     _optimized: bool
 
+    _sim: SimMotor | None = None
+
+    _signal_period: float = 0.02
+
+    _thread_signals: tuple[StatusSignal, StatusSignal] | None = None
+
     def __init__(
         self,
         can_id: int,
@@ -135,7 +147,7 @@ class TalonFX(PIDMotor):
         self._foc = foc
         self._can_id = can_id
         self._talon_config = config
-        self._logger = LocalLogger(f'TalonFX: {can_id}')
+        self._logger = utils.LocalLogger(f'TalonFX: {can_id}')
         self._initialized = False
         self._optimized = optimize
 
@@ -168,7 +180,26 @@ class TalonFX(PIDMotor):
         self._mm_v_v = controls.MotionMagicVelocityVoltage(0)
         self._mm_p_v = controls.MotionMagicVoltage(0)
         self._d_o = controls.DutyCycleOut(0)
+        self._v_o = controls.VoltageOut(0)
         
+    def attach_sim(self, plant: Plant, **overrides) -> SimMotor:
+        """
+        Runs this motor against a simulated plant, with the gains from its TalonConfig.
+
+        Args:
+            plant: The mechanism this motor drives
+            overrides: SimMotor arguments to use instead of the config's
+
+        Returns:
+            SimMotor: the simulated controller, also updated by SimMotor.update_all
+        """
+        gains = {}
+        if self._talon_config is not None:
+            c = self._talon_config
+            gains = dict(kP=c.kP, kI=c.kI, kD=c.kD, kS=c.kF, kV=c.kV, kA=c.kA, current_limit=c.current_limit)
+        self._sim = SimMotor(plant, **{**gains, **overrides, 'volts': True})
+        return self._sim
+
     def error_check(self, status: StatusCode, message: str = ''):
         if TimedRobot.isSimulation():
             return
@@ -178,37 +209,120 @@ class TalonFX(PIDMotor):
                 raise RuntimeError(f'Error: {status} {message}')
 
     def get_sensor_position(self) -> rotations:
+        if self._sim is not None:
+            return self._sim.get_sensor_position()
         self._motor_pos.refresh()
         return self._motor_pos.value
 
     def set_target_position(self, pos: rotations, arbFF: float = 0.0):
+        if self._sim is not None:
+            return self._sim.set_target_position(pos)
         self.error_check(self._motor.set_control(self._mm_p_v.with_position(pos)), f'target position: {pos}, arbFF: {arbFF}')
 
     def set_sensor_position(self, pos: rotations):
+        if self._sim is not None:
+            return self._sim.set_sensor_position(pos)
         self.error_check(self._motor.set_position(pos), f'sensor position: {pos}')
 
     def set_target_velocity(self, vel: rotations_per_second, accel: rotations_per_second_squared = 0):
+        if self._sim is not None:
+            return self._sim.set_target_velocity(vel, acceleration=accel)
         self.error_check(self._motor.set_control(self._mm_v_v.with_velocity(vel).with_acceleration(accel)), f'target velocity: {vel}, accel: {accel}')
 
+    def set_target_voltage(self, voltage: float):
+        """
+        Sets the output voltage of the motor controller in volts, with no closed loop
+
+        Args:
+            voltage (float): The output voltage in volts
+        """
+        if self._sim is not None:
+            return self._sim.set_target_voltage(voltage)
+        self.error_check(self._motor.set_control(self._v_o.with_output(voltage)), f'target voltage: {voltage}')
 
     def set_raw_output(self, x: float):
+        if self._sim is not None:
+            return self._sim.set_raw_output(x)
         self.error_check(self._motor.set_control(self._d_o.with_output(x)), f'raw output: {x}')
 
     def follow(self, master: TalonFX, inverted: bool = False) -> StatusCode.OK:
+        if master._sim is not None:
+            # both motors drive the same plant, so the follower reads the master's simulation
+            self._sim = master._sim
+            return
         self.error_check(self._motor.set_control(controls.Follower(master._can_id, inverted)), f'following {master._can_id} inverted: {inverted}')
 
     def get_sensor_velocity(self) -> rotations_per_second:
+        if self._sim is not None:
+            return self._sim.get_sensor_velocity()
         self._motor_vel.refresh()
         return self._motor_vel.value
     
     def get_sensor_acceleration(self) -> rotations_per_second_squared:
+        if self._sim is not None:
+            return self._sim.get_sensor_acceleration()
         self._motor_accel.refresh()
         return self._motor_accel.value
 
     def get_motor_current(self) -> float:
+        if self._sim is not None:
+            return self._sim.get_motor_current()
         self._motor_current.refresh()
         return self._motor_current.value
 
+    def set_signal_frequency(self, frequency: float):
+        """
+        Updates velocity and torque current at frequency, for code waiting on them with wait_for_signals
+
+        Args:
+            frequency (float): Updates per second
+        """
+        self._signal_period = 1 / frequency
+        if self._sim is not None:
+            return
+        self.error_check(
+            BaseStatusSignal.set_update_frequency_for_all(frequency, *self.__get_thread_signals()),
+            f'signal frequency: {frequency}',
+        )
+
+    def __get_thread_signals(self) -> tuple[StatusSignal, StatusSignal]:
+        """
+        Velocity and torque current signals for a thread other than the robot loop to wait on.
+
+        Status signals aren't thread safe and the device caches them, so these come from a second handle
+        on the same motor, the ones get_sensor_velocity and get_motor_current refresh are never touched.
+        """
+        if self._thread_signals is None:
+            motor = hardware.TalonFX(self._can_id, 'rio')
+            self._thread_signals = motor.get_velocity(), motor.get_torque_current()
+        return self._thread_signals
+
+    @staticmethod
+    def wait_for_signals(
+        timeout: float, *motors: TalonFX
+    ) -> list[tuple[float, rotations_per_second, float]] | None:
+        """
+        Blocks until every motor's next velocity and torque current update, all waited on together so
+        they're from the same frames, simulated ones every signal period
+
+        Args:
+            timeout (float): Longest to wait in seconds
+            motors (TalonFX): Motors to wait on, all simulated or none
+
+        Returns:
+            list: timestamp in Phoenix time, velocity and current for each motor, or None if they didn't
+            all update in time
+        """
+        if motors[0]._sim is not None:
+            time.sleep(min(max(motor._signal_period for motor in motors), timeout))
+            now = phoenix_utils.get_current_time_seconds()
+            return [(now, motor._sim.get_sensor_velocity(), motor._sim.get_motor_current()) for motor in motors]
+
+        signals = [motor.__get_thread_signals() for motor in motors]
+        if BaseStatusSignal.wait_for_all(timeout, *[signal for pair in signals for signal in pair]) != StatusCode.OK:
+            return None
+        return [(current.timestamp.time, velocity.value, current.value) for velocity, current in signals]
+
     def optimize_normal_operation(self, ms: int = 25) -> StatusCode.OK:
         """removes every status signal except for motor position, current, and velocty to optimize bus utilization
 
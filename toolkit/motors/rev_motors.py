@@ -1,16 +1,16 @@
 from __future__ import annotations
 import config
-from utils import LocalLogger, CAN_delay
+import utils
 
 import time  # noqa
 
-from utils import LocalLogger  # noqa
 import rev
 from rev import CANSparkMax, REVLibError, SparkMaxPIDController, SparkMaxRelativeEncoder
 from wpilib import TimedRobot
 
 import config
 from toolkit.motor import PIDMotor
+from toolkit.motors.sim import Plant, SimMotor
 from units.SI import (  # noqa
     radians,
     radians_per_second,
@@ -120,11 +120,12 @@ class SparkMax(PIDMotor):
     pid_controller: SparkMaxPIDController
     _configs: list[SparkMaxConfig] = []
     _has_init_run: bool = False
-    _logger: LocalLogger
+    _logger: utils.LocalLogger
     _abs_encoder = None
     _get_analog = None
     _is_init: bool
     _max_period_rev = 32767
+    _sim: SimMotor | None = None
 
     _optimized_basic_period_rev = 15
 
@@ -160,7 +161,7 @@ class SparkMax(PIDMotor):
                 elif config.DEBUG_MODE:
                     raise TypeError(f'Invalid config type {type(config)}')
 
-        self._logger = LocalLogger(f"SparkMax: {self._can_id}")
+        self._logger = utils.LocalLogger(f"SparkMax: {self._can_id}")
 
         self._has_init_run = False
 
@@ -195,22 +196,22 @@ class SparkMax(PIDMotor):
 
         # self.motor.restoreFactoryDefaults(True)
 
-        CAN_delay(0.5)
+        utils.CAN_delay(0.5)
 
         # Use the default config
         if self._configs[0] is not None and self._brushless:
             for enum, config in enumerate(self._configs):
-                CAN_delay(0.5)
+                utils.CAN_delay(0.5)
                 self._set_config(config, enum)
 
         self.motor.setInverted(self._inverted)
         
         
         
-        CAN_delay(0.5)
+        utils.CAN_delay(0.5)
         self.motor.burnFlash()
         
-        CAN_delay(0.25)
+        utils.CAN_delay(0.25)
 
         self._has_init_run = True
         self._logger.complete("Initialized")
@@ -243,6 +244,32 @@ class SparkMax(PIDMotor):
             self._configs[config_index], config_index
         ) if self._brushless else None
 
+    def attach_sim(self, plant: Plant, **overrides) -> SimMotor:
+        """
+        Runs this motor against a simulated plant, with the gains from its configs, one PID slot each
+
+        Args:
+            plant (Plant): The mechanism this motor drives
+            overrides: SimMotor arguments to use instead of the default config's, for slot 0
+
+        Returns:
+            (SimMotor): The simulated controller, also updated by SimMotor.update_all
+        """
+        def gains(c: SparkMaxConfig | None) -> dict:
+            if c is None:
+                return {}
+            slot = dict(kP=c.k_P or 0, kI=c.k_I or 0, kD=c.k_D or 0, kF=c.k_F or 0)
+            if c.output_range is not None:
+                slot['output_range'] = c.output_range
+            return slot
+
+        # the encoder reports RPM, there is no velocity conversion factor set on it
+        self._sim = SimMotor(plant, **{
+            'velocity_scale': 60, **gains(self._configs[0]), **overrides, 'volts': False,
+            'slots': [gains(c) for c in self._configs[1:]],
+        })
+        return self._sim
+
     def error_check(self, error: REVLibError, message:str=''):
         if TimedRobot.isSimulation():
             return
@@ -270,6 +297,8 @@ class SparkMax(PIDMotor):
         Args:
             x (float): The output of the motor controller (between -1 and 1)
         """
+        if self._sim is not None:
+            return self._sim.set_raw_output(x)
         self.motor.set(x)
 
     def get_absolute_encoder(self):
@@ -287,6 +316,8 @@ class SparkMax(PIDMotor):
         Args:
             pos (float): The target position of the motor controller in rotations
         """
+        if self._sim is not None:
+            return self._sim.set_target_position(pos, arbff, slot)
         result = self.pid_controller.setReference(pos, CANSparkMax.ControlType.kPosition, arbFeedforward=arbff, pidSlot=slot)
         self.error_check(result, f'target position: {pos}, arbff: {arbff}, PID slot: {slot}')
 
@@ -299,6 +330,8 @@ class SparkMax(PIDMotor):
         Args:
             vel (float): The target velocity of the motor controller in rotations per second
         """
+        if self._sim is not None:
+            return self._sim.set_target_velocity(vel, arbff)
         result = self.pid_controller.setReference(vel, CANSparkMax.ControlType.kVelocity, arbFeedforward=arbff)
         self.error_check(result, f'target velocity: {vel} arbff: {arbff}')
 
@@ -309,6 +342,8 @@ class SparkMax(PIDMotor):
         Args:
             voltage (float): The target voltage of the motor controller in volts
         """
+        if self._sim is not None:
+            return self._sim.set_target_voltage(voltage)
         result = self.pid_controller.setReference(voltage, CANSparkMax.ControlType.kVoltage)
         self.error_check(result, f'target voltage: {voltage}')
 
@@ -319,6 +354,8 @@ class SparkMax(PIDMotor):
         Returns:
             (rotations): The sensor position of the motor controller in rotations
         """
+        if self._sim is not None:
+            return self._sim.get_sensor_position()
         return self.encoder.getPosition()
 
     def set_sensor_position(self, pos: rotations):
@@ -328,6 +365,8 @@ class SparkMax(PIDMotor):
         Args:
             pos (rotations): The sensor position of the motor controller in rotations
         """
+        if self._sim is not None:
+            return self._sim.set_sensor_position(pos)
         result = self.encoder.setPosition(pos)
         self.error_check(result, f'set sensor position: {pos}')
 
@@ -338,9 +377,15 @@ class SparkMax(PIDMotor):
         Returns:
             (rotations_per_second): The sensor velocity of the motor controller in rotations per second
         """
+        if self._sim is not None:
+            return self._sim.get_sensor_velocity()
         return self.encoder.getVelocity()
 
     def follow(self, master: SparkMax, inverted: bool = False) -> None:
+        if master._sim is not None:
+            # both motors drive the same plant, so the follower reads the master's simulation
+            self._sim = master._sim
+            return
         result = self.motor.follow(master.motor, inverted)
         self.error_check(result, f'follow master: {master._can_id}, inverted: {inverted}')
 
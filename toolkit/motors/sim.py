@@ -0,0 +1,346 @@
+"""
+Physics backed simulated motors.
+
+Attach a SimMotor to a TalonFX or SparkMax wrapper and every control request and sensor read goes to it
+instead of the vendor sim objects, which have no plant behind them. The SimMotor runs the controller's
+closed loop the way the hardware would, against a DC motor plant (flywheel, elevator, arm, swerve
+drive or steer), so closed loop commands behave like they would on a real mechanism.
+
+Nothing here waits on real time: call SimMotor.update_all(dt) once a loop (physics.py does this under
+`robotpy sim`) and tests can run seconds of mechanism time in milliseconds.
+
+    plant = FlywheelPlant(DCMotor.krakenX60(1), moi=0.0013)
+    Robot.flywheel.motor_1.attach_sim(plant)
+    Robot.flywheel.set_velocity(300, 1)
+    for _ in range(50):
+        SimMotor.update_all(config.period)
+"""
+from __future__ import annotations
+
+import math
+
+from wpimath.system.plant import DCMotor
+
+BATTERY_VOLTAGE: float = 12.0
+GRAVITY: float = 9.8
+REV_LOOP_PERIOD: float = 0.001  # SparkMax kI and kD are per 1ms loop rather than per second
+
+
+class Plant:
+    """
+    A DC motor (or several geared together) driving a mechanism.
+
+    State is the mechanism angle in radians and velocity in radians per second. Each step is integrated
+    exactly for the voltage and load torque at the start of the step, so it stays stable with large
+    steps even for very light mechanisms like a swerve steer.
+
+    :param motor: Motor constants, e.g. DCMotor.NEO(2) for two NEOs on one gearbox
+    :param gearing: Motor rotations per mechanism rotation
+    :param moi: Moment of inertia of the mechanism in kg*m^2
+    :param min_position: Hard stop in mechanism radians
+    :param max_position: Hard stop in mechanism radians
+    """
+
+    def __init__(
+        self,
+        motor: DCMotor,
+        gearing: float,
+        moi: float,
+        min_position: float = -math.inf,
+        max_position: float = math.inf,
+    ):
+        self.motor = motor
+        self.gearing = gearing
+        self.moi = moi
+        self.min_position = min_position
+        self.max_position = max_position
+        self.position: float = 0
+        self.velocity: float = 0
+        self.acceleration: float = 0
+        self.voltage: float = 0
+
+        # d(velocity)/dt = drive * voltage - damping * velocity - load / moi
+        self.drive = gearing * motor.Kt / (motor.R * moi)
+        self.damping = gearing ** 2 * motor.Kt / (motor.R * motor.Kv * moi)
+
+    def load_torque(self) -> float:
+        """
+        Torque the mechanism has to hold against, in N*m at the mechanism. Gravity for elevators and arms.
+        """
+        return 0.0
+
+    def current(self) -> float:
+        """
+        Total motor current in amps for the last voltage.
+        """
+        return (self.voltage - self.velocity * self.gearing / self.motor.Kv) / self.motor.R
+
+    def step(self, voltage: float, dt: float):
+        self.voltage = voltage
+        steady = (self.drive * voltage - self.load_torque() / self.moi) / self.damping
+        decay = math.exp(-self.damping * dt)
+        velocity = steady + (self.velocity - steady) * decay
+        self.position += steady * dt + (self.velocity - steady) * (1 - decay) / self.damping
+        self.acceleration = (velocity - self.velocity) / dt
+        self.velocity = velocity
+
+        if not self.min_position <= self.position <= self.max_position:
+            self.position = min(max(self.position, self.min_position), self.max_position)
+            self.velocity = 0
+
+    @property
+    def motor_rotations(self) -> float:
+        return self.position * self.gearing / (2 * math.pi)
+
+    @motor_rotations.setter
+    def motor_rotations(self, rotations: float):
+        self.position = rotations * 2 * math.pi / self.gearing
+
+    @property
+    def motor_rotations_per_second(self) -> float:
+        return self.velocity * self.gearing / (2 * math.pi)
+
+    @property
+    def motor_rotations_per_second_squared(self) -> float:
+        return self.acceleration * self.gearing / (2 * math.pi)
+
+
+class FlywheelPlant(Plant):
+    """
+    A spinning mass with no load.
+    """
+
+    def __init__(self, motor: DCMotor, moi: float, gearing: float = 1):
+        super().__init__(motor, gearing, moi)
+
+
+class ElevatorPlant(Plant):
+    """
+    A carriage lifted by a drum or sprocket, against gravity.
+
+    :param mass: Carriage mass in kg
+    :param drum_radius: Meters of travel per radian of the drum
+    :param min_height: Bottom hard stop in meters
+    :param max_height: Top hard stop in meters
+    """
+
+    def __init__(
+        self,
+        motor: DCMotor,
+        mass: float,
+        drum_radius: float,
+        gearing: float,
+        min_height: float = 0,
+        max_height: float = math.inf,
+        gravity: bool = True,
+    ):
+        super().__init__(motor, gearing, mass * drum_radius ** 2, min_height / drum_radius, max_height / drum_radius)
+        self.mass = mass
+        self.drum_radius = drum_radius
+        self.gravity = gravity
+
+    def load_torque(self) -> float:
+        return self.mass * GRAVITY * self.drum_radius if self.gravity else 0.0
+
+    @property
+    def height(self) -> float:
+        return self.position * self.drum_radius
+
+
+class ArmPlant(Plant):
+    """
+    A single jointed arm, angle 0 is horizontal.
+
+    :param length: Pivot to tip in meters
+    :param mass: Arm mass in kg, treated as a uniform rod unless moi is given
+    """
+
+    def __init__(
+        self,
+        motor: DCMotor,
+        gearing: float,
+        length: float,
+        mass: float,
+        min_angle: float = -math.inf,
+        max_angle: float = math.inf,
+        moi: float | None = None,
+        gravity: bool = True,
+    ):
+        super().__init__(motor, gearing, moi if moi is not None else mass * length ** 2 / 3, min_angle, max_angle)
+        self.length = length
+        self.mass = mass
+        self.gravity = gravity
+
+    def load_torque(self) -> float:
+        return self.mass * GRAVITY * self.length / 2 * math.cos(self.position) if self.gravity else 0.0
+
+
+class SwerveDrivePlant(Plant):
+    """
+    A swerve module's wheel, pushing its share of the robot's mass.
+
+    :param mass: Robot mass in kg carried by this module (a quarter of the robot for four modules)
+    """
+
+    def __init__(self, motor: DCMotor, gearing: float, wheel_radius: float, mass: float):
+        super().__init__(motor, gearing, mass * wheel_radius ** 2)
+        self.wheel_radius = wheel_radius
+
+
+class SwerveSteerPlant(Plant):
+    """
+    A swerve module turning in place.
+    """
+
+    def __init__(self, motor: DCMotor, gearing: float, moi: float = 0.004):
+        super().__init__(motor, gearing, moi)
+
+
+class SimMotor:
+    """
+    Simulated motor controller running its closed loop against a Plant.
+
+    Positions are in motor rotations. Velocities are in rotations per second times velocity_scale
+    (60 for a SparkMax, which reports RPM without a conversion factor).
+
+    Gains follow the controller they stand in for: a TalonFX's are in volts, kS and kV are the static
+    and velocity feed forwards. A SparkMax's are in duty cycle, kF is the velocity feed forward, and
+    arbitrary feed forward is in volts.
+
+    The constructor's gains are slot 0. slots adds gain sets for the other closed loop slots, each the
+    gain arguments that differ from slot 0, and set_target_position switches to the slot it's given.
+
+    :param substep: Seconds between controller updates, the hardware runs at 1kHz but 200Hz is
+        close enough for these plants and keeps the sim fast
+    """
+
+    instances: list[SimMotor] = []
+    substep: float = 0.005
+
+    def __init__(
+        self,
+        plant: Plant,
+        kP: float = 0,
+        kI: float = 0,
+        kD: float = 0,
+        kS: float = 0,
+        kV: float = 0,
+        kA: float = 0,
+        kF: float = 0,
+        volts: bool = True,
+        output_range: tuple[float, float] = (-1, 1),
+        current_limit: float = 0,
+        velocity_scale: float = 1,
+        slots: list[dict] | None = None,
+    ):
+        self.plant = plant
+        self.kP, self.kI, self.kD = kP, kI, kD
+        self.kS, self.kV, self.kA, self.kF = kS, kV, kA, kF
+        self.volts = volts
+        self.output_range = output_range
+        gains = dict(kP=kP, kI=kI, kD=kD, kS=kS, kV=kV, kA=kA, kF=kF, output_range=output_range)
+        self.slots: list[dict] = [gains] + [{**gains, **slot} for slot in slots or []]
+        self.slot: int = 0
+        self.current_limit = current_limit
+        self.velocity_scale = velocity_scale
+
+        self.mode: str = 'duty'
+        self.target: float = 0
+        self.feed_forward: float = 0
+        self.acceleration: float = 0
+        self.integral: float = 0
+        self.last_error: float | None = None
+        self.offset: float = 0  # sensor position is plant rotations + offset
+
+        SimMotor.instances.append(self)
+
+    @classmethod
+    def update_all(cls, dt: float):
+        """
+        Advances every simulated motor by dt seconds.
+        """
+        for motor in cls.instances:
+            motor.update(dt)
+
+    @classmethod
+    def clear(cls):
+        cls.instances = []
+
+    def _request(self, mode: str, target: float, feed_forward: float = 0, acceleration: float = 0, slot: int = 0):
+        if mode != self.mode or slot != self.slot:
+            self.integral = 0
+            self.last_error = None
+        if slot != self.slot:
+            for name, value in self.slots[slot].items():
+                setattr(self, name, value)
+            self.slot = slot
+        self.mode, self.target, self.feed_forward, self.acceleration = mode, target, feed_forward, acceleration
+
+    def set_raw_output(self, x: float):
+        self._request('duty', x)
+
+    def set_target_voltage(self, voltage: float):
+        self._request('voltage', voltage)
+
+    def set_target_position(self, pos: float, feed_forward: float = 0, slot: int = 0):
+        self._request('position', pos, feed_forward, slot=slot)
+
+    def set_target_velocity(self, vel: float, feed_forward: float = 0, acceleration: float = 0):
+        self._request('velocity', vel, feed_forward, acceleration)
+
+    def get_sensor_position(self) -> float:
+        return self.plant.motor_rotations + self.offset
+
+    def set_sensor_position(self, pos: float):
+        self.offset = pos - self.plant.motor_rotations
+
+    def get_sensor_velocity(self) -> float:
+        return self.plant.motor_rotations_per_second * self.velocity_scale
+
+    def get_sensor_acceleration(self) -> float:
+        return self.plant.motor_rotations_per_second_squared * self.velocity_scale
+
+    def get_motor_current(self) -> float:
+        return self.plant.current()
+
+    def output_voltage(self, dt: float) -> float:
+        """
+        What the controller would apply this update, before the current limit.
+        """
+        if self.mode == 'duty':
+            return self.target * BATTERY_VOLTAGE
+        if self.mode == 'voltage':
+            return self.target
+
+        if self.mode == 'position':
+            error = self.target - self.get_sensor_position()
+            static = self.kS * math.copysign(1, error) if error else 0.0
+            feed = 0.0
+        else:
+            error = self.target - self.get_sensor_velocity()
+            static = self.kS * math.copysign(1, self.target) if self.target else 0.0
+            feed = self.kV * self.target + self.kA * self.acceleration
+        # a SparkMax applies kF to the setpoint in every closed loop mode
+        feed += self.kF * self.target
+
+        period = 1.0 if self.volts else REV_LOOP_PERIOD
+        self.integral += error * dt / period
+        derivative = 0.0 if self.last_error is None else (error - self.last_error) / dt * period
+        self.last_error = error
+        output = self.kP * error + self.kI * self.integral + self.kD * derivative + feed + static
+
+        if self.volts:
+            return min(max(output, -BATTERY_VOLTAGE), BATTERY_VOLTAGE) + self.feed_forward
+        low, high = self.output_range
+        return min(max(output, low), high) * BATTERY_VOLTAGE + self.feed_forward
+
+    def update(self, dt: float):
+        steps = max(1, round(dt / self.substep))
+        for _ in range(steps):
+            voltage = min(max(self.output_voltage(dt / steps), -BATTERY_VOLTAGE), BATTERY_VOLTAGE)
+            if self.current_limit > 0:
+                # the most voltage that keeps the current under the limit at this speed
+                back_emf = self.plant.motor_rotations_per_second * 2 * math.pi / self.plant.motor.Kv
+                headroom = self.current_limit * self.plant.motor.R
+                voltage = min(max(voltage, back_emf - headroom), back_emf + headroom)
+            self.plant.step(voltage, dt / steps)
@@ -16,6 +16,8 @@ class Pigeon2(BaseGyro):
             port (int): CAN ID of the Pigeon gyro
         """
         self._gyro = phoenix6.hardware.Pigeon2(port)
+        self._yaw = self._gyro.get_yaw()
+        self._yaw_rate = self._gyro.get_angular_velocity_z_world()
 
     def init(self, gyro_start_angle=0):
         """
@@ -37,6 +39,15 @@ class Pigeon2(BaseGyro):
         """
         return math.radians(self._gyro.get_angular_velocity_z_world().value)
 
+    def refresh_heading(self) -> tuple[radians, radians_per_second]:
+        """
+        Refreshes yaw and yaw rate in a single synchronized read
+        :return: Latency compensated robot heading (radians) and heading rate (radians per second)
+        """
+        phoenix6.BaseStatusSignal.refresh_all(self._yaw, self._yaw_rate)
+        heading = phoenix6.BaseStatusSignal.get_latency_compensated_value(self._yaw, self._yaw_rate)
+        return math.radians(heading), math.radians(self._yaw_rate.value)
+
     def get_robot_pitch(self) -> radians:
         """
         Returns the angle of the robot's pitch in radians
@@ -3,6 +3,16 @@ from typing import Callable
 
 import numpy as np
 
+from toolkit.utils.units import feet, inches, meters
+
+# drivetrain geometry used by the talon sensor unit conversions
+TALON_SENSOR_UNITS_PER_ROTATION: float = 2048.0
+LOW_GEAR_RATIO: float = 15.45
+HIGH_GEAR_RATIO: float = 8.21
+WHEEL_CIRCUMFERENCE: inches = 6 * math.pi
+METERS_PER_INCH: float = 0.0254
+METERS_PER_FOOT: float = 0.3048
+
 
 def bounded_angle_diff(theta_from: float, theta_too: float) -> float:
     """
@@ -43,7 +53,7 @@ def clamp(val: float, _min: float, _max: float):
     return val
 
 
-def ft_to_m(ft: float):
+def ft_to_m(ft: feet) -> meters:
     """
     Converts feet to meters
 
@@ -53,10 +63,10 @@ def ft_to_m(ft: float):
     Returns:
         float: meters (float)
     """
-    return ft * 0.3048
+    return ft * METERS_PER_FOOT
 
 
-def talon_sensor_units_to_inches(sensor_units: float, low_gear: bool) -> float:
+def talon_sensor_units_to_inches(sensor_units: float, low_gear: bool) -> inches:
     """
     Converts sensor units to inches
 
@@ -67,19 +77,17 @@ def talon_sensor_units_to_inches(sensor_units: float, low_gear: bool) -> float:
     Returns:
         inches as a float
     """
-    motor_rotations = sensor_units / 2048.0
+    motor_rotations = sensor_units / TALON_SENSOR_UNITS_PER_ROTATION
 
     if low_gear:
-        wheelbase_rotations = motor_rotations / 15.45  # Low gear
+        wheelbase_rotations = motor_rotations / LOW_GEAR_RATIO
     else:
-        wheelbase_rotations = motor_rotations / 8.21  # High gear
+        wheelbase_rotations = motor_rotations / HIGH_GEAR_RATIO
 
-    inches = wheelbase_rotations * (6 * math.pi)
+    return wheelbase_rotations * WHEEL_CIRCUMFERENCE
 
-    return inches
 
-
-def talon_sensor_units_to_meters(sensor_units: float, low_gear: bool) -> float:
+def talon_sensor_units_to_meters(sensor_units: float, low_gear: bool) -> meters:
     """
     Converts sensor units to meters
 
@@ -90,10 +98,10 @@ def talon_sensor_units_to_meters(sensor_units: float, low_gear: bool) -> float:
     Returns:
         meters as a float
     """
-    return talon_sensor_units_to_inches(sensor_units, low_gear) * 0.0254
+    return talon_sensor_units_to_inches(sensor_units, low_gear) * METERS_PER_INCH
 
 
-def meters_to_talon_sensor_units(meters: float, low_gear: bool) -> float:
+def meters_to_talon_sensor_units(meters: meters, low_gear: bool) -> float:
     """
     Converts meters to sensor units
 
@@ -104,10 +112,10 @@ def meters_to_talon_sensor_units(meters: float, low_gear: bool) -> float:
     Returns:
         sensor units as a float
     """
-    return inches_to_talon_sensor_units(meters / 0.0254, low_gear)
+    return inches_to_talon_sensor_units(meters / METERS_PER_INCH, low_gear)
 
 
-def inches_to_talon_sensor_units(inches: float, low_gear: bool) -> float:
+def inches_to_talon_sensor_units(inches: inches, low_gear: bool) -> float:
     """
     Converts inches to sensor units
 
@@ -118,19 +126,38 @@ def inches_to_talon_sensor_units(inches: float, low_gear: bool) -> float:
     Returns:
         sensor units as a float
     """
-    wheelbase_rotations = inches / (6 * math.pi)
+    wheelbase_rotations = inches / WHEEL_CIRCUMFERENCE
 
     if low_gear:
-        motor_rotations = wheelbase_rotations * 15.45  # Low gear
+        motor_rotations = wheelbase_rotations * LOW_GEAR_RATIO
     else:
-        motor_rotations = wheelbase_rotations * 8.21  # High gear
+        motor_rotations = wheelbase_rotations * HIGH_GEAR_RATIO
+
+    return motor_rotations * TALON_SENSOR_UNITS_PER_ROTATION
 
-    sensor_units = motor_rotations * 2048.0
 
-    return sensor_units
+# Dormand-Prince 5(4) tableau: nodes, stage weights, 5th order weights, and the 5th minus 4th order weights
+DP_C = (0.0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1.0, 1.0)
+DP_A = (
+    (),
+    (1 / 5,),
+    (3 / 40, 9 / 40),
+    (44 / 45, -56 / 15, 32 / 9),
+    (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+    (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+)
+DP_B = (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84)
+DP_E = (71 / 57600, 0.0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40)
+
+# systems this size or smaller use Python floats instead of NumPy arrays by default
+SCALAR_MAX_SIZE: int = 8
 
 
 class NumericalIntegration:
+    def __init__(self):
+        # stage buffers for dormand_prince, by system size, reused between calls
+        self._stages: dict[int, tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = {}
+
     def rk4_step(self, func: Callable, y, t, h):
         """
         Perform a single RK4 step for a system of ODEs.
@@ -147,7 +174,7 @@ class NumericalIntegration:
 
         return y + (k1 + 2 * k2 + 2 * k3 + k4) / 6
 
-    def adaptive_rk4(self, func, y0, t0, tf, h0, tol, event=None):
+    def adaptive_rk4(self, func, y0, t0, tf, h0, tol, event=None, root=None, history: bool = True):
         """
         RK4 with adaptive step size for a system of ODEs.
         :param func: Function representing the ODE system.
@@ -157,14 +184,16 @@ class NumericalIntegration:
         :param h0: Initial step size.
         :param tol: Tolerance for adaptive step size.
         :param event: Optional function that returns true when the integration should stop.
-        :return: Arrays of t values and y values (as a matrix).
+        :param root: Optional function of (t, y) to stop exactly where it changes sign, see locate_event.
+        :param history: Return every step, or only the last t and y.
+        :return: Arrays of t values and y values (as a matrix), or the last t and y when history is False.
         """
-        t_values = [t0]
-        y_values = [y0]
+        output = _Output(t0, y0, history)
 
         t = t0
         y = y0
         h = h0
+        g = root(t, y) if root is not None else None
 
         while t < tf:
             # Estimate one step with two half steps
@@ -179,11 +208,16 @@ class NumericalIntegration:
 
             # Adjust step size
             if error < tol:
+                if root is not None:
+                    g_new = root(t + h, y_temp)
+                    if crossed(g, g_new):
+                        output.append(*locate_event(root, t, y, func(t, y), g, t + h, y_temp, func(t + h, y_temp), g_new))
+                        break
+                    g = g_new
                 t += h
                 y = y_temp
-                t_values.append(t)
-                y_values.append(y)
-                h = h * min(2, (tol / error) ** 0.25)  # Increase step size
+                output.append(t, y)
+                h = h * (2 if error == 0 else min(2, (tol / error) ** 0.25))  # Increase step size
             else:
                 h = h * max(0.5, (tol / error) ** 0.25)  # Decrease step size
             # Check to see if end condition met
@@ -191,7 +225,371 @@ class NumericalIntegration:
                 if event(t, y):
                     break
 
-        return np.array(t_values), np.array(y_values)
+        return output.result()
+
+    def dormand_prince(self, func, y0, t0, tf, h0, tol, event=None, root=None, history: bool = True,
+                       scalar: bool | None = None):
+        """
+        Embedded RK45 (Dormand-Prince) with adaptive step size for a system of ODEs.
+
+        Same call and return as adaptive_rk4, but each accepted step costs 6 derivative evaluations
+        instead of 12: the error estimate comes from the embedded 4th order solution, and the last
+        evaluation of a step is the first of the next one (FSAL). Steps never go past tf.
+
+        :param func: Function representing the ODE system. For scalar systems it is called with a tuple
+            of floats and can return any sequence, e.g. a tuple.
+        :param y0: Initial values of the dependent variables (as a vector).
+        :param t0: Initial value of the independent variable.
+        :param tf: Final value of the independent variable.
+        :param h0: Initial step size.
+        :param tol: Tolerance on the error norm of each step.
+        :param event: Optional function that returns true when the integration should stop.
+        :param root: Optional function of (t, y) to stop exactly where it changes sign, see locate_event.
+        :param history: Return every step, or only the last t and y.
+        :param scalar: Step with Python floats rather than NumPy arrays, which is faster for a handful
+            of states. Defaults to systems of up to SCALAR_MAX_SIZE states.
+        :return: Arrays of t values and y values (as a matrix), or the last t and y when history is False.
+        """
+        size = len(y0)
+        if scalar is None:
+            scalar = size <= SCALAR_MAX_SIZE
+        if scalar:
+            return self._dormand_prince_scalar(func, y0, t0, tf, h0, tol, event, root, history)
+        return self._dormand_prince_vector(func, y0, t0, tf, h0, tol, event, root, history)
+
+    @staticmethod
+    def _step_factor(error: float, tol: float) -> float:
+        if error == 0:
+            return 5.0
+        return min(5.0, max(0.2, 0.9 * (tol / error) ** 0.2))
+
+    def _dormand_prince_scalar(self, func, y0, t0, tf, h0, tol, event, root, history):
+        c2, c3, c4, c5 = DP_C[1:5]
+        (a21,), (a31, a32), (a41, a42, a43), (a51, a52, a53, a54), (a61, a62, a63, a64, a65) = DP_A[1:]
+        b1, _, b3, b4, b5, b6 = DP_B
+        e1, _, e3, e4, e5, e6, e7 = DP_E
+
+        y = tuple(float(value) for value in y0)
+        output = _Output(t0, y, history)
+
+        t = t0
+        h = h0
+        k1 = func(t, y)
+        g = root(t, y) if root is not None else None
+        while t < tf:
+            h = min(h, tf - t)
+            k2 = func(t + c2 * h, tuple(v + h * a21 * p for v, p in zip(y, k1)))
+            k3 = func(t + c3 * h, tuple(v + h * (a31 * p + a32 * q) for v, p, q in zip(y, k1, k2)))
+            k4 = func(t + c4 * h, tuple(
+                v + h * (a41 * p + a42 * q + a43 * r) for v, p, q, r in zip(y, k1, k2, k3)
+            ))
+            k5 = func(t + c5 * h, tuple(
+                v + h * (a51 * p + a52 * q + a53 * r + a54 * s) for v, p, q, r, s in zip(y, k1, k2, k3, k4)
+            ))
+            k6 = func(t + h, tuple(
+                v + h * (a61 * p + a62 * q + a63 * r + a64 * s + a65 * u)
+                for v, p, q, r, s, u in zip(y, k1, k2, k3, k4, k5)
+            ))
+            y_new = tuple(
+                v + h * (b1 * p + b3 * r + b4 * s + b5 * u + b6 * w)
+                for v, p, r, s, u, w in zip(y, k1, k3, k4, k5, k6)
+            )
+            k7 = func(t + h, y_new)
+
+            error = h * math.sqrt(sum(
+                (e1 * p + e3 * r + e4 * s + e5 * u + e6 * w + e7 * x) ** 2
+                for p, r, s, u, w, x in zip(k1, k3, k4, k5, k6, k7)
+            ))
+
+            if error < tol:
+                if root is not None:
+                    g_new = root(t + h, y_new)
+                    if crossed(g, g_new):
+                        output.append(*locate_event(root, t, y, k1, g, t + h, y_new, k7, g_new))
+                        break
+                    g = g_new
+                t += h
+                y = y_new
+                k1 = k7
+                output.append(t, y)
+                if event is not None and event(t, y):
+                    break
+            h *= self._step_factor(error, tol)
+
+        return output.result()
+
+    def _dormand_prince_vector(self, func, y0, t0, tf, h0, tol, event, root, history):
+        size = len(y0)
+        if size not in self._stages:
+            self._stages[size] = (np.empty((7, size)), np.empty(size), np.empty(size), np.empty(size))
+        k, stage, y_new, error_vector = self._stages[size]
+        a, b, e = [np.array(row) for row in DP_A], np.array(DP_B), np.array(DP_E)
+
+        y = np.array(y0, dtype=float)
+        output = _Output(t0, y, history)
+
+        t = t0
+        h = h0
+        k[0] = func(t, y)
+        g = root(t, y) if root is not None else None
+        while t < tf:
+            h = min(h, tf - t)
+            for i in range(1, 6):
+                np.dot(a[i], k[:i], out=stage)
+                stage *= h
+                stage += y
+                k[i] = func(t + DP_C[i] * h, stage)
+            np.dot(b, k[:6], out=y_new)
+            y_new *= h
+            y_new += y
+            k[6] = func(t + h, y_new)
+
+            np.dot(e, k, out=error_vector)
+            error = h * math.sqrt(np.dot(error_vector, error_vector))
+
+            if error < tol:
+                if root is not None:
+                    g_new = root(t + h, y_new)
+                    if crossed(g, g_new):
+                        t_event, y_event = locate_event(root, t, y, k[0], g, t + h, y_new, k[6], g_new)
+                        output.append(t_event, np.array(y_event))
+                        break
+                    g = g_new
+                t += h
+                y[:] = y_new
+                k[0] = k[6]
+                output.append(t, y)
+                if event is not None and event(t, output.y):
+                    break
+            h *= self._step_factor(error, tol)
+
+        return output.result()
+
+
+    def dormand_prince_batch(self, func, y0, t0, tf, h0, tol, root=None, params=None, active=None):
+        """
+        Dormand-Prince for many initial conditions at once, every row with its own step size.
+
+        func and root are vectorized: they are called with only the rows still running, t of shape (M,)
+        and y of shape (M, size), and return dy/dt of shape (M, size) and the root of shape (M,). When
+        params is given they are called with the matching rows of it as a third argument, for anything
+        that differs between rows like a target distance.
+
+        Each row stops at tf or, with root, exactly where root changes sign, see locate_events.
+
+        :param y0: Initial values, shape (N, size).
+        :param t0: Initial value of the independent variable, a float or shape (N,).
+        :param tf: Final value of the independent variable, a float or shape (N,).
+        :param h0: Initial step size.
+        :param tol: Tolerance on the error norm of each row's step.
+        :param root: Optional vectorized function to stop each row exactly where it changes sign.
+        :param params: Optional per row parameters, shape (N, ...), passed on to func and root.
+        :param active: Optional boolean mask of the rows to integrate, the rest are returned as they are.
+        :return: t of shape (N,), y of shape (N, size), and a mask of the rows stopped by root.
+        """
+        y = np.array(y0, dtype=float)
+        n, size = y.shape
+        t = np.array(np.broadcast_to(t0, n), dtype=float)
+        tf = np.broadcast_to(np.asarray(tf, dtype=float), n)
+        h = np.full(n, float(h0))
+        stopped = np.zeros(n, dtype=bool)
+        running = np.ones(n, dtype=bool) if active is None else np.array(active, dtype=bool)
+        running &= t < tf
+        a, b, e = [np.array(row) for row in DP_A], np.array(DP_B), np.array(DP_E)
+
+        def call(f, rows, t_rows, y_rows):
+            if params is None:
+                return f(t_rows, y_rows)
+            return f(t_rows, y_rows, params[rows])
+
+        rows = np.flatnonzero(running)
+        k_first = np.empty((n, size))
+        k_first[rows] = call(func, rows, t[rows], y[rows])
+        g = np.zeros(n)
+        if root is not None:
+            g[rows] = call(root, rows, t[rows], y[rows])
+
+        while rows.size:
+            t_rows, y_rows = t[rows], y[rows]
+            h_rows = np.minimum(h[rows], tf[rows] - t_rows)
+            h_column = h_rows[:, None]
+
+            k = np.empty((7, rows.size, size))
+            k[0] = k_first[rows]
+            for i in range(1, 6):
+                k[i] = call(func, rows, t_rows + DP_C[i] * h_rows, y_rows + h_column * np.tensordot(a[i], k[:i], 1))
+            y_new = y_rows + h_column * np.tensordot(b, k[:6], 1)
+            k[6] = call(func, rows, t_rows + h_rows, y_new)
+
+            error = h_rows * np.linalg.norm(np.tensordot(e, k, 1), axis=1)
+            accepted = error < tol
+
+            if root is not None:
+                g_rows = g[rows]
+                g_new = call(root, rows, t_rows + h_rows, y_new)
+                event = accepted & (g_rows != 0) & ((g_new == 0) | ((g_rows < 0) != (g_new < 0)))
+                if event.any():
+                    located = rows[event]
+                    t[located], y[located] = locate_events(
+                        (lambda t_event, y_event, which: call(root, located[which], t_event, y_event)),
+                        t_rows[event], y_rows[event], k[0, event], g_rows[event],
+                        t_rows[event] + h_rows[event], y_new[event], k[6, event], g_new[event],
+                    )
+                    stopped[located] = True
+                    running[located] = False
+                    accepted &= ~event
+                g[rows[accepted]] = g_new[accepted]
+
+            stepped = rows[accepted]
+            t[stepped] = t_rows[accepted] + h_rows[accepted]
+            y[stepped] = y_new[accepted]
+            k_first[stepped] = k[6, accepted]
+            running[stepped] = t[stepped] < tf[stepped]
+
+            factor = np.full(rows.size, 5.0)
+            nonzero = error > 0
+            factor[nonzero] = np.clip(0.9 * (tol / error[nonzero]) ** 0.2, 0.2, 5.0)
+            h[rows] = h_rows * factor
+
+            rows = np.flatnonzero(running)
+
+        return t, y, stopped
+
+class _Output:
+    """
+    The accepted steps of an integration, kept in arrays that double when full, or only the last one.
+    """
+
+    def __init__(self, t0, y0, history: bool):
+        self.history = history
+        self.t = t0
+        self.y = y0
+        if history:
+            self.t_values = np.empty(64)
+            self.y_values = np.empty((64, len(y0)))
+            self.count = 0
+            self.append(t0, y0)
+
+    def append(self, t, y):
+        self.t = t
+        if not self.history:
+            self.y = y
+            return
+        if self.count == len(self.t_values):
+            self.t_values = np.resize(self.t_values, 2 * self.count)
+            self.y_values = np.resize(self.y_values, (2 * self.count, self.y_values.shape[1]))
+        self.t_values[self.count] = t
+        self.y_values[self.count] = y
+        # a view of the stored row, safe to hand to an event function
+        self.y = self.y_values[self.count]
+        self.count += 1
+
+    def result(self):
+        if self.history:
+            return self.t_values[:self.count], self.y_values[:self.count]
+        # copied, the vector integrator steps y in place
+        return self.t, np.array(self.y, dtype=float)
+
+
+def crossed(g0: float | None, g1: float) -> bool:
+    """
+    Whether an event function changed sign over a step, starting exactly on zero doesn't count.
+    """
+    return g0 is not None and g0 != 0 and (g1 == 0 or (g0 < 0) != (g1 < 0))
+
+
+def hermite_interpolate(t0, y0, f0, t1, y1, f1, t) -> tuple[float, ...]:
+    """
+    Cubic Hermite interpolation of a solution inside a step, from its values and derivatives at both ends.
+    """
+    h = t1 - t0
+    s = (t - t0) / h
+    h00 = (1 + 2 * s) * (1 - s) ** 2
+    h10 = s * (1 - s) ** 2
+    h01 = s * s * (3 - 2 * s)
+    h11 = s * s * (s - 1)
+    return tuple(h00 * a + h10 * h * p + h01 * b + h11 * h * q for a, p, b, q in zip(y0, f0, y1, f1))
+
+
+def locate_event(root, t0, y0, f0, g0, t1, y1, f1, g1, tol: float = 1e-12, max_iterations: int = 50):
+    """
+    Finds where root(t, y) crosses zero inside a step, using the step's Hermite interpolant for y.
+
+    Uses the Illinois variant of regula falsi, so it converges from both sides of the root.
+
+    :param g0: root at the start of the step
+    :param g1: root at the end of the step, with the opposite sign
+    :param tol: Stop once t moves less than this
+    :return: (t, y) at the crossing
+    """
+    if g1 == 0:
+        return t1, tuple(y1)
+
+    low, g_low, high, g_high = t0, g0, t1, g1
+    t, y = t1, tuple(y1)
+    side = 0
+    for _ in range(max_iterations):
+        t_new = (low * g_high - high * g_low) / (g_high - g_low)
+        converged = abs(t_new - t) <= tol
+        t = t_new
+        y = hermite_interpolate(t0, y0, f0, t1, y1, f1, t)
+        g = root(t, y)
+        if g == 0 or converged:
+            break
+        if (g < 0) == (g_high < 0):
+            high, g_high = t, g
+            if side == -1:
+                g_low /= 2
+            side = -1
+        else:
+            low, g_low = t, g
+            if side == 1:
+                g_high /= 2
+            side = 1
+    return t, y
+
+
+def locate_events(root, t0, y0, f0, g0, t1, y1, f1, g1, tol: float = 1e-12, max_iterations: int = 50):
+    """
+    locate_event for many steps at once, every argument has a leading row axis.
+
+    root is called as root(t, y, rows) with the indices of the rows still being refined.
+
+    :return: (t, y) at the crossings, shapes (M,) and (M, size)
+    """
+    h = (t1 - t0)[:, None]
+
+    def interpolate(rows, t):
+        s = ((t - t0[rows]) / (t1[rows] - t0[rows]))[:, None]
+        return (
+            (1 + 2 * s) * (1 - s) ** 2 * y0[rows] + s * (1 - s) ** 2 * h[rows] * f0[rows]
+            + s * s * (3 - 2 * s) * y1[rows] + s * s * (s - 1) * h[rows] * f1[rows]
+        )
+
+    low, g_low, high, g_high = t0.copy(), g0.copy(), t1.copy(), g1.copy()
+    t, y = t1.copy(), y1.copy()
+    side = np.zeros(len(t0))
+    done = g1 == 0
+    for _ in range(max_iterations):
+        rows = np.flatnonzero(~done)
+        if not rows.size:
+            break
+        t_new = (low[rows] * g_high[rows] - high[rows] * g_low[rows]) / (g_high[rows] - g_low[rows])
+        converged = np.abs(t_new - t[rows]) <= tol
+        t[rows] = t_new
+        y[rows] = interpolate(rows, t_new)
+        g = root(t_new, y[rows], rows)
+        done[rows] = (g == 0) | converged
+
+        upper = (g < 0) == (g_high[rows] < 0)
+        above, below = rows[upper], rows[~upper]
+        high[above], g_high[above] = t_new[upper], g[upper]
+        g_low[above[side[above] == -1]] /= 2
+        side[above] = -1
+        low[below], g_low[below] = t_new[~upper], g[~upper]
+        g_high[below[side[below] == 1]] /= 2
+        side[below] = 1
+    return t, y
 
 
 def extrapolate(x, x1, y1, x2, y2):
@@ -18,6 +18,8 @@
 
 # --- TYPING ---
 meters = float
+inches = float
+feet = float
 radians = float
 seconds = float
 meters_per_second = float
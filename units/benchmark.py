@@ -0,0 +1,85 @@
+"""
+Times common Unum conversions with and without the conversion cache, and a scalar loop against UnumArray.
+
+Usage:
+    python -m units.benchmark
+    python -m units.benchmark --number 20000
+"""
+import argparse
+import timeit
+from typing import Callable
+
+import numpy as np
+
+from units import Unum, UnumArray
+
+
+def define_units() -> dict[str, Unum]:
+    """
+    A small unit table like the one the robot code would use.
+    """
+    unit = Unum.unit
+    m = unit('m', 0, 'meter')
+    s = unit('s', 0, 'second')
+    rad = unit('rad', 0, 'radian')
+    ft = unit('ft', 0.3048 * m, 'foot')
+    inch = unit('in', ft / 12, 'inch')
+    minute = unit('min', 60 * s, 'minute')
+    deg = unit('deg', np.pi / 180 * rad, 'degree')
+    rev = unit('rev', 360 * deg, 'revolution')
+    return {'m': m, 's': s, 'ft': ft, 'in': inch, 'min': minute, 'deg': deg, 'rev': rev, 'rad': rad}
+
+
+def cases(u: dict[str, Unum]) -> dict[str, Callable]:
+    m, s, ft, inch, minute, deg, rev, rad = (u[name] for name in ('m', 's', 'ft', 'in', 'min', 'deg', 'rev', 'rad'))
+    return {
+        'inches to meters': lambda: (27 * inch).asNumber(m),
+        'feet + inches': lambda: 3 * ft + 4 * inch,
+        'rpm to rad/s': lambda: (6000 * rev / minute).asUnit(rad / s),
+        'compare lengths': lambda: 2 * ft < 1 * m,
+        'degrees to radians': lambda: float((45 * deg) / rad),
+    }
+
+
+def run(number: int) -> list[tuple[str, float, float]]:
+    """
+    :return: (case, µs per call uncached, µs per call cached) for every case
+    """
+    table = Unum.getUnitTable()
+    cache = Unum.CACHE
+    Unum.reset()
+    try:
+        u = define_units()
+        results = []
+        for name, case in cases(u).items():
+            Unum.CACHE = False
+            uncached = timeit.timeit(case, number=number) / number * 1e6
+            Unum.CACHE = True
+            Unum.clearCache()
+            cached = timeit.timeit(case, number=number) / number * 1e6
+            results.append((name, uncached, cached))
+
+        # the same conversion on many values, one Unum each against one UnumArray
+        Unum.CACHE = True
+        values = np.linspace(0, 100, 1000)
+        scalar = timeit.timeit(lambda: [(value * u['in']).asNumber(u['m']) for value in values], number=10) / 10 * 1e6
+        array = timeit.timeit(lambda: UnumArray(values, u['in']).asNumber(u['m']), number=10) / 10 * 1e6
+        results.append((f'{len(values)} values, Unum vs UnumArray', scalar, array))
+        return results
+    finally:
+        Unum.reset(table)
+        Unum.CACHE = cache
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Benchmark Unum conversions")
+    parser.add_argument("--number", type=int, default=5000, help="calls per case")
+    args = parser.parse_args(argv)
+
+    print(f"{'case':<36}{'before':>12}{'after':>12}{'speed-up':>10}")
+    for name, before, after in run(args.number):
+        print(f"{name:<36}{before:>10.2f}us{after:>10.2f}us{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+Test-time dimensional checking for the unit type aliases.
+
+The aliases in units.SI and toolkit.utils.units are plain floats, so at runtime an annotation like
+``length: meters`` is just ``length: float`` and costs nothing. This module reads the alias names back
+out of the source instead, and in tests re-runs annotated functions with Quantity values that carry
+a dimension, so mixing up units (adding meters to seconds, returning meters from a function annotated
+radians_per_second, ...) fails a test rather than costing anything on the robot.
+
+Angles are treated as dimensionless (a radian is a meter of arc per meter of radius), so converting
+between linear and angular velocity with a radius checks out.
+
+Usage in a test:
+    checker = DimensionChecker(modules=[constants])
+    checker.wrap(Elevator, 'length_to_rotations')
+    ...  # run code that calls Elevator.length_to_rotations
+    checker.unwrap()
+"""
+import ast
+import functools
+import inspect
+import random
+import textwrap
+from fractions import Fraction
+from types import ModuleType
+from typing import Callable
+
+# (length, time, mass) exponents
+Dimension = tuple[Fraction, Fraction, Fraction]
+
+
+def _dimension(length: int = 0, time: int = 0, mass: int = 0) -> Dimension:
+    return Fraction(length), Fraction(time), Fraction(mass)
+
+
+DIMENSIONLESS = _dimension()
+LENGTH = _dimension(length=1)
+TIME = _dimension(time=1)
+MASS = _dimension(mass=1)
+
+# every alias name in units.SI and toolkit.utils.units
+DIMENSIONS: dict[str, Dimension] = {
+    'float': DIMENSIONLESS,
+    'int': DIMENSIONLESS,
+    'meters': LENGTH,
+    'inches': LENGTH,
+    'feet': LENGTH,
+    'yards': LENGTH,
+    'miles': LENGTH,
+    'rotations': DIMENSIONLESS,
+    'degrees': DIMENSIONLESS,
+    'radians': DIMENSIONLESS,
+    'seconds': TIME,
+    'minutes': TIME,
+    'hours': TIME,
+    'days': TIME,
+    'meters_per_second': _dimension(length=1, time=-1),
+    'meters_per_second_squared': _dimension(length=1, time=-2),
+    'miles_per_hour': _dimension(length=1, time=-1),
+    'radians_per_second': _dimension(time=-1),
+    'radians_per_second_squared': _dimension(time=-2),
+    'degrees_per_second': _dimension(time=-1),
+    'rotations_per_second': _dimension(time=-1),
+    'rotations_per_minute': _dimension(time=-1),
+    'rotations_per_minute_per_meter': _dimension(length=-1, time=-1),
+    'rotations_per_minute_per_second': _dimension(time=-2),
+    'radians_per_meter': _dimension(length=-1),
+    'meters_per_radian': LENGTH,
+    'pounds': MASS,
+    'kilograms': MASS,
+}
+
+
+class DimensionError(TypeError):
+    """Values with different dimensions were combined, or a result didn't match its annotation."""
+    pass
+
+
+def format_dimension(dimension: Dimension) -> str:
+    parts = [f'{name}^{exponent}' if exponent != 1 else name
+             for name, exponent in zip(('m', 's', 'kg'), dimension) if exponent]
+    return '.'.join(parts) or 'dimensionless'
+
+
+class Quantity:
+    """
+    A float with a dimension, only used while checking.
+
+    Arithmetic follows dimensional analysis: adding, subtracting or comparing needs matching
+    dimensions, multiplying and dividing combine them. A plain number counts as dimensionless,
+    except zero, which compares and adds with anything.
+    """
+    __slots__ = ('value', 'dimension')
+
+    def __init__(self, value: float, dimension: Dimension):
+        self.value = value
+        self.dimension = dimension
+
+    @staticmethod
+    def _split(other) -> tuple[float, Dimension | None]:
+        if isinstance(other, Quantity):
+            return other.value, other.dimension
+        return other, None if other == 0 else DIMENSIONLESS
+
+    def _match(self, other, operation: str) -> float:
+        value, dimension = self._split(other)
+        if dimension is not None and dimension != self.dimension:
+            raise DimensionError(
+                f'{operation} with {format_dimension(self.dimension)} and {format_dimension(dimension)}'
+            )
+        return value
+
+    def __add__(self, other):
+        return Quantity(self.value + self._match(other, '+'), self.dimension)
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return Quantity(self.value - self._match(other, '-'), self.dimension)
+
+    def __rsub__(self, other):
+        return Quantity(self._match(other, '-') - self.value, self.dimension)
+
+    def __mul__(self, other):
+        value, dimension = self._split(other)
+        dimension = dimension or DIMENSIONLESS
+        return Quantity(self.value * value, tuple(a + b for a, b in zip(self.dimension, dimension)))
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        value, dimension = self._split(other)
+        dimension = dimension or DIMENSIONLESS
+        return Quantity(self.value / value, tuple(a - b for a, b in zip(self.dimension, dimension)))
+
+    def __rtruediv__(self, other):
+        value, dimension = self._split(other)
+        dimension = dimension or DIMENSIONLESS
+        return Quantity(value / self.value, tuple(b - a for a, b in zip(self.dimension, dimension)))
+
+    def __pow__(self, exponent):
+        if isinstance(exponent, Quantity):
+            if exponent.dimension != DIMENSIONLESS:
+                raise DimensionError(f'exponent has dimension {format_dimension(exponent.dimension)}')
+            exponent = exponent.value
+        return Quantity(self.value ** exponent, tuple(a * Fraction(exponent).limit_denominator() for a in self.dimension))
+
+    def __neg__(self):
+        return Quantity(-self.value, self.dimension)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return Quantity(abs(self.value), self.dimension)
+
+    def __lt__(self, other):
+        return self.value < self._match(other, '<')
+
+    def __le__(self, other):
+        return self.value <= self._match(other, '<=')
+
+    def __gt__(self, other):
+        return self.value > self._match(other, '>')
+
+    def __ge__(self, other):
+        return self.value >= self._match(other, '>=')
+
+    def __float__(self):
+        # math.sin, math.cos, ... call this, so only dimensionless values can go into them
+        if self.dimension != DIMENSIONLESS:
+            raise DimensionError(f'float() of {format_dimension(self.dimension)}')
+        return float(self.value)
+
+    def __repr__(self):
+        return f'{self.value} [{format_dimension(self.dimension)}]'
+
+
+def _function_node(func: Callable) -> ast.FunctionDef:
+    source = textwrap.dedent(inspect.getsource(func))
+    return next(node for node in ast.walk(ast.parse(source)) if isinstance(node, ast.FunctionDef))
+
+
+def function_annotations(func: Callable) -> tuple[dict[str, str | None], str | None]:
+    """
+    The annotation names of a function's parameters and return value, as written in the source.
+
+    :return: ({parameter: annotation name or None}, return annotation name or None)
+    """
+    node = _function_node(inspect.unwrap(func))
+    arguments = node.args.posonlyargs + node.args.args + node.args.kwonlyargs
+    names = {argument.arg: _annotation_name(argument.annotation) for argument in arguments}
+    return names, _annotation_name(node.returns)
+
+
+@functools.cache
+def module_annotations(module: ModuleType) -> dict[str, str]:
+    """
+    The annotation names of a module's annotated globals, e.g. {'elevator_max_length': 'meters'}.
+    """
+    tree = ast.parse(inspect.getsource(module))
+    return {
+        node.target.id: _annotation_name(node.annotation)
+        for node in tree.body
+        if isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name) and _annotation_name(node.annotation)
+    }
+
+
+def _annotation_name(annotation: ast.expr | None) -> str | None:
+    if isinstance(annotation, ast.Name):
+        return annotation.id
+    if isinstance(annotation, ast.Attribute):
+        return annotation.attr
+    if isinstance(annotation, ast.Constant) and isinstance(annotation.value, str):
+        return annotation.value.rsplit('.', 1)[-1]
+    return None
+
+
+class DimensionChecker:
+    """
+    Wraps functions so that calls to them are re-run with Quantity values and checked.
+
+    Every sampled call is run once more with each float argument replaced by a Quantity with the
+    dimension of its annotation, and the annotated globals of modules replaced the same way. The
+    result has to have the dimension of the return annotation and the same value as the real call.
+    The real call's result is always what is returned, so the code under test doesn't change.
+
+    :param modules: Modules whose annotated globals are tagged while checking, e.g. constants
+    :param every: Check one call in this many
+    """
+
+    # set while any checker is re-running a function, so wrapped functions it calls don't check again
+    checking: bool = False
+
+    def __init__(self, modules: list[ModuleType] = (), every: int = 1):
+        self.modules = list(modules)
+        self.every = every
+        self.calls: int = 0
+        self.checked: int = 0
+        self.wrapped: list[tuple[object, str, object]] = []
+
+    def wrap(self, owner, name: str):
+        """
+        Replaces owner.name with a checking wrapper, keeping staticmethods static.
+        """
+        original = inspect.getattr_static(owner, name)
+        # check the original function even if something already wrapped it
+        func = inspect.unwrap(original.__func__ if isinstance(original, (staticmethod, classmethod)) else original)
+        parameters, returns = function_annotations(func)
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def checked(*args, **kwargs):
+            result = func(*args, **kwargs)
+            if DimensionChecker.checking:
+                return result  # called from inside a check (this or another checker's), already running with Quantities
+            self.calls += 1
+            if self.calls % self.every == 0:
+                self.check(func, signature, parameters, returns, args, kwargs, result)
+            return result
+
+        wrapper = type(original)(checked) if isinstance(original, (staticmethod, classmethod)) else checked
+        setattr(owner, name, wrapper)
+        self.wrapped.append((owner, name, original))
+
+    def unwrap(self):
+        for owner, name, original in reversed(self.wrapped):
+            setattr(owner, name, original)
+        self.wrapped.clear()
+
+    def check(self, func, signature, parameters, returns, args, kwargs, result):
+        bound = signature.bind(*args, **kwargs)
+        for parameter, value in bound.arguments.items():
+            dimension = DIMENSIONS.get(parameters.get(parameter))
+            if dimension is not None and isinstance(value, (int, float)) and not isinstance(value, bool):
+                bound.arguments[parameter] = Quantity(value, dimension)
+
+        with self.tagged():
+            DimensionChecker.checking = True
+            try:
+                quantity = func(*bound.args, **bound.kwargs)
+            except DimensionError as e:
+                raise DimensionError(f'{func.__qualname__}: {e}') from None
+            finally:
+                DimensionChecker.checking = False
+
+        self.checked += 1
+        expected = DIMENSIONS.get(returns)
+        if expected is None:
+            return
+        if isinstance(quantity, Quantity):
+            value, dimension = quantity.value, quantity.dimension
+        else:
+            value, dimension = quantity, DIMENSIONLESS
+        if dimension != expected:
+            raise DimensionError(
+                f'{func.__qualname__} returned {format_dimension(dimension)}, annotated {returns} '
+                f'({format_dimension(expected)})'
+            )
+        if abs(value - result) > 1e-9 * max(1.0, abs(result)):
+            raise DimensionError(f'{func.__qualname__} gave {value} while checking, {result} normally')
+
+    def tagged(self):
+        return _Tagged(self.modules)
+
+    def verify(self, owner, name: str, samples: int = 20, seed: int = 0, **fixed):
+        """
+        Calls owner.name with random positive arguments and checks every call.
+
+        :param fixed: Values for arguments that shouldn't be random, e.g. low_gear=True
+        """
+        original = inspect.getattr_static(owner, name)
+        # check the original function even if something already wrapped it
+        func = inspect.unwrap(original.__func__ if isinstance(original, (staticmethod, classmethod)) else original)
+        parameters, returns = function_annotations(func)
+        signature = inspect.signature(func)
+        generator = random.Random(seed)
+
+        for _ in range(samples):
+            args = {
+                parameter: fixed.get(parameter, generator.uniform(0.1, 10))
+                for parameter in signature.parameters
+            }
+            result = func(**args)
+            self.check(func, signature, parameters, returns, (), args, result)
+
+
+class _Tagged:
+    """
+    Context manager that swaps annotated module globals for Quantities and back.
+    """
+
+    def __init__(self, modules: list[ModuleType]):
+        self.modules = modules
+        self.saved: list[tuple[ModuleType, str, object]] = []
+
+    def __enter__(self):
+        for module in self.modules:
+            for name, annotation in module_annotations(module).items():
+                dimension = DIMENSIONS.get(annotation)
+                value = getattr(module, name, None)
+                if dimension is not None and isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self.saved.append((module, name, value))
+                    setattr(module, name, Quantity(value, dimension))
+        return self
+
+    def __exit__(self, *exc):
+        for module, name, value in reversed(self.saved):
+            setattr(module, name, value)
+        self.saved.clear()
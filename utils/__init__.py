@@ -1,3 +1,4 @@
 from utils.local_logger import LocalLogger
+from utils.signal_logger import SignalLogger
 from utils.POI import POI, POIPose
 from utils.can_optimizations import CAN_delay
\ No newline at end of file
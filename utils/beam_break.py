@@ -0,0 +1,124 @@
+import collections
+import threading
+from typing import Callable
+
+import wpilib
+
+import config
+from units.SI import seconds
+
+# FPGA timestamp, True if the edge blocked the beam
+Edge = tuple[seconds, bool]
+
+_rising = int(wpilib.SynchronousInterrupt.WaitResult.kRisingEdge)
+_falling = int(wpilib.SynchronousInterrupt.WaitResult.kFallingEdge)
+# the beam clearing pulls the input high, but the sim reports each edge, and its timestamp, as the other one
+_rising_blocks = wpilib.RobotBase.isSimulation()
+
+
+class BeamBreak:
+    """
+    A beam break on a DIO, reading high while the beam is clear, with its edges latched by an interrupt.
+
+    RobotPy has no AsynchronousInterrupt, so a daemon thread waits on a SynchronousInterrupt for both edges
+    and records each with the FPGA timestamp the interrupt latched, into a ring buffer of the last
+    config.beam_break_events. Blocking edges then call the on_blocked callbacks, on the interrupt thread,
+    a millisecond or so after the note gets there instead of on the next loop.
+
+    Everything else reads the snapshot taken once a loop by update(), so every trigger and command sees
+    the same state for the whole loop. tripped also counts a note that blocked and cleared the beam
+    between two snapshots.
+    """
+
+    def __init__(self, channel: int, name: str):
+        self.channel = channel
+        self.name = name
+        self.input: wpilib.DigitalInput | None = None
+        self.interrupt: wpilib.SynchronousInterrupt | None = None
+
+        self.edges: collections.deque[Edge] = collections.deque(maxlen=config.beam_break_events)
+        self.count: int = 0
+        self.on_blocked: list[Callable[[seconds], None]] = []
+        self.lock = threading.Lock()
+
+        # snapshot
+        self.blocked: bool = False
+        self.tripped: bool = False
+        self.blocked_at: seconds | None = None
+        self.cleared_at: seconds | None = None
+        self.seen: int = 0
+
+        self.thread: threading.Thread | None = None
+        self.running = threading.Event()
+
+    def init(self):
+        self.input = wpilib.DigitalInput(self.channel)
+        self.interrupt = wpilib.SynchronousInterrupt(self.input)
+        self.interrupt.setInterruptEdges(True, True)
+        self.update()
+
+    def read(self) -> bool:
+        """
+        Whether the beam is blocked right now, skipping the snapshot.
+        """
+        return not self.input.get()
+
+    def add_edge(self, timestamp: seconds, blocked: bool):
+        with self.lock:
+            self.edges.append((timestamp, blocked))
+            self.count += 1
+        if blocked:
+            for callback in list(self.on_blocked):
+                callback(timestamp)
+
+    def wait(self, timeout: seconds, ignore_previous: bool = False):
+        """
+        Records the edges of the next interrupt, waiting up to timeout for it.
+
+        :param ignore_previous: Drop edges from before this call, otherwise edges since the last call count
+        """
+        result = int(self.interrupt.waitForInterrupt(timeout, ignore_previous))
+        edges = []
+        if result & _rising:
+            edges.append((self.interrupt.getRisingTimestamp(), _rising_blocks))
+        if result & _falling:
+            edges.append((self.interrupt.getFallingTimestamp(), not _rising_blocks))
+        for edge in sorted(edges):
+            self.add_edge(*edge)
+
+    def update(self) -> bool:
+        """
+        Takes this loop's snapshot.
+
+        :return: If the beam is blocked
+        """
+        with self.lock:
+            self.blocked = self.read()
+            new = list(self.edges)[len(self.edges) - min(self.count - self.seen, len(self.edges)):]
+            self.seen = self.count
+        self.tripped = self.blocked or any(blocked for _, blocked in new)
+        for timestamp, blocked in new:
+            if blocked:
+                self.blocked_at = timestamp
+            else:
+                self.cleared_at = timestamp
+        return self.blocked
+
+    def run(self):
+        while self.running.is_set():
+            self.wait(config.period)
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            # edges from before now were already in the snapshot
+            self.wait(0, True)
+            self.running.set()
+            self.thread = threading.Thread(target=self.run, name=f"BeamBreak {self.name}", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.running.clear()
+        if self.thread is not None:
+            self.interrupt.wakeupWaitingInterrupt()
+            self.thread.join()
+            self.thread = None
@@ -0,0 +1,151 @@
+import math
+from dataclasses import dataclass
+
+from wpimath.trajectory import TrapezoidProfile
+
+import config
+from units.SI import meters, radians, seconds
+
+KeepOut = tuple[tuple[meters, meters], tuple[radians, radians]]
+
+
+def _total_time(profile: TrapezoidProfile, start: float, goal: float) -> seconds:
+    profile.calculate(0, TrapezoidProfile.State(start, 0), TrapezoidProfile.State(goal, 0))
+    return profile.totalTime()
+
+
+@dataclass
+class GiraffePlan:
+    """
+    Elevator and wrist trapezoid profiles from rest to rest, each started after its delay.
+    """
+    start_height: meters
+    start_angle: radians
+    goal_height: meters
+    goal_angle: radians
+    elevator_profile: TrapezoidProfile
+    wrist_profile: TrapezoidProfile
+    elevator_time: seconds
+    wrist_time: seconds
+    elevator_delay: seconds = 0
+    wrist_delay: seconds = 0
+
+    @property
+    def duration(self) -> seconds:
+        return max(self.elevator_delay + self.elevator_time, self.wrist_delay + self.wrist_time)
+
+    def sample(self, t: seconds) -> tuple[meters, radians]:
+        """
+        Elevator height and wrist angle setpoints t seconds into the move.
+        """
+        height = self.elevator_profile.calculate(
+            max(t - self.elevator_delay, 0),
+            TrapezoidProfile.State(self.start_height, 0),
+            TrapezoidProfile.State(self.goal_height, 0),
+        ).position
+        angle = self.wrist_profile.calculate(
+            max(t - self.wrist_delay, 0),
+            TrapezoidProfile.State(self.start_angle, 0),
+            TrapezoidProfile.State(self.goal_angle, 0),
+        ).position
+        return height, angle
+
+
+class GiraffePlanner:
+    """
+    Time optimal, coordinated elevator and wrist moves.
+
+    Each axis follows its own trapezoid profile at its config velocity and acceleration limits, so both
+    get to the goal as fast as they can. When moving both at once would pass through one of the keep out
+    boxes, one axis starts later, by the shortest delay that clears every box, up to moving them one
+    after the other. Boxes around the start or the goal can't be avoided and are ignored.
+
+    Plans are cached by goal and by start to within config.giraffe_plan_start_tolerance, so the elevator
+    and wrist resting near where the last move to them ended reuse its plan. The moves between the
+    config.Giraffe positions are planned up front.
+    """
+
+    def __init__(self, keep_out: list[KeepOut] | None = None):
+        """
+        :param keep_out: Boxes the elevator and wrist can't pass through together, defaults to config.giraffe_keep_out
+        """
+        self.keep_out = config.giraffe_keep_out if keep_out is None else keep_out
+        self.elevator_profile = TrapezoidProfile(
+            TrapezoidProfile.Constraints(config.elevator_max_velocity, config.elevator_max_acceleration)
+        )
+        self.wrist_profile = TrapezoidProfile(
+            TrapezoidProfile.Constraints(config.wrist_max_velocity, config.wrist_max_acceleration)
+        )
+        self.plans: dict[tuple, GiraffePlan | None] = {}
+        self.warm([
+            (position.height, position.wrist_angle)
+            for position in vars(config.Giraffe).values()
+            if isinstance(position, config.Giraffe.GiraffePos)
+            and isinstance(position.height, (int, float))
+            and isinstance(position.wrist_angle, (int, float))
+        ])
+
+    def warm(self, positions: list[tuple[meters, radians]]):
+        """
+        Plans every move between positions.
+        """
+        for start in positions:
+            for goal in positions:
+                if start != goal:
+                    self.plan(*start, *goal)
+
+    def plan(self, height: meters, angle: radians, goal_height: meters, goal_angle: radians) -> GiraffePlan | None:
+        """
+        The move from rest at height and angle to rest at the goal.
+
+        :return: The plan, None if no delay clears the keep out boxes
+        """
+        tolerance = config.giraffe_plan_start_tolerance
+        key = (round(height / tolerance), round(angle / tolerance), goal_height, goal_angle)
+        if key not in self.plans:
+            if len(self.plans) >= config.giraffe_plan_cache_size:
+                # oldest first
+                del self.plans[next(iter(self.plans))]
+            self.plans[key] = self._plan(height, angle, goal_height, goal_angle)
+        return self.plans[key]
+
+    def _plan(self, height: meters, angle: radians, goal_height: meters, goal_angle: radians) -> GiraffePlan | None:
+        plan = GiraffePlan(
+            height, angle, goal_height, goal_angle,
+            self.elevator_profile,
+            self.wrist_profile,
+            _total_time(self.elevator_profile, height, goal_height),
+            _total_time(self.wrist_profile, angle, goal_angle),
+        )
+
+        boxes = [
+            box for box in self.keep_out
+            if not self._inside(box, height, angle) and not self._inside(box, goal_height, goal_angle)
+        ]
+        if not boxes:
+            return plan
+
+        # shortest delay first, whichever axis waits
+        step = config.giraffe_plan_step
+        for i in range(math.ceil(max(plan.elevator_time, plan.wrist_time) / step) + 1):
+            for elevator_delay, wrist_delay in sorted(
+                [(min(i * step, plan.wrist_time), 0), (0, min(i * step, plan.elevator_time))],
+                key=lambda delays: max(delays[0] + plan.elevator_time, delays[1] + plan.wrist_time),
+            ):
+                plan.elevator_delay, plan.wrist_delay = elevator_delay, wrist_delay
+                if not self._collides(plan, boxes):
+                    return plan
+        return None
+
+    @staticmethod
+    def _inside(box: KeepOut, height: meters, angle: radians) -> bool:
+        (low_height, high_height), (low_angle, high_angle) = box
+        return low_height < height < high_height and low_angle < angle < high_angle
+
+    def _collides(self, plan: GiraffePlan, boxes: list[KeepOut]) -> bool:
+        step = config.giraffe_plan_step
+        for i in range(math.ceil(plan.duration / step) + 1):
+            height, angle = plan.sample(min(i * step, plan.duration))
+            if any(self._inside(box, height, angle) for box in boxes):
+                return True
+        return False
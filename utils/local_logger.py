@@ -1,7 +1,12 @@
+import atexit
+import queue
+import threading
+
 from wpilib import DataLogManager, Timer, DriverStation, TimedRobot
 from wpilib.deployinfo import getDeployData
 from wpiutil.log import StringLogEntry
 import config
+from utils.signal_logger import SignalLogger
 
 
 class BColors:
@@ -22,6 +27,84 @@ class BColors:
     SETUP = '\u001b[46;1m'
 
 
+class LogWriter:
+    """
+    Formats and writes log records on a background thread.
+
+    Records go into a bounded queue so logging never blocks the robot loop on stdout or string
+    formatting. When the queue is full new records are dropped and counted, and the count is
+    reported once the writer catches up.
+    """
+
+    def __init__(self, size: int | None = None):
+        """
+        :param size: Records that can wait to be written, defaults to config.LOG_BUFFER_SIZE
+        """
+        self.size = size
+        self.queue: queue.Queue | None = None
+        self.dropped: int = 0
+        self.reported: int = 0
+        self.lock = threading.Lock()
+        self.thread: threading.Thread | None = None
+        self.entry: StringLogEntry | None = None
+
+    def start(self):
+        if self.thread is None:
+            # config imports this module, so the size is only read once the first message arrives
+            self.queue = queue.Queue(config.LOG_BUFFER_SIZE if self.size is None else self.size)
+            self.thread = threading.Thread(target=self.run, name="LocalLogger", daemon=True)
+            self.thread.start()
+            # write out whatever is still queued when the program exits
+            atexit.register(self.flush)
+
+    def submit(self, write, *record) -> bool:
+        """
+        Queues a record to be written by write(*record) on the writer thread.
+
+        :return: False if the queue was full and the record was dropped
+        """
+        self.start()
+        try:
+            self.queue.put_nowait((write, record))
+            return True
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+            return False
+
+    def run(self):
+        while True:
+            write, record = self.queue.get()
+            try:
+                write(*record)
+                self.report_dropped()
+            except Exception as e:
+                print(f'LocalLogger failed to write a message: {e}')
+            finally:
+                self.queue.task_done()
+
+    def report_dropped(self):
+        with self.lock:
+            dropped = self.dropped - self.reported
+            self.reported = self.dropped
+        if dropped == 0:
+            return
+
+        message = f'  |  WARN  |  LocalLogger: dropped {dropped} messages, {self.reported} total (buffer full)'
+        print(f'{BColors.WARNING}{message}{BColors.ENDC}')
+        if config.LOGGING:
+            if self.entry is None:
+                self.entry = StringLogEntry(SignalLogger.get_log(), 'messages/LocalLogger')
+            self.entry.append(message)
+
+    def flush(self):
+        """
+        Blocks until every queued record has been written.
+        """
+        if self.queue is not None:
+            self.queue.join()
+
+
 class LocalLogger():
     """
     A logger that logs to the driver station and a file accessible from a USB
@@ -69,13 +152,13 @@ class LocalLogger():
 
     log_data = None
     custom_entry = None
+    writer = LogWriter()
 
     def __init__(self, name: str):
         self.name = name
         self.dlm = DataLogManager
         if config.LOGGING:
-            self.dlm.start('')
-            self.log_data = self.dlm.getLog()
+            self.log_data = SignalLogger.get_log()
             self.custom_entry = StringLogEntry(self.log_data, f'messages/{self.name}')
 
     def _robot_log_setup(self):
@@ -146,12 +229,33 @@ class LocalLogger():
         if joysticks:
             self.setup('Joystick logging started')
 
-    def __pms(self, colors: bool = True):
+    @staticmethod
+    def __stamp() -> tuple[float, str]:
         """
-        Returns a string with the current match time, mode, and simulation status.
+        Returns the time and mode to prefix a message with, taken when it is logged.
+
+        The time is the match time on the robot and the FPGA time in simulation.
+
+        This should not be used outside of this class.
+        """
+
+        mode = 'DISABLED'
+        if DriverStation.isEnabled():
+            mode = 'TELEOP' if DriverStation.isTeleopEnabled() else 'AUTONOMOUS'
+
+        time = Timer.getFPGATimestamp() if TimedRobot.isSimulation() else Timer.getMatchTime()
+        return time, mode
+
+    def __pms(self, time: float, mode: str, colors: bool = True):
+        """
+        Returns a string with the match time, mode, and simulation status.
 
         This is intended to be used as a prefix for logging, and should not be used outside of this class.
 
+        :param time: Match time, or FPGA time in simulation, the message was logged at
+        :type time: float
+        :param mode: Robot mode the message was logged in
+        :type mode: str
         :param colors: Whether to use colors
         :type colors: bool
         """
@@ -167,22 +271,13 @@ class LocalLogger():
             time_color = BColors.TIME
             end_color = BColors.ENDC
 
-        mode = 'DISABLED'
         is_sim = f'{sim_color}SIMULATION{end_color}' if TimedRobot.isSimulation() else ''
-        if DriverStation.isEnabled():
-            mode = 'TELEOP' if DriverStation.isTeleopEnabled() else 'AUTONOMOUS'
 
         mode = f'{header_color}{mode}{end_color}'
 
         combined = mode + "  " + is_sim
 
-        time = Timer.getFPGATimestamp()
-        time = f'{time:.3f}'
-        if not TimedRobot.isSimulation():
-            time = Timer.getMatchTime()
-            time = f'{time:.3f}'
-
-        return f'  {time}{time_color}  {combined}{end_color}'
+        return f'  {time:.3f}{time_color}  {combined}{end_color}'
 
     def __format_log_type(self, type: str):
         """
@@ -196,12 +291,14 @@ class LocalLogger():
 
         return f'  |  {type}  |  '
 
-    def __format_std_out(self, color: BColors, type, message):
+    def __format_std_out(self, stamp: tuple[float, str], color: BColors, type, message):
         """
         Returns a formatted string for printing to the console.
 
         This should not be used outside of this class.
 
+        :param stamp: Time and mode the message was logged at, from __stamp
+        :type stamp: tuple[float, str]
         :param color: The color of the log
         :type color: BColors
         :param type: The type of log
@@ -213,68 +310,98 @@ class LocalLogger():
         """
 
         type = self.__format_log_type(type)
-        return f'{self.__pms()}{color}{type}{self.name}: {message}{BColors.ENDC}'
+        return f'{self.__pms(*stamp)}{color}{type}{self.name}: {message}{BColors.ENDC}'
+
+    def __log(self, message, args, type, color, level: LogLevels, std_out: bool = True):
+        """
+        Queues a message to be written to the file and printed to the console.
+
+        This should not be used outside of this class.
+        """
+
+        to_std_out = std_out and config.LOG_OUT_LEVEL <= level
+        to_file = config.LOGGING and config.LOG_FILE_LEVEL <= level
+        if to_std_out or to_file:
+            self.writer.submit(self.__write, self.__stamp(), message, args, type, color, to_std_out, to_file)
 
-    def __log(self, message, type, color, level: LogLevels, std_out: bool = True):
+    def __write(self, stamp: tuple[float, str], message, args, type, color, to_std_out: bool, to_file: bool):
         """
-        Logs a message to the file and prints it to the console.
+        Formats and writes a message. Runs on the writer thread.
 
         This should not be used outside of this class.
         """
 
-        if std_out and config.LOG_OUT_LEVEL <= level:
-            print(self.__format_std_out(color, type, message))
-        if config.LOGGING and config.LOG_FILE_LEVEL <= level:
-            self.custom_entry.append(f'{self.__pms(False)}{type}{self.name}: {message}')
+        if args:
+            message = message % args
+        if to_std_out:
+            print(self.__format_std_out(stamp, color, type, message))
+        if to_file:
+            self.custom_entry.append(f'{self.__pms(*stamp, False)}{type}{self.name}: {message}')
+
+    @classmethod
+    def flush(cls):
+        """
+        Waits for every queued message to be written.
+        """
+
+        cls.writer.flush()
+
+    @classmethod
+    def dropped(cls) -> int:
+        """
+        Returns how many messages have been dropped because the buffer was full.
+        """
+
+        return cls.writer.dropped
 
-    def message(self, message: str):
+    def message(self, message: str, *args):
         """
         Logs a message to the file without printing it to the console.
 
         This does not log a type.
 
-        :param message: The message to log
+        :param message: The message to log, formatted with message % args on the writer thread
         """
 
-        self.__log(message, '', '', self.LogLevels.INFO, False)
+        self.__log(message, args, '', '', self.LogLevels.INFO, False)
 
-    def info(self, message: str, std_out: bool = True):
+    def info(self, message: str, *args, std_out: bool = True):
         """
         Logs an info message to the file and prints it to the console.
 
-        :param message: The message to log
+        :param message: The message to log, formatted with message % args on the writer thread
         """
 
-        self.__log(message, 'INFO', BColors.OKBLUE, self.LogLevels.INFO, std_out)
+        self.__log(message, args, 'INFO', BColors.OKBLUE, self.LogLevels.INFO, std_out)
 
-    def debug(self, message: str, std_out: bool = True):
+    def debug(self, message: str, *args, std_out: bool = True):
         """
         Logs a debug message to the file and prints it to the console.
 
-        :param message: The message to log
+        :param message: The message to log, formatted with message % args on the writer thread
         """
 
-        self.__log(message, 'DEBUG', BColors.OKCYAN, self.LogLevels.DEBUG, std_out)
+        self.__log(message, args, 'DEBUG', BColors.OKCYAN, self.LogLevels.DEBUG, std_out)
 
-    def complete(self, message: str, std_out: bool = True):
+    def complete(self, message: str, *args, std_out: bool = True):
         """
         Logs a completion message to the file and prints it to the console.
 
-        :param message: The message to log
+        :param message: The message to log, formatted with message % args on the writer thread
         """
 
-        self.__log(message, 'DONE', BColors.OKGREEN, self.LogLevels.INFO, std_out)
+        self.__log(message, args, 'DONE', BColors.OKGREEN, self.LogLevels.INFO, std_out)
 
-    def warn(self, message: str, std_out: bool = True):
+    def warn(self, message: str, *args, std_out: bool = True):
         """
         Logs a warning message to the file and prints it to the console.
 
-        :param message: The message to log
+        :param message: The message to log, formatted with message % args on the writer thread
         """
 
-        self.__log(message, 'WARN', BColors.WARNING, self.LogLevels.WARNING, std_out)
+        self.__log(message, args, 'WARN', BColors.WARNING, self.LogLevels.WARNING, std_out)
 
-    def error(self, message: str, std_out: bool = True):
+    def error(self, message: str, *args, std_out: bool = True):
         """
         Logs an error message to the file and prints it to the console.
 
@@ -284,16 +411,16 @@ class LocalLogger():
 
         If you want to log an exception, use the traceback module.
 
-        :param message: The message to log
+        :param message: The message to log, formatted with message % args on the writer thread
         """
 
-        self.__log(message, 'ERROR', BColors.FAIL, self.LogLevels.ERROR, std_out)
+        self.__log(message, args, 'ERROR', BColors.FAIL, self.LogLevels.ERROR, std_out)
 
-    def setup(self, message: str, std_out: bool = True):
+    def setup(self, message: str, *args, std_out: bool = True):
         """
         Logs a setup message to the file and prints it to the console.
 
-        :param message: The message to log
+        :param message: The message to log, formatted with message % args on the writer thread
         """
 
-        self.__log(message, 'SETUP', BColors.SETUP, self.LogLevels.SETUP, std_out)
+        self.__log(message, args, 'SETUP', BColors.SETUP, self.LogLevels.SETUP, std_out)
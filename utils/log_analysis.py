@@ -0,0 +1,168 @@
+"""
+Reports from the signals logged on the robot, read straight out of a .wpilog file.
+
+Usage:
+    python -m utils.log_analysis logs/FRC_20240615_183012.wpilog
+    python -m utils.log_analysis logs/FRC_20240615_183012.wpilog --report loops --report flywheel
+
+Reports:
+    loops      loop time distribution, from the timestamps of 'odometry/pose' (logged once a loop)
+    vision     distance between every accepted vision measurement and the odometry pose at its capture time
+    flywheel   time for the flywheel to get back to ready to shoot after it drops out while spun up
+    path       distance between the auto trajectory goal and the odometry pose
+"""
+import argparse
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+import config
+from utils.wpilog import WPILog
+
+POSE = 'odometry/pose'
+VISION = 'odometry/vision'
+AUTO_GOAL = 'auto/goal'
+READY_TO_SHOOT = 'flywheel/ready to shoot'
+FLYWHEEL_TARGET = 'flywheel/top target'
+
+
+@dataclass
+class Distribution:
+    """
+    Summary of a set of samples.
+    """
+    count: int
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+    @classmethod
+    def of(cls, samples: np.ndarray) -> "Distribution":
+        if len(samples) == 0:
+            return cls(0, math.nan, math.nan, math.nan, math.nan, math.nan)
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+        return cls(len(samples), float(samples.mean()), float(p50), float(p95), float(p99), float(samples.max()))
+
+    def format(self, scale: float = 1, unit: str = '') -> str:
+        if self.count == 0:
+            return 'no samples'
+        return (
+            f'n={self.count}  mean {self.mean * scale:.2f}{unit}  p50 {self.p50 * scale:.2f}{unit}  '
+            f'p95 {self.p95 * scale:.2f}{unit}  p99 {self.p99 * scale:.2f}{unit}  max {self.max * scale:.2f}{unit}'
+        )
+
+
+def interpolate_pose(log: WPILog, times: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Odometry x and y at each time, linearly interpolated between loops.
+    """
+    pose = log.channel(POSE)
+    return np.interp(times, pose.timestamps, pose.values[:, 0]), np.interp(times, pose.timestamps, pose.values[:, 1])
+
+
+def loop_times(log: WPILog, period: float | None = None) -> tuple[Distribution, int]:
+    """
+    Time between robot loops and how many went over the period.
+
+    :param period: Expected loop period, defaults to config.period
+    :return: (loop time distribution in seconds, overrun count)
+    """
+    period = config.period if period is None else period
+    durations = np.diff(log.channel(POSE).timestamps)
+    # a loop counts as overrun once it is 10% over, so timer jitter doesn't count
+    return Distribution.of(durations), int(np.count_nonzero(durations > period * 1.1))
+
+
+def vision_residuals(log: WPILog) -> Distribution:
+    """
+    Distance in meters between each accepted vision measurement and the odometry pose at its capture time.
+    """
+    vision = log.channel(VISION).values  # x, y, capture time
+    if len(vision) == 0:
+        return Distribution.of(np.zeros(0))
+    x, y = interpolate_pose(log, vision[:, 2])
+    return Distribution.of(np.hypot(vision[:, 0] - x, vision[:, 1] - y))
+
+
+def flywheel_recovery(log: WPILog) -> Distribution:
+    """
+    Time in seconds from the flywheel dropping out of ready to shoot to it being ready again, while it has a target.
+
+    A drop out while the flywheel is spun up is almost always a shot going through, so this is the recovery time
+    between shots.
+    """
+    ready = log.channel(READY_TO_SHOOT)
+    target = log.channel(FLYWHEEL_TARGET)
+    if len(ready) < 2 or len(target) == 0:
+        return Distribution.of(np.zeros(0))
+
+    change = np.flatnonzero(np.diff(ready.values.astype(np.int8))) + 1
+    falls = change[~ready.values[change]]
+    rises = change[ready.values[change]]
+    # pair every fall with the first rise after it
+    after = np.searchsorted(rises, falls)
+    falls, rises = falls[after < len(rises)], rises[after[after < len(rises)]]
+
+    fall_times = ready.timestamps[falls]
+    targets = target.values[np.maximum(np.searchsorted(target.timestamps, fall_times, side='right') - 1, 0)]
+    spun_up = targets > 0
+    return Distribution.of(ready.timestamps[rises[spun_up]] - fall_times[spun_up])
+
+
+def path_tracking(log: WPILog) -> Distribution:
+    """
+    Distance in meters between the auto trajectory goal and the odometry pose while a path is followed.
+    """
+    goal = log.channel(AUTO_GOAL)  # x, y, theta
+    if len(goal) == 0:
+        return Distribution.of(np.zeros(0))
+    x, y = interpolate_pose(log, goal.timestamps)
+    return Distribution.of(np.hypot(goal.values[:, 0] - x, goal.values[:, 1] - y))
+
+
+def report(log: WPILog, reports: list[str] | None = None) -> str:
+    """
+    Runs the requested reports, leaving out any whose channels aren't in the log.
+    """
+    reports = reports or list(REPORTS)
+    lines = [f'{log.path}: {len(log.offsets)} records, {len(log.names())} entries']
+
+    for name in reports:
+        needed, run = REPORTS[name]
+        missing = [channel for channel in needed if channel not in log]
+        if missing:
+            lines.append(f'{name:<10}missing {", ".join(missing)}')
+            continue
+        lines.append(f'{name:<10}{run(log)}')
+
+    return '\n'.join(lines)
+
+
+def _loops(log: WPILog) -> str:
+    distribution, overruns = loop_times(log)
+    return f'{distribution.format(1000, "ms")}  overruns {overruns}'
+
+
+REPORTS = {
+    'loops': ((POSE,), _loops),
+    'vision': ((POSE, VISION), lambda log: vision_residuals(log).format(unit='m')),
+    'flywheel': ((READY_TO_SHOOT, FLYWHEEL_TARGET), lambda log: flywheel_recovery(log).format(unit='s')),
+    'path': ((POSE, AUTO_GOAL), lambda log: path_tracking(log).format(unit='m')),
+}
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Summarize a robot .wpilog file")
+    parser.add_argument("log", help=".wpilog file copied off the roboRIO")
+    parser.add_argument("--report", action="append", choices=list(REPORTS), help="report to run, defaults to all")
+    args = parser.parse_args(argv)
+
+    with WPILog(args.log) as log:
+        print(report(log, args.report))
+
+
+if __name__ == "__main__":
+    main()
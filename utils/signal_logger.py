@@ -0,0 +1,105 @@
+from typing import Callable, Sequence
+
+import ntcore
+from wpilib import DataLogManager, RobotController
+from wpiutil.log import BooleanLogEntry, DataLog, DoubleArrayLogEntry, DoubleLogEntry
+
+import config
+
+
+class SignalLogger:
+    """
+    Shared on-robot DataLog and typed, high rate signal channels.
+
+    The DataLog is started once and shared by every LocalLogger and channel. Subsystems register
+    double, double array and boolean channels, optionally with a getter. Channels with a getter
+    are sampled and appended in binary form every time update is called (once a loop from
+    robotPeriodic), all stamped with the same FPGA time. Channels without one are appended to
+    directly by whoever owns them.
+
+    Logs can be pulled off the roboRIO after a match and opened in AdvantageScope or read with
+    wpiutil.log.DataLogReader.
+
+    A getter that throws doesn't stop the other channels. Its first failure is logged with the channel
+    name, and the failure count is published to NetworkTables as logging/signal errors.
+    """
+
+    log: DataLog | None = None
+    channels: list[tuple[str, DoubleLogEntry | DoubleArrayLogEntry | BooleanLogEntry, Callable]] = []
+    errors: int = 0
+    failed: set[str] = set()
+
+    @classmethod
+    def get_log(cls) -> DataLog:
+        """
+        Returns the shared DataLog, starting it the first time it is needed.
+        """
+        if cls.log is None:
+            DataLogManager.start('')
+            cls.log = DataLogManager.getLog()
+        return cls.log
+
+    @classmethod
+    def _register(cls, name: str, entry, getter: Callable | None):
+        if getter is not None:
+            cls.channels.append((name, entry, getter))
+        return entry
+
+    @classmethod
+    def double(cls, name: str, getter: Callable[[], float] | None = None) -> DoubleLogEntry:
+        """
+        Registers a double channel.
+
+        :param name: Log key, e.g. 'flywheel/top velocity'
+        :param getter: Called every update to get the value, leave out to append to the entry yourself
+        """
+        return cls._register(name, DoubleLogEntry(cls.get_log(), name), getter)
+
+    @classmethod
+    def double_array(cls, name: str, getter: Callable[[], Sequence[float]] | None = None) -> DoubleArrayLogEntry:
+        """
+        Registers a double array channel.
+
+        :param name: Log key, e.g. 'odometry/pose'
+        :param getter: Called every update to get the value, leave out to append to the entry yourself
+        """
+        return cls._register(name, DoubleArrayLogEntry(cls.get_log(), name), getter)
+
+    @classmethod
+    def boolean(cls, name: str, getter: Callable[[], bool] | None = None) -> BooleanLogEntry:
+        """
+        Registers a boolean channel.
+
+        :param name: Log key, e.g. 'wrist/note detected'
+        :param getter: Called every update to get the value, leave out to append to the entry yourself
+        """
+        return cls._register(name, BooleanLogEntry(cls.get_log(), name), getter)
+
+    @classmethod
+    def update(cls):
+        """
+        Samples and appends every channel that has a getter. Call once a loop.
+        """
+        if not config.SIGNAL_LOGGING:
+            return
+
+        timestamp = RobotController.getFPGATime()
+        errors = cls.errors
+        for name, entry, getter in cls.channels:
+            # one bad getter shouldn't stop the rest of the channels from being logged
+            try:
+                entry.append(getter(), timestamp)
+            except Exception as e:
+                cls.errors += 1
+                if name not in cls.failed:
+                    cls.failed.add(name)
+                    cls._report(name, e)
+        if cls.errors != errors:
+            ntcore.NetworkTableInstance.getDefault().getTable('logging').putNumber('signal errors', cls.errors)
+
+    @staticmethod
+    def _report(name: str, error: Exception):
+        # LocalLogger logs through this module, so it can only be imported once both are loaded
+        from utils.local_logger import LocalLogger
+
+        LocalLogger('SignalLogger').error(f'channel {name} failed, counting its failures from now on: {error!r}')
@@ -0,0 +1,292 @@
+"""
+Memory-mapped WPILog reader.
+
+Record boundaries are found with one pass over the record headers, then every header field
+and every fixed size payload is decoded with NumPy straight out of the mapped file, so a
+channel comes back as a pair of arrays instead of one Python object per record.
+"""
+import json
+import mmap
+import struct
+from array import array
+from dataclasses import dataclass
+
+import numpy as np
+
+MAGIC = b"WPILOG"
+HEADER_STRUCT = struct.Struct("<6sHI")  # magic, version, extra header length
+
+CONTROL_START = 0
+CONTROL_FINISH = 1
+CONTROL_METADATA = 2
+
+SCALAR_TYPES = {"double": "<f8", "int64": "<i8", "float": "<f4"}
+ARRAY_TYPES = {"double[]": "<f8", "int64[]": "<i8", "float[]": "<f4", "boolean[]": "<u1"}
+
+
+def _header_table() -> list[tuple[int, int, int]]:
+    """
+    For every possible header byte: (header length, offset of the payload size, payload size length).
+    """
+    table = []
+    for h in range(256):
+        id_length = (h & 0x3) + 1
+        size_length = ((h >> 2) & 0x3) + 1
+        timestamp_length = ((h >> 4) & 0x7) + 1
+        table.append((1 + id_length + size_length + timestamp_length, 1 + id_length, size_length))
+    return table
+
+
+HEADER_TABLE = _header_table()
+# (header length, offset of the payload size) for headers with a one byte payload size, which is nearly all of them
+SHORT_SIZE_TABLE = [(length, offset) if size_length == 1 else None for length, offset, size_length in HEADER_TABLE]
+ID_LENGTH = (np.arange(256) & 0x3) + 1
+SIZE_LENGTH = ((np.arange(256) >> 2) & 0x3) + 1
+TIMESTAMP_LENGTH = ((np.arange(256) >> 4) & 0x7) + 1
+# masks for integers 0 to 8 bytes long, the 8 byte mask is all ones as a signed int64
+MASKS = np.array([(1 << (8 * length)) - 1 for length in range(8)] + [-1], dtype=np.int64)
+
+@dataclass
+class Channel:
+    """
+    Every value logged to one entry.
+
+    values is a 1D array for double, int64, float and boolean entries, a 2D array for array
+    entries where every record has the same length, and a list otherwise (strings, raw data
+    and arrays that change length).
+    """
+    name: str
+    type: str
+    metadata: str
+    timestamps: np.ndarray  # seconds
+    values: np.ndarray | list
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+
+class WPILog:
+    """
+    Reads a .wpilog file written by DataLogManager or wpiutil.log.DataLog.
+
+    :param path: Path to the log
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self.map) < HEADER_STRUCT.size:
+            raise ValueError(f"{path} is too short to be a WPILog")
+        magic, self.version, extra_length = HEADER_STRUCT.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a WPILog")
+        if self.version >> 8 != 1:
+            raise ValueError(f"unsupported WPILog version {self.version >> 8}.{self.version & 0xFF}")
+
+        start = HEADER_STRUCT.size + extra_length
+        self.extra_header = self.map[HEADER_STRUCT.size:start].decode("utf-8", "replace")
+        self.data = np.frombuffer(self.map, dtype=np.uint8)
+        # overlapping views with a one byte stride, so element i is the integer starting at byte i
+        self.words = {
+            dtype: np.ndarray((len(self.map) - size + 1,), dtype=dtype, buffer=self.map, strides=(1,))
+            for dtype, size in (("<u4", 4), ("<u8", 8))
+        }
+
+        self.offsets = self._scan(start)
+        self._decode_headers()
+        self._read_control()
+
+    def _scan(self, position: int) -> np.ndarray:
+        """
+        Walks the record chain and returns the offset of every complete record.
+
+        Where a record starts depends on the length of every record before it, so this one pass has to
+        step through the headers in order. It only looks at the bytes it needs to find the next record,
+        everything else is decoded from the offsets afterwards.
+        """
+        buffer = self.map
+        end = len(buffer)
+        table = HEADER_TABLE
+        short = SHORT_SIZE_TABLE
+        from_bytes = int.from_bytes
+        offsets = array("q")
+        append = offsets.append
+
+        # every header byte is in the file this far from the end, so the common case can skip the bounds checks
+        safe = end - 16
+        while position < safe:
+            layout = short[buffer[position]]
+            append(position)
+            if layout is not None:
+                position += layout[0] + buffer[position + layout[1]]
+            else:
+                header_length, size_at, size_length = table[buffer[position]]
+                size_at += position
+                position += header_length + from_bytes(buffer[size_at:size_at + size_length], "little")
+        if position > end:
+            offsets.pop()  # the log was cut off partway through the last record
+            position = end
+
+        while position < end:
+            header_length, size_at, size_length = table[buffer[position]]
+            size_at += position
+            size = from_bytes(buffer[size_at:size_at + size_length], "little")
+            next_position = position + header_length + size
+            if next_position > end:
+                break
+            append(position)
+            position = next_position
+
+        return np.frombuffer(offsets, dtype=np.int64).copy() if len(offsets) else np.zeros(0, dtype=np.int64)
+
+    def _read(self, positions: np.ndarray, dtype: str) -> np.ndarray:
+        """
+        Reads an unaligned little endian integer at every position, zero filled past the end of the file.
+        """
+        view = self.words[dtype]
+        values = view[np.minimum(positions, len(view) - 1)]
+        tail = np.flatnonzero(positions >= len(view))
+        for i in tail.tolist():
+            values[i] = int.from_bytes(self.map[positions[i]:positions[i] + view.itemsize], "little")
+        return values.astype(np.int64)
+
+    def _decode_headers(self):
+        header = self.data[self.offsets]
+        id_length = ID_LENGTH[header]
+        size_length = SIZE_LENGTH[header]
+        timestamp_length = TIMESTAMP_LENGTH[header]
+
+        self.entry_ids = self._read(self.offsets + 1, "<u4") & MASKS[id_length]
+        size_at = self.offsets + 1 + id_length
+        self.sizes = self._read(size_at, "<u4") & MASKS[size_length]
+        timestamp_at = size_at + size_length
+        self.timestamps = self._read(timestamp_at, "<u8") & MASKS[timestamp_length]
+        self.payloads = timestamp_at + timestamp_length
+
+    def _read_control(self):
+        """
+        Reads the start, finish and metadata records to find which records belong to which entry.
+        """
+        self.entries: dict[str, dict] = {}
+        self.owner = np.full(len(self.offsets), -1, dtype=np.int64)  # index into self.starts for each record
+        self.starts: list[dict] = []
+
+        control = np.flatnonzero(self.entry_ids == 0)
+        open_entries: dict[int, int] = {}
+        boundaries: list[tuple[int, int, int]] = []  # (record index, entry id, start index or -1 once finished)
+
+        for index in control.tolist():
+            payload = bytes(self.map[self.payloads[index]:self.payloads[index] + self.sizes[index]])
+            if not payload:
+                continue
+            kind = payload[0]
+            if kind == CONTROL_START:
+                entry_id, = struct.unpack_from("<I", payload, 1)
+                at = 5
+                strings = []
+                for _ in range(3):
+                    length, = struct.unpack_from("<I", payload, at)
+                    strings.append(payload[at + 4:at + 4 + length].decode("utf-8", "replace"))
+                    at += 4 + length
+                name, type, metadata = strings
+                start = {"id": entry_id, "name": name, "type": type, "metadata": metadata}
+                open_entries[entry_id] = len(self.starts)
+                boundaries.append((index, entry_id, len(self.starts)))
+                self.starts.append(start)
+                self.entries[name] = start
+            elif kind == CONTROL_FINISH:
+                entry_id, = struct.unpack_from("<I", payload, 1)
+                if open_entries.pop(entry_id, None) is not None:
+                    boundaries.append((index, entry_id, -1))
+            elif kind == CONTROL_METADATA:
+                entry_id, length = struct.unpack_from("<II", payload, 1)
+                if entry_id in open_entries:
+                    self.starts[open_entries[entry_id]]["metadata"] = payload[9:9 + length].decode("utf-8", "replace")
+
+        # records belong to whichever start for their id came last before them, unless it was finished
+        if not boundaries:
+            return
+        marks = np.array(boundaries, dtype=np.int64)
+        records = np.flatnonzero(self.entry_ids != 0)
+        # sort the marks and the records together by (entry id, record index) so one searchsorted finds the last
+        # mark before every record, then throw out matches that came from a different entry id
+        mark_keys = marks[:, 1] * len(self.offsets) + marks[:, 0]
+        order = np.argsort(mark_keys)
+        mark_keys, marks = mark_keys[order], marks[order]
+        record_keys = self.entry_ids[records] * len(self.offsets) + records
+        which = np.searchsorted(mark_keys, record_keys) - 1
+        found = which >= 0
+        found[found] = marks[which[found], 1] == self.entry_ids[records[found]]
+        self.owner[records[found]] = marks[which[found], 2]
+
+    def names(self) -> list[str]:
+        return list(self.entries)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+    def channel(self, name: str) -> Channel:
+        """
+        Returns every value logged under name, across every time the entry was started.
+
+        :raises KeyError: if nothing was logged under name
+        """
+        if name not in self.entries:
+            raise KeyError(name)
+
+        type = self.entries[name]["type"]
+        metadata = self.entries[name]["metadata"]
+        starts = [i for i, start in enumerate(self.starts) if start["name"] == name]
+        records = np.flatnonzero(np.isin(self.owner, starts) & (self.entry_ids != 0))
+        # drop any record too short for its type rather than read past it
+        if type in SCALAR_TYPES:
+            records = records[self.sizes[records] >= np.dtype(SCALAR_TYPES[type]).itemsize]
+        elif type == "boolean":
+            records = records[self.sizes[records] >= 1]
+
+        timestamps = self.timestamps[records] / 1e6
+        payloads = self.payloads[records]
+        sizes = self.sizes[records]
+        return Channel(name, type, metadata, timestamps, self._values(type, payloads, sizes))
+
+    def _gather(self, payloads: np.ndarray, size: int) -> np.ndarray:
+        return self.data[payloads[:, None] + np.arange(size)]
+
+    def _values(self, type: str, payloads: np.ndarray, sizes: np.ndarray) -> np.ndarray | list:
+        if type in SCALAR_TYPES:
+            dtype = np.dtype(SCALAR_TYPES[type])
+            return self._gather(payloads, dtype.itemsize).view(dtype).ravel()
+
+        if type == "boolean":
+            return self.data[payloads] != 0
+
+        if type in ARRAY_TYPES:
+            dtype = np.dtype(ARRAY_TYPES[type])
+            if len(sizes) and (sizes == sizes[0]).all():
+                values = self._gather(payloads, int(sizes[0])).view(dtype)
+                return values.astype(bool) if type == "boolean[]" else values
+            return [
+                np.frombuffer(self.map, dtype=dtype, count=size // dtype.itemsize, offset=payload).copy()
+                for payload, size in zip(payloads.tolist(), sizes.tolist())
+            ]
+
+        raw = [bytes(self.map[payload:payload + size]) for payload, size in zip(payloads.tolist(), sizes.tolist())]
+        if type == "string":
+            return [value.decode("utf-8", "replace") for value in raw]
+        if type == "json":
+            return [json.loads(value) for value in raw]
+        return raw
+
+    def close(self):
+        # the mmap can't close while any array still points into it
+        self.data = None
+        self.words = None
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()